@@ -0,0 +1,235 @@
+"""
+Measures the throughput, peak memory and per-phase time of the bears on
+synthetic and vendored real-world corpora. Run it from the repository root
+with::
+
+    python -m benchmarks.BenchmarkSuite
+
+Every case runs in a fresh process, so its peak RSS is not distorted by the
+cases before it. The phases are parsing, the pyflakes ``Checker``, the
+construction and querying of the ``PyFlakesResult`` and the generation of
+the diffs of NoFutureImportBear.
+
+``--save FILE`` stores the measurements as baselines and ``--compare FILE``
+reports and fails on regressions against stored baselines. The baselines in
+``benchmarks/baselines.json`` were measured on a single development machine,
+so save new ones before comparing on different hardware.
+"""
+
+import argparse
+import json
+import multiprocessing
+import platform
+import time
+from collections import OrderedDict
+from queue import Queue
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+import pyflakes
+from coalib.settings.Section import Section
+from pyflakes.checker import Checker, FutureImportation
+from pyflakes_bears.NoFutureImportBear import NoFutureImportBear
+from pyflakes_bears.PyFlakesASTBear import (
+    PyFlakesASTBear, PyFlakesResult, parse_source)
+from pyflakes_bears.PrunedChecker import PrunedChecker
+
+from benchmarks.Corpus import (
+    generate_comprehension_module, generate_deeply_nested_module,
+    generate_docstring_heavy_module, generate_future_import_module,
+    generate_large_module, generate_pathological_future_imports,
+    load_vendored_corpus)
+
+PHASES = ('parse', 'checker', 'result', 'diffs')
+
+CASES = OrderedDict([
+    ('large_module',
+     lambda: [('large_module.py', generate_large_module())]),
+    ('deep_nesting',
+     lambda: [('deep_nesting.py', generate_deeply_nested_module())]),
+    ('comprehensions',
+     lambda: [('comprehensions.py', generate_comprehension_module())]),
+    ('docstrings',
+     lambda: [('docstrings.py', generate_docstring_heavy_module())]),
+    ('future_imports',
+     lambda: [('future_imports_{}.py'.format(index),
+               generate_future_import_module())
+              for index in range(10)]),
+    ('pathological_future_imports',
+     lambda: [('pathological_future_imports.py',
+               generate_pathological_future_imports())]),
+    ('vendored', load_vendored_corpus),
+])
+
+
+def analyse(filename, lines, bear, with_doctest, prune=False):
+    """
+    Runs all phases on a file.
+
+    :param prune: Whether the ``PrunedChecker`` with the requirements of
+                  NoFutureImportBear is used.
+    :return:      A list of the time spent in every phase.
+    """
+    start = time.perf_counter()
+    tree = parse_source(lines, filename)
+    parsed = time.perf_counter()
+    if prune:
+        checker = PrunedChecker(tree, filename=filename,
+                                withDoctest=with_doctest,
+                                scopes=bear.PYFLAKES_SCOPES,
+                                bindings=bear.PYFLAKES_BINDINGS)
+    else:
+        checker = Checker(tree, filename=filename, withDoctest=with_doctest)
+    checked = time.perf_counter()
+    result = PyFlakesResult(PyFlakesASTBear.name, checker.deadScopes,
+                            checker.messages)
+    list(result.get_nodes(result.module_scope, FutureImportation))
+    constructed = time.perf_counter()
+    list(bear.run(filename, lines,
+                  dependency_results={PyFlakesASTBear.name: [result]}))
+    finished = time.perf_counter()
+    return [parsed - start, checked - parsed, constructed - checked,
+            finished - constructed]
+
+
+def run_case(name, repeat, with_doctest, prune=False):
+    """
+    Runs a case ``repeat`` times and keeps the fastest run.
+
+    :return: A dictionary of the measurements.
+    """
+    files = CASES[name]()
+    bear = NoFutureImportBear(Section('benchmark'), Queue())
+    best = None
+    for _ in range(repeat):
+        totals = [0.0] * len(PHASES)
+        for filename, lines in files:
+            for phase, duration in enumerate(analyse(filename, lines, bear,
+                                                     with_doctest, prune)):
+                totals[phase] += duration
+        if best is None or sum(totals) < sum(best):
+            best = totals
+
+    return OrderedDict([
+        ('files', len(files)),
+        ('lines', sum(len(lines) for _, lines in files)),
+        ('files_per_sec', len(files) / sum(best)),
+        ('peak_rss_kb', None if resource is None else
+         resource.getrusage(resource.RUSAGE_SELF).ru_maxrss),
+        ('phases', OrderedDict(zip(PHASES, best))),
+    ])
+
+
+def run_suite(names, repeat, with_doctest, prune=False):
+    """
+    Runs the given cases, each in a fresh worker process.
+
+    :return: A dictionary of the environment and the measurements of every
+             case.
+    """
+    context = multiprocessing.get_context('spawn')
+    cases = OrderedDict()
+    for name in names:
+        with context.Pool(1) as pool:
+            cases[name] = pool.apply(run_case,
+                                     (name, repeat, with_doctest, prune))
+    return OrderedDict([
+        ('python', platform.python_version()),
+        ('pyflakes', pyflakes.__version__),
+        ('with_doctest', with_doctest),
+        ('prune', prune),
+        ('cases', cases),
+    ])
+
+
+def compare(results, baselines, threshold):
+    """
+    Compares measurements to baselines.
+
+    :param threshold: The tolerated relative slowdown or memory growth.
+    :return:          A list of descriptions of all regressions.
+    """
+    regressions = []
+    for name, case in results['cases'].items():
+        baseline = baselines['cases'].get(name)
+        if baseline is None:
+            continue
+        if case['files_per_sec'] < baseline['files_per_sec'] * (1 -
+                                                                threshold):
+            regressions.append('{}: {:.2f} files/s, baseline {:.2f}'.format(
+                name, case['files_per_sec'], baseline['files_per_sec']))
+        if (case['peak_rss_kb'] and baseline['peak_rss_kb'] and
+                case['peak_rss_kb'] > baseline['peak_rss_kb'] *
+                (1 + threshold)):
+            regressions.append('{}: peak RSS {:,} kB, baseline {:,} kB'
+                               .format(name, case['peak_rss_kb'],
+                                       baseline['peak_rss_kb']))
+    return regressions
+
+
+def print_results(results):
+    print('Python {}, pyflakes {}, withDoctest={}, prune={}'.format(
+        results['python'], results['pyflakes'], results['with_doctest'],
+        results.get('prune', False)))
+    print('{:<30}{:>7}{:>8}{:>10}{:>12}'.format(
+        'case', 'files', 'lines', 'files/s', 'peak kB') +
+        ''.join('{:>12}'.format(phase + ' ms') for phase in PHASES))
+    for name, case in results['cases'].items():
+        print('{:<30}{:>7}{:>8}{:>10.2f}{:>12,}'.format(
+            name, case['files'], case['lines'], case['files_per_sec'],
+            case['peak_rss_kb'] or 0) +
+            ''.join('{:>12.1f}'.format(duration * 1000)
+                    for duration in case['phases'].values()))
+
+
+def main(args=None):
+    """
+    :return: 1 if a regression against the compared baselines was found,
+             0 otherwise.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split('.')[0])
+    parser.add_argument('cases', nargs='*', metavar='CASE',
+                        help='cases to run, all by default: ' +
+                        ', '.join(CASES))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--no-doctest', dest='with_doctest',
+                        action='store_false',
+                        help='do not analyse the code in docstrings')
+    parser.add_argument('--prune', action='store_true',
+                        help='only analyse what NoFutureImportBear needs')
+    parser.add_argument('--save', metavar='FILE',
+                        help='store the measurements as baselines')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='compare the measurements to baselines')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='tolerated relative regression, 0.2 by default')
+    args = parser.parse_args(args)
+
+    unknown = set(args.cases) - set(CASES)
+    if unknown:
+        parser.error('unknown cases: ' + ', '.join(sorted(unknown)))
+
+    results = run_suite(args.cases or list(CASES), args.repeat,
+                        args.with_doctest, args.prune)
+    print_results(results)
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent=2)
+            file.write('\n')
+
+    if args.compare:
+        with open(args.compare) as file:
+            baselines = json.load(file)
+        regressions = compare(results, baselines, args.threshold)
+        for regression in regressions:
+            print('regression: ' + regression)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
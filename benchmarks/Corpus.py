@@ -0,0 +1,152 @@
+import os
+
+
+def generate_docstring_heavy_module(functions=200, examples=4):
+    """
+    Generates a module whose functions carry long docstrings full of
+    doctest examples, like heavily documented library code.
+
+    :param functions: The number of functions in the module.
+    :param examples:  The number of doctest examples per docstring.
+    :return:          The source of the module as list of lines.
+    """
+    lines = ['import math\n', '\n']
+    for function in range(functions):
+        lines += ['\n',
+                  'def function_{}(value):\n'.format(function),
+                  '    """\n',
+                  '    Scales the given value.\n',
+                  '\n',
+                  '    Some prose describing what the function does, which\n',
+                  '    parameters it takes and what it returns.\n',
+                  '\n']
+        for example in range(examples):
+            lines += ['    >>> result = function_{}({})\n'.format(function,
+                                                                  example),
+                      '    >>> math.floor(result) >= 0\n',
+                      '    True\n']
+        lines += ['    """\n',
+                  '    return math.sqrt(abs(value)) * {}\n'.format(function)]
+    return lines
+
+
+def generate_large_module(statements=20000):
+    """
+    Generates a long, flat module with non-ASCII string literals and
+    comments, like generated translation or data tables.
+
+    :param statements: The number of assignments in the module.
+    :return:           The source of the module as list of lines.
+    """
+    return ['entry_{0} = "Grüße, 世界 {0}"  # ✓ generated\n'.format(index)
+            for index in range(statements)]
+
+
+def generate_deeply_nested_module(blocks=50, depth=40):
+    """
+    Generates a module of deeply nested functions and control flow, which
+    stresses the scope handling of pyflakes.
+
+    :param blocks: The number of nested blocks in the module.
+    :param depth:  The nesting depth of every block. The tokenizer limits
+                   the indentation to 100 levels.
+    :return:       The source of the module as list of lines.
+    """
+    lines = []
+    for block in range(blocks):
+        lines.append('def block_{}(value):\n'.format(block))
+        for level in range(1, depth):
+            indent = '    ' * level
+            if level % 2:
+                lines.append('{}def level_{}(value_{}=value):\n'.format(
+                    indent, level, level))
+            else:
+                lines.append('{}if value_{} > {}:\n'.format(
+                    indent, level - 1, level))
+            lines.append('{}    value = value_{} if {} else value\n'.format(
+                indent, level - (level % 2 == 0), level))
+        lines.append('{}return value\n'.format('    ' * depth))
+        lines.append('\n')
+    return lines
+
+
+def generate_comprehension_module(functions=300):
+    """
+    Generates a module full of nested list, set, dict and generator
+    comprehensions, each of which gets its own pyflakes scope.
+
+    :param functions: The number of functions in the module.
+    :return:          The source of the module as list of lines.
+    """
+    lines = []
+    for function in range(functions):
+        lines += [
+            'def comprehensions_{}(rows):\n'.format(function),
+            '    cells = [cell for row in rows for cell in row if cell]\n',
+            '    unique = {cell % 7 for cell in cells}\n',
+            '    lookup = {key: [value for value in cells if value > key]\n',
+            '              for key in unique}\n',
+            '    total = sum(len(values) for values in lookup.values())\n',
+            '    return [[x * y for x in range(total)] for y in unique]\n',
+            '\n']
+    return lines
+
+
+def generate_future_import_module(imports=100, statements=1000):
+    """
+    Generates a module starting with many ``__future__`` imports in all
+    layouts NoFutureImportBear handles, followed by ordinary code.
+
+    :param imports:    The number of future import statements.
+    :param statements: The number of statements after the imports.
+    :return:           The source of the module as list of lines.
+    """
+    layouts = (['from __future__ import division\n'],
+               ['from __future__ import print_function, generators\n'],
+               ['from __future__ import absolute_import, \\\n',
+                '    with_statement\n'])
+    lines = []
+    for index in range(imports - 1):
+        lines += layouts[index % len(layouts)]
+    lines.append('from __future__ import nested_scopes; import sys\n')
+    lines += ['value_{0} = {0} / 2\n'.format(index)
+              for index in range(statements)]
+    return lines
+
+
+def load_vendored_corpus():
+    """
+    Loads the real-world modules vendored into ``benchmarks/corpus``.
+
+    :return: A list of tuples of the filename and the source as list of
+             lines of every module, sorted by filename.
+    """
+    directory = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'corpus')
+    corpus = []
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith('.py'):
+            path = os.path.join(directory, filename)
+            with open(path, encoding='utf-8') as file:
+                corpus.append((path, file.readlines()))
+    return corpus
+
+
+def generate_pathological_future_imports(imports=2000, continuations=2000):
+    """
+    Generates a module consisting of thousands of future import statements
+    and one import continued by backslashes over thousands of lines. The
+    imports are aliased, so pyflakes binds every one of them.
+
+    :param imports:       The number of single line future imports.
+    :param continuations: The number of continuation lines of the last
+                          import.
+    :return:              The source of the module as list of lines.
+    """
+    lines = ['from __future__ import division as division_{}\n'.format(index)
+             for index in range(imports)]
+    lines.append('from __future__ import generators, \\\n')
+    lines += ['    generators as generators_{}, \\\n'.format(index)
+              for index in range(continuations)]
+    lines += ['    generators\n', 'value = 1\n']
+    return lines
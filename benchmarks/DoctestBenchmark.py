@@ -0,0 +1,47 @@
+"""
+Compares the throughput of pyflakes with and without doctest analysis on a
+docstring heavy corpus. Run it from the repository root with::
+
+    python -m benchmarks.DoctestBenchmark
+"""
+
+import argparse
+import ast
+import time
+
+from pyflakes.checker import Checker
+
+from benchmarks.Corpus import generate_docstring_heavy_module
+
+
+def measure(source, with_doctest, repeat):
+    """
+    :return: The number of files analysed per second.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        Checker(ast.parse(source), 'benchmark.py', withDoctest=with_doctest)
+    return repeat / (time.perf_counter() - start)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('.')[0])
+    parser.add_argument('--functions', type=int, default=200)
+    parser.add_argument('--examples', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args(args)
+
+    source = ''.join(generate_docstring_heavy_module(args.functions,
+                                                     args.examples))
+    with_doctest = measure(source, True, args.repeat)
+    without_doctest = measure(source, False, args.repeat)
+
+    print('{} lines per file'.format(source.count('\n')))
+    print('withDoctest=True:  {:8.2f} files/s'.format(with_doctest))
+    print('withDoctest=False: {:8.2f} files/s'.format(without_doctest))
+    print('speedup:           {:8.2f}x'.format(without_doctest /
+                                               with_doctest))
+
+
+if __name__ == '__main__':
+    main()
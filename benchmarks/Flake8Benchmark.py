@@ -0,0 +1,117 @@
+"""
+Measures the overhead of the NoFutureImport plugin in flake8 runs, serial
+and with ``--jobs``. Requires flake8, which is not a dependency of this
+package. Run it from the repository root with::
+
+    python -m benchmarks.Flake8Benchmark
+
+The plugin is registered as flake8 local plugin, so it does not need to be
+installed. The corpus consists of copies of the vendored modules and of
+generated modules with future imports.
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.Corpus import (
+    generate_future_import_module, load_vendored_corpus)
+
+BASE_CONFIG = """\
+[flake8]
+select = F
+"""
+
+PLUGIN_CONFIG = BASE_CONFIG + """
+[flake8:local-plugins]
+extension =
+    F482 = pyflakes_generic_plugins.NoFutureImport:NoFutureImport
+paths =
+    {root}
+"""
+
+
+def write_corpus(directory, copies, future_files):
+    """
+    Writes ``copies`` copies of every vendored module and ``future_files``
+    modules with future imports into ``directory``.
+    """
+    for copy in range(copies):
+        for path, lines in load_vendored_corpus():
+            name = '{}_{}'.format(copy, os.path.basename(path))
+            with open(os.path.join(directory, name), 'w') as file:
+                file.writelines(lines)
+    for index in range(future_files):
+        with open(os.path.join(directory, 'future_{}.py'.format(index)),
+                  'w') as file:
+            file.writelines(generate_future_import_module(imports=8,
+                                                          statements=200))
+
+
+def run_flake8(config, directory, jobs, repeat):
+    """
+    :return: The fastest wall time of ``repeat`` flake8 runs in seconds.
+    """
+    command = [sys.executable, '-m', 'flake8', '--config', config,
+               '--jobs', str(jobs), '--exit-zero', '--output-file',
+               os.devnull, directory]
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.check_call(command)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('.')[0])
+    parser.add_argument('--copies', type=int, default=50,
+                        help='copies of the vendored corpus')
+    parser.add_argument('--future-files', type=int, default=100,
+                        help='number of modules with future imports')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(),
+                        help='flake8 jobs of the parallel runs')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(args)
+
+    try:
+        import flake8  # noqa: F401
+    except ImportError:
+        parser.error('flake8 is not installed')
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    directory = tempfile.mkdtemp()
+    try:
+        corpus = os.path.join(directory, 'corpus')
+        os.mkdir(corpus)
+        write_corpus(corpus, args.copies, args.future_files)
+        configs = {}
+        for name, template in (('pyflakes', BASE_CONFIG),
+                               ('pyflakes + F482', PLUGIN_CONFIG)):
+            configs[name] = os.path.join(directory,
+                                         '{}.cfg'.format(len(configs)))
+            with open(configs[name], 'w') as file:
+                file.write(template.format(root=root))
+
+        print('{} files'.format(len(os.listdir(corpus))))
+        print('{:<20}{:>12}{:>12}'.format('', 'jobs=1',
+                                          'jobs={}'.format(args.jobs)))
+        times = {}
+        for name, config in configs.items():
+            times[name] = [run_flake8(config, corpus, jobs, args.repeat)
+                           for jobs in (1, args.jobs)]
+            print('{:<20}{:>11.2f}s{:>11.2f}s'.format(name, *times[name]))
+        print('{:<20}{:>11.1%}{:>12.1%}'.format(
+            'overhead', *(with_plugin / without - 1
+                          for with_plugin, without in
+                          zip(times['pyflakes + F482'], times['pyflakes']))))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Measures what importing the bear modules costs on top of coala's own bear
+machinery, as paid by bear discovery, using ``python -X importtime``. Run it
+from the repository root with::
+
+    python -m benchmarks.ImportTimeBenchmark
+"""
+
+import argparse
+import subprocess
+import sys
+
+MODULES = ('pyflakes_bears.PyFlakesASTBear',
+           'pyflakes_bears.NoFutureImportBear')
+
+# Imported before the measured module, as coala has imported them before it
+# collects any bear.
+BASELINE = 'coalib.bears.LocalBear'
+
+
+def import_times(module, baseline=BASELINE):
+    """
+    Imports a module in a fresh interpreter with ``-X importtime``.
+
+    :param module:   The module to import.
+    :param baseline: A module imported before, whose imports are not
+                     counted.
+    :return:         A dictionary mapping every module the import of
+                     ``module`` loaded to its self time in microseconds.
+    """
+    command = [sys.executable, '-X', 'importtime', '-c',
+               'import {}; import {}'.format(baseline, module)]
+    output = subprocess.run(command, stderr=subprocess.PIPE,
+                            universal_newlines=True, check=True).stderr
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        self_time, _, name = line[len('import time:'):].split('|')
+        if self_time.strip().isdigit():
+            times[name.strip()] = int(self_time)
+        if name.strip() == baseline:
+            times.clear()
+    return times
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('.')[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('modules', nargs='*', default=MODULES)
+    args = parser.parse_args(args)
+
+    for module in args.modules:
+        runs = [import_times(module) for _ in range(args.repeat)]
+        fastest = min(runs, key=lambda times: sum(times.values()))
+        print('{}: {} modules, {:.1f} ms'.format(
+            module, len(fastest), sum(fastest.values()) / 1000))
+        for name, time in sorted(fastest.items(), key=lambda item: -item[1]):
+            print('    {:<50}{:>8.1f} ms'.format(name, time / 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Measures the peak memory of parsing a large file by joining its lines into
+one string, with ``parse_source`` and of analysing it, as well as the
+memory a live and a snapshot result keep alive. It also measures the peak
+RSS of running PyFlakesASTBear over many files while keeping all results,
+as coala keeps dependency results, with and without ``pyflakes_snapshot``.
+Run it from the repository root with::
+
+    python -m benchmarks.MemoryBenchmark
+"""
+
+import argparse
+import ast
+import gc
+import multiprocessing
+import resource
+import tracemalloc
+from queue import Queue
+
+from coalib.settings.Section import Section
+from pyflakes.checker import Checker
+from pyflakes_bears.PyFlakesASTBear import (
+    PyFlakesASTBear, PyFlakesResult, parse_source)
+
+from benchmarks.Corpus import generate_large_module, load_vendored_corpus
+
+
+def measure(function):
+    """
+    :return: A tuple of the result of ``function``, the memory it allocated
+             at peak and the memory still allocated once it returned.
+    """
+    gc.collect()
+    tracemalloc.start()
+    result = function()
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak, retained
+
+
+def run_files(files, snapshot):
+    """
+    Runs PyFlakesASTBear over the vendored corpus until ``files`` files
+    were analysed, keeping all results.
+
+    :return: The peak RSS of the process in kB.
+    """
+    corpus = [lines for _, lines in load_vendored_corpus()]
+    bear = PyFlakesASTBear(Section('benchmark'), Queue())
+    results = []
+    for index in range(files):
+        results.extend(bear.run('file_{}.py'.format(index),
+                                corpus[index % len(corpus)],
+                                pyflakes_doctest=False,
+                                pyflakes_snapshot=snapshot))
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('.')[0])
+    parser.add_argument('--statements', type=int, default=20000)
+    parser.add_argument('--files', type=int, default=2000,
+                        help='number of files analysed by the bear')
+    args = parser.parse_args(args)
+
+    lines = generate_large_module(args.statements)
+
+    def analyse():
+        checker = Checker(parse_source(lines), 'benchmark.py')
+        return PyFlakesResult('benchmark', checker.deadScopes,
+                              checker.messages)
+
+    rows = [
+        ('ast.parse of join', measure(lambda: ast.parse(''.join(lines)))),
+        ('parse_source', measure(lambda: parse_source(lines))),
+        ('live result', measure(analyse)),
+        ('snapshot result', measure(lambda: analyse().snapshot())),
+    ]
+
+    print('{:,} characters of source'.format(sum(map(len, lines))))
+    print('{:<20}{:>16}{:>16}'.format('', 'peak', 'retained'))
+    for name, (_, peak, retained) in rows:
+        print('{:<20}{:>16,}{:>16,}'.format(name, peak, retained))
+
+    print()
+    print('peak RSS of analysing {:,} files, keeping all results'.format(
+        args.files))
+    context = multiprocessing.get_context('spawn')
+    for snapshot in (False, True):
+        with context.Pool(1) as pool:
+            peak = pool.apply(run_files, (args.files, snapshot))
+        print('{:<20}{:>16,} kB'.format(
+            'snapshot results' if snapshot else 'live results', peak))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Measures how the cost of running rules on a RuleEngine grows with the
+number of rules, compared to every rule walking the analysis on its own.
+Idle rules match nothing, so their cost is the walk and the dispatch alone.
+pyflakes itself is not timed. Run it from the repository root with::
+
+    python -m benchmarks.RuleEngineBenchmark
+"""
+
+import argparse
+import ast
+import time
+
+from pyflakes.checker import Checker
+from pyflakes_generic_plugins.RuleEngine import Rule, RuleEngine
+
+from benchmarks.Corpus import generate_large_module, load_vendored_corpus
+
+# The types the generated rules are interested in, in turn.
+BINDING_TYPES = ('Importation', 'Assignment', 'FunctionDefinition',
+                 'ClassDefinition', 'Argument', 'FutureImportation')
+MESSAGE_TYPES = ('UnusedImport', 'UndefinedName', 'UnusedVariable',
+                 'RedefinedWhileUnused')
+
+
+def make_rules(count, idle=False):
+    """
+    :param idle: Whether the rules are interested in future imports only,
+                 which the corpus has none of, so only the walk is timed.
+    :return:     A list of ``count`` rules that report every binding or
+                 message of one type.
+    """
+    rules = []
+    for index in range(count):
+        if idle:
+            attributes = {'BINDING_TYPES': ('FutureImportation',)}
+        elif index % 3 == 2:
+            attributes = {'MESSAGE_TYPES': (
+                MESSAGE_TYPES[index // 3 % len(MESSAGE_TYPES)],)}
+        else:
+            attributes = {'BINDING_TYPES': (
+                BINDING_TYPES[index % len(BINDING_TYPES)],)}
+        attributes['visit_binding'] = (
+            lambda self, scope, binding: (self.report(1, 0, binding.name),))
+        attributes['visit_message'] = (
+            lambda self, message: (self.report(message.lineno, 0, ''),))
+        rules.append(type('Rule{}'.format(index), (Rule,), attributes)())
+    return rules
+
+
+def measure(engines, files, repeat):
+    """
+    :return: The fastest time in milliseconds of running all engines on all
+             files.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for tree, checker in files:
+            for engine in engines:
+                engine.run(tree, lambda: checker)
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('.')[0])
+    parser.add_argument('--rules', type=int, nargs='+',
+                        default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(args)
+
+    sources = [''.join(lines) for _, lines in load_vendored_corpus()]
+    sources.append(''.join(generate_large_module(5000)))
+    files = []
+    for source in sources:
+        tree = ast.parse(source)
+        files.append((tree, Checker(tree, 'benchmark.py')))
+
+    print('{} files'.format(len(files)))
+    print('{:>6}{:>16}{:>16}{:>16}'.format('rules', 'one engine',
+                                           'one per rule', 'idle rules'))
+    for count in args.rules:
+        rules = make_rules(count)
+        shared = measure([RuleEngine(rules)], files, args.repeat)
+        separate = measure([RuleEngine([rule]) for rule in rules], files,
+                           args.repeat)
+        idle = measure([RuleEngine(make_rules(count, idle=True))], files,
+                       args.repeat)
+        print('{:>6}{:>13.2f} ms{:>13.2f} ms{:>13.2f} ms'.format(
+            count, shared, separate, idle))
+
+
+if __name__ == '__main__':
+    main()
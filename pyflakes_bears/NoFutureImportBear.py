@@ -1,8 +1,47 @@
+import re
+import tokenize
+
 from coalib.bears.LocalBear import LocalBear
 from coalib.results.Result import Result
-from coalib.results.Diff import Diff
-from pyflakes_bears.PyFlakesASTBear import PyFlakesASTBear
-from pyflakes.checker import FutureImportation
+from coalib.results.SourceRange import SourceRange
+from pyflakes_bears.PyFlakesASTBear import (
+    PyFlakesASTBear, get_pyflakes_results)
+from pyflakes_generic_plugins.NoFutureImport import has_future_import
+
+
+# A line holding nothing but a future import that tokenizes trivially.
+SIMPLE_FUTURE_IMPORT = re.compile(
+    r'from[ \t]+__future__[ \t]+import[ \t]+'
+    r'\w+(?:[ \t]+as[ \t]+\w+)?(?:[ \t]*,[ \t]*\w+(?:[ \t]+as[ \t]+\w+)?)*'
+    r'[ \t]*(?:#.*)?\r?\n?$')
+
+
+def skip_statement(tokens, row=0):
+    """
+    Consumes the tokens of the rest of a statement.
+
+    :param tokens: An iterator of tokens.
+    :param row:    The line the tokenized source starts after.
+    :return:       A tuple of the exclusive end of the statement as (line,
+                   column) tuple and the first token of the next statement
+                   on the same logical line or ``None``. The end of a
+                   statement ending with the line is the start of the next
+                   line.
+    """
+    depth = 0
+    for token in tokens:
+        if token.type == tokenize.OP and token.string in '([{':
+            depth += 1
+        elif token.type == tokenize.OP and token.string in ')]}':
+            depth -= 1
+        elif token.type in (tokenize.NEWLINE, tokenize.ENDMARKER):
+            return (token.start[0] + row + 1, 0), None
+        elif token.string == ';' and depth == 0:
+            token = next(tokens)
+            if token.type in (tokenize.COMMENT, tokenize.NEWLINE):
+                return (token.start[0] + row + 1, 0), None
+            return (token.start[0] + row, token.start[1]), token
+    raise StopIteration
 
 
 class NoFutureImportBear(LocalBear):
@@ -15,111 +54,183 @@ class NoFutureImportBear(LocalBear):
     AUTHORS_EMAILS = {'coala-devel@googlegroups.com'}
     LICENSE = 'AGPL-3.0'
     BEAR_DEPS = {PyFlakesASTBear}
+    PYFLAKES_DOCTEST = False
+    PYFLAKES_FILTER = staticmethod(has_future_import)
+    PYFLAKES_SCOPES = ('ModuleScope',)
+    PYFLAKES_BINDINGS = ('FutureImportation',)
 
-    def remove_future_imports(self, file, lineno, corrected_lines):
+    @staticmethod
+    def find_future_imports(file):
         """
-        Removes all FutureImportation(pyflakes AST) nodes from
-        the input line.
-
-        :param file:            The file contents as string array
-        :param lineno:          The filename of the file
-        :param corrected_lines: A set containing lineno of all violations
-                                that have been fixed
-        :return:                A tuple containing diff object and
-                                corrected_lines
+        Finds the exact spans of all future import statements in the header
+        of a module, i.e. up to the first statement that is neither the
+        docstring nor a future import.
+
+        Lines holding nothing but a simple future import are recognized by
+        a regular expression, every other logical line of the header is
+        tokenized. A statement ending with the line takes the rest of the
+        line with it, including a trailing comment. A statement ended by a
+        semicolon takes the semicolon and the whitespace up to the next
+        statement.
+
+        A UTF-8 byte order mark starting the file is skipped, and columns
+        of the first line count it, so it is kept by the diff.
+
+        :param file: The file contents as string array.
+        :return:     A list of tuples of the start and the end of every
+                     statement as (line, column) tuples, the end being
+                     exclusive.
         """
-        def handle_backslash(line, lineno, diff, corrected_lines):
-            """
-            Helper function to handle use of backslash's in import
-            statements.
-
-            An example of such statement is:
-
-            `from __future__ import print_function, \\`
-            `                       generators`
-
-            :param line:            The content of line in form of str
-            :param lineno:          The filename of the file
-            :param diff:            A diff object that remanins same until
-                                    the logical line is completely removed.
-            :param corrected_lines: A set containing lineno of all violations
-                                    that have been fixed
-            :return:                A tuple containing diff object and
-                                    corrected_lines
-            """
-
-            corrected_lines.add(lineno)
-            semicolon_index = line.find(';')
-            if semicolon_index == -1:
-                if line.rstrip()[-1] == '\\':
-                    next_line = file[lineno]
-                    diff, corrected_lines = handle_backslash(
-                        next_line, lineno+1, diff, corrected_lines)
-                diff.delete_line(lineno)
-            else:
-                replacement = line[semicolon_index + 1:].lstrip()
-                diff, corrected_lines = handle_semicolon(
-                    replacement, lineno, diff, corrected_lines)
-
-            return diff, corrected_lines
-
-        def handle_semicolon(line, lineno, diff, corrected_lines):
-            """
-            Helper function to handle use of semicolon in import
-            statements.
-
-            An example of such statement is:
-
-            `from __future__ import generators; x = 2`
-
-            :param line:            The content of line in form of str
-            :param lineno:          The filename of the file
-            :param diff:            A diff object that remanins same until
-                                    the logical line is completely removed.
-            :param corrected_lines: A set containing lineno of all violations
-                                    that have been fixed
-            :return:                A tuple containing diff object and
-                                    corrected_lines
-            """
-
-            corrected_lines.add(lineno)
-            if not line.lstrip().startswith('from __future__'):
-                return diff, corrected_lines
-            semicolon_index = line.find(';')
-            if semicolon_index == -1:
-                diff, corrected_lines = handle_backslash(
-                    line, lineno, diff, corrected_lines)
-            else:
-                replacement = line[semicolon_index + 1:].lstrip()
-                diff.modify_line(lineno, replacement)
-                if len(replacement) != 0:
-                    diff, corrected_lines = handle_semicolon(
-                        replacement, lineno, diff, corrected_lines)
-
-            return diff, corrected_lines
+        if file and file[0].startswith('\ufeff'):
+            spans = NoFutureImportBear.find_future_imports(
+                [file[0][1:]] + list(file[1:]))
+            return [tuple((line, column + 1) if line == 1 else (line, column)
+                          for line, column in span)
+                    for span in spans]
+
+        spans = []
+        first = True
+        row = 0
+        try:
+            while row < len(file):
+                line = file[row]
+                stripped = line.strip()
+                if not stripped or stripped.startswith('#'):
+                    row += 1
+                    continue
+                if SIMPLE_FUTURE_IMPORT.match(line):
+                    spans.append(((row + 1, 0), (row + 2, 0)))
+                    first = False
+                    row += 1
+                    continue
+
+                # Tokenize the logical line starting here, which may hold
+                # several statements.
+                tokens = tokenize.generate_tokens(
+                    map(file.__getitem__, range(row, len(file))).__next__)
+                token = next(tokens)
+                while token is not None:
+                    start = token.start[0] + row, token.start[1]
+                    if token.type == tokenize.STRING and first:
+                        end, token = skip_statement(tokens, row)
+                    elif (token.string == 'from' and
+                          next(tokens).string == '__future__'):
+                        end, token = skip_statement(tokens, row)
+                        spans.append((start, end))
+                    else:
+                        return spans
+                    first = False
+                row = end[0] - 1
+        except (tokenize.TokenError, SyntaxError, StopIteration):
+            pass
+        return spans
+
+    def remove_future_imports(self, file):
+        """
+        Removes all future import statements from the header of a module in
+        a single pass, producing one diff.
 
-        diff = Diff(file)
-        line = file[lineno - 1]
-        diff, corrected_lines = handle_semicolon(
-            line, lineno, diff, corrected_lines)
+        Statements after a future import on the same line, like in
+        `from __future__ import generators; x = 2`, are kept, as are other
+        statements sharing a line with it. Continuations by parentheses or
+        backslashes and comments are handled like Python does.
+
+        :param file: The file contents as string array.
+        :return:     A tuple of the diff and a sorted list of the lines the
+                     removed logical lines start on.
+        """
+        from coalib.results.Diff import Diff
+        spans = self.find_future_imports(file)
+        removed = {}
+        for (start_line, start_column), (end_line, end_column) in spans:
+            if end_column == 0:
+                end_line, end_column = end_line - 1, None
+            for lineno in range(start_line, min(end_line, len(file)) + 1):
+                removed.setdefault(lineno, []).append(
+                    (start_column if lineno == start_line else 0,
+                     end_column if lineno == end_line else None))
 
-        return diff, corrected_lines
+        diff = Diff(file)
+        for lineno, ranges in sorted(removed.items()):
+            line = file[lineno - 1]
+            kept = []
+            position = 0
+            for start, end in sorted(ranges):
+                kept.append(line[position:start])
+                position = len(line) if end is None else end
+            kept.append(line[position:])
+            text = ''.join(kept)
+            if not text.strip():
+                diff.delete_line(lineno)
+                continue
+            if position == len(line):
+                # The line ended with a removed statement, which took the
+                # separating semicolon and the line break with it.
+                text = text.rstrip()
+                if text.endswith(';'):
+                    text = text[:-1].rstrip()
+                text += line[len(line.rstrip('\r\n')):]
+            if text != line:
+                diff.modify_line(lineno, text)
+
+        # Statements chained by semicolons are reported as one.
+        starts = {start[0] for index, (start, _) in enumerate(spans)
+                  if index == 0 or start[1] == 0 or
+                  spans[index - 1][1] != start}
+        return diff, sorted(starts)
 
     def run(self, filename, file,
-            dependency_results=dict()
+            dependency_results=dict(),
+            pyflakes_timing_file: str = '',
+            pyflakes_profile_directory: str = '',
+            pyflakes_profile_threshold: float = 1.0,
             ):
-        corrected_lines = set()
-        for result in dependency_results.get(PyFlakesASTBear.name, []):
-            for node in result.get_nodes(result.module_scope,
-                                         FutureImportation):
-                lineno = node.source.lineno
-                if lineno not in corrected_lines:
-                    corrected, corrected_lines = self.remove_future_imports(
-                                file, lineno, corrected_lines
-                                )
-                    yield Result.from_values(
-                        origin=self,
-                        message='Future import(s) found',
-                        file=filename,
-                        diffs={filename: corrected},
-                        line=lineno)
+        """
+        :param pyflakes_timing_file:
+            File to which the wall time, CPU time and net change in live
+            memory blocks of the phases of this bear are appended as one
+            JSON record per file. Nothing is recorded if empty.
+        :param pyflakes_profile_directory:
+            Directory to which a cProfile dump is written for every file
+            whose processing takes longer than
+            ``pyflakes_profile_threshold``. Nothing is profiled if empty.
+        :param pyflakes_profile_threshold:
+            The time in seconds the processing of a file has to take for its
+            profile to be written.
+        """
+        from pyflakes_bears.PyFlakesProfiler import (
+            NULL_RECORDER, get_recorder)
+        recorder = get_recorder(self.name, filename, pyflakes_timing_file,
+                                pyflakes_profile_directory,
+                                pyflakes_profile_threshold)
+        if recorder is NULL_RECORDER:
+            yield from self.get_results(filename, file, dependency_results,
+                                        recorder)
+            return
+
+        # Collect the results first, so the time their consumer spends is
+        # not recorded.
+        with recorder:
+            results = list(self.get_results(filename, file,
+                                            dependency_results, recorder))
+        yield from results
+
+    def get_results(self, filename, file, dependency_results, recorder):
+        from pyflakes.checker import FutureImportation
+        linenos = []
+        for result in get_pyflakes_results(dependency_results):
+            with recorder.phase('query'):
+                linenos.extend(node.source.lineno for node in
+                               result.get_nodes(result.module_scope,
+                                                FutureImportation))
+        if not linenos:
+            return
+
+        with recorder.phase('diffs'):
+            diff, starts = self.remove_future_imports(file)
+        if not starts:
+            return
+        yield Result(self, 'Future import(s) found',
+                     affected_code=[SourceRange.from_values(filename, lineno)
+                                    for lineno in starts],
+                     diffs={filename: diff})
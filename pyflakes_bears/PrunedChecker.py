@@ -0,0 +1,111 @@
+import ast
+
+from pyflakes.checker import Checker
+
+# The statements that can hold other statements. They are walked in any
+# case, so bindings nested in them are found.
+COMPOUND_NODES = {'Module', 'If', 'For', 'AsyncFor', 'While', 'With',
+                  'AsyncWith', 'Try', 'TryStar', 'ExceptHandler', 'Match',
+                  'match_case', 'FunctionDef', 'AsyncFunctionDef',
+                  'ClassDef'}
+
+# The fields of nodes holding statements. Nodes not in COMPOUND_NODES that
+# have any of them, e.g. of newer Python versions, are walked, too.
+COMPOUND_FIELDS = ('body', 'orelse', 'handlers', 'finalbody', 'cases')
+
+# The nodes creating the bindings a pruned analysis can be restricted to.
+BINDING_NODES = {
+    'Importation': {'Import', 'ImportFrom'},
+    'SubmoduleImportation': {'Import'},
+    'ImportationFrom': {'ImportFrom'},
+    'StarImportation': {'ImportFrom'},
+    'FutureImportation': {'ImportFrom'},
+    'Definition': {'FunctionDef', 'AsyncFunctionDef', 'ClassDef'},
+    'FunctionDefinition': {'FunctionDef', 'AsyncFunctionDef'},
+    'ClassDefinition': {'ClassDef'},
+}
+
+# The scopes a pruned analysis can be restricted to. Function bodies are
+# skipped unless function scopes are required.
+SCOPES = {'ModuleScope', 'DoctestScope', 'ClassScope', 'FunctionScope'}
+
+
+def is_compound(node_class):
+    """
+    :param node_class: An ``ast`` node class.
+    :return:           Whether nodes of the class can hold statements.
+    """
+    return (not issubclass(node_class, ast.expr) and
+            any(field in node_class._fields for field in COMPOUND_FIELDS))
+
+
+def get_handled_nodes(scopes, bindings):
+    """
+    Determines the nodes pyflakes has to handle for the given requirements.
+
+    :param scopes:   The names of the pyflakes scope classes whose bindings
+                     are required.
+    :param bindings: The names of the pyflakes binding classes required.
+    :return:         A set of names of ``ast`` node classes, or ``None`` if
+                     the requirements cannot be met by a pruned analysis.
+    """
+    if not set(scopes) <= SCOPES or not set(bindings) <= set(BINDING_NODES):
+        return None
+    nodes = set(COMPOUND_NODES)
+    for binding in bindings:
+        nodes |= BINDING_NODES[binding]
+    return nodes
+
+
+class PrunedChecker(Checker):
+    """
+    A pyflakes ``Checker`` that only builds the bindings its consumers
+    declared they need.
+
+    Nodes that can neither create a required binding nor hold statements
+    that do, like expressions and assignments, are not walked. Statements
+    unknown to ``COMPOUND_NODES`` are walked if they can hold statements,
+    see ``is_compound``. Function
+    bodies are not walked unless function scopes are required. Names are
+    thus never marked as used and no messages are reported. A required
+    binding is kept even if a skipped statement rebinds its name. Scopes
+    and bindings that were not required may be missing or incomplete.
+    """
+
+    def __init__(self, tree, *args, scopes=(), bindings=(), **kwargs):
+        """
+        :param scopes:   The names of the pyflakes scope classes whose
+                         bindings are required.
+        :param bindings: The names of the pyflakes binding classes required.
+        :raises ValueError: If the requirements cannot be met by a pruned
+                            analysis, see ``get_handled_nodes``.
+        """
+        handled = get_handled_nodes(scopes, bindings)
+        if handled is None:
+            raise ValueError('{} and {} cannot be analysed pruned'.format(
+                sorted(scopes), sorted(bindings)))
+        self.handled_nodes = {getattr(ast, name) for name in handled
+                              if hasattr(ast, name)}
+        self.ignored_nodes = set()
+        self.prune_functions = 'FunctionScope' not in scopes
+        Checker.__init__(self, tree, *args, **kwargs)
+
+    def getNodeHandler(self, node_class):
+        if node_class not in self.handled_nodes:
+            if node_class in self.ignored_nodes:
+                return self.ignore
+            if not is_compound(node_class):
+                self.ignored_nodes.add(node_class)
+                return self.ignore
+            self.handled_nodes.add(node_class)
+        return Checker.getNodeHandler(self, node_class)
+
+    def LAMBDA(self, node):
+        if not self.prune_functions:
+            Checker.LAMBDA(self, node)
+
+    def report(self, messageClass, *args, **kwargs):
+        pass
+
+    def checkDeadScopes(self):
+        pass
@@ -1,34 +1,417 @@
 import ast
+import codecs
+import re
 
+from coalib.bears.Bear import Bear
 from coalib.bears.LocalBear import LocalBear
 from coalib.results.HiddenResult import HiddenResult
 from coalib.results.Result import Result
-from pyflakes.checker import Checker
-from pyflakes.checker import ClassScope, FunctionScope, ModuleScope
-from pyflakes.checker import GeneratorScope, DoctestScope
+from coalib.results.RESULT_SEVERITY import RESULT_SEVERITY
+
+# pyflakes.checker, which pulls in doctest, pdb and unittest, and the
+# modules built on it are imported on first use, so that discovering the
+# bears stays cheap. Bears depending on this one should do the same.
+
+# A PEP 263 encoding declaration.
+CODING_REGEX = re.compile(r'^[ \t\f]*#.*?coding[:=][ \t]*([-\w.]+)')
+
+# The number of characters of source code parsed at once.
+PARSE_CHUNK_SIZE = 1 << 20
+
+# The first characters of lines that cannot start a top level statement.
+NON_STATEMENT_STARTS = {'', ' ', '\t', '\f', '\r', '\n', '#', ')', ']', '}'}
+
+# A keyword continuing the compound statement of the previous line.
+CONTINUATION_REGEX = re.compile(r'(?:else|elif|except|finally)\b')
+
+
+def declares_foreign_encoding(text):
+    """
+    Checks whether the first two lines of some source code declare an
+    encoding other than UTF-8.
+
+    :param text: The source code as text.
+    :return:     ``True`` if a different encoding is declared.
+    """
+    end = text.find('\n')
+    if end != -1:
+        end = text.find('\n', end + 1)
+    for line in (text if end == -1 else text[:end]).splitlines()[:2]:
+        match = CODING_REGEX.match(line)
+        if match:
+            try:
+                return codecs.lookup(match.group(1)).name != 'utf-8'
+            except LookupError:
+                return True
+    return False
+
+
+def parse_text(source, filename='<unknown>'):
+    """
+    Parses Python source code given as a whole into an AST.
+
+    The parser works on UTF-8, so text is encoded before parsing. This lets
+    the text be freed before the AST is built and keeps the parser from
+    caching a second, UTF-8 copy of non-ASCII text.
+
+    :param source:   The source code as text or as the encoded contents of
+                     the file. Bytes are parsed as they are, honouring their
+                     encoding declaration.
+    :param filename: The filename reported in syntax errors.
+    :return:         The ``ast.Module`` of the source.
+    """
+    if isinstance(source, str) and not declares_foreign_encoding(source):
+        try:
+            source = source.encode('utf-8')
+        except UnicodeEncodeError:
+            pass
+    return ast.parse(source, filename)
+
+
+def get_chunk_ends(lines, chunk_size=PARSE_CHUNK_SIZE):
+    """
+    Splits source code into chunks of about ``chunk_size`` characters that
+    end before lines that may start a top level statement, i.e. lines
+    starting with neither whitespace, a comment, a closing bracket nor a
+    keyword continuing a compound statement.
+
+    :param lines:      The source code as list of lines.
+    :param chunk_size: The number of characters after which a chunk ends.
+    :return:           A list of the indexes of the lines after the ends of
+                       the chunks, the last being the number of lines.
+    """
+    ends = []
+    size = 0
+    for index, line in enumerate(lines):
+        if (size >= chunk_size and line[:1] not in NON_STATEMENT_STARTS and
+                not CONTINUATION_REGEX.match(line)):
+            ends.append(index)
+            size = 0
+        size += len(line)
+    ends.append(len(lines))
+    return ends
+
+
+def parse_lines(lines, filename='<unknown>', chunk_size=PARSE_CHUNK_SIZE):
+    """
+    Parses Python source code given as lines into an AST, in chunks of top
+    level statements.
+
+    The parser needs a contiguous copy of its input and allocates many
+    times its size while parsing, so parsing a large file at once takes
+    far more memory than its AST. Parsing it in chunks bounds both by the
+    chunk size. Every chunk is preceded by blank lines, so positions match
+    those of parsing the whole file.
+
+    A chunk ending inside a statement, e.g. inside a string or brackets,
+    fails to parse. It is then extended to the next chunk once, and to the
+    end of the file if that fails too, so syntax errors are reported as if
+    the whole file was parsed.
+
+    :param lines:      The source code as list of lines.
+    :param filename:   The filename reported in syntax errors.
+    :param chunk_size: The number of characters parsed at once.
+    :return:           The ``ast.Module`` of the source.
+    """
+    ends = get_chunk_ends(lines, chunk_size)
+    if len(ends) == 1:
+        return parse_text(''.join(lines), filename)
+
+    module = None
+    start = index = 0
+    while start < len(lines):
+        for end in sorted({ends[index], ends[min(index + 1, len(ends) - 1)],
+                           len(lines)}):
+            try:
+                part = parse_text('\n' * start + ''.join(lines[start:end]),
+                                  filename)
+                break
+            except SyntaxError:
+                if end == len(lines):
+                    raise
+        if module is None:
+            module = part
+        else:
+            module.body.extend(part.body)
+            if hasattr(module, 'type_ignores'):
+                module.type_ignores.extend(part.type_ignores)
+        start = end
+        index = ends.index(end) + 1
+    return module
+
+
+def parse_source(source, filename='<unknown>'):
+    """
+    Parses Python source code into an AST.
+
+    :param source:   The source code as list of lines, see ``parse_lines``,
+                     or as whole, see ``parse_text``.
+    :param filename: The filename reported in syntax errors.
+    :return:         The ``ast.Module`` of the source.
+    """
+    if isinstance(source, (str, bytes, bytearray)):
+        return parse_text(source, filename)
+    return parse_lines(source if isinstance(source, (list, tuple))
+                       else list(source), filename)
+
+
+def get_comprehension_scope():
+    """
+    :return: The pyflakes scope class of comprehensions and generator
+             expressions. Newer pyflakes versions call it
+             ``ComprehensionScope`` and keep ``GeneratorScope`` as a
+             subclass of it for generator expressions only.
+    """
+    from pyflakes import checker
+    return getattr(checker, 'ComprehensionScope', checker.GeneratorScope)
+
+
+def get_scope_categories():
+    """
+    :return: The pyflakes scope classes dead scopes are partitioned into.
+             ``DoctestScope`` derives from ``ModuleScope``, so it comes
+             first.
+    """
+    from pyflakes.checker import (
+        ClassScope, DoctestScope, FunctionScope, ModuleScope)
+    return (DoctestScope, ModuleScope, ClassScope, FunctionScope,
+            get_comprehension_scope())
+
+
+def analyse_source(source, filename='<unknown>', with_doctest=True,
+                   requirements=None, snapshot=False):
+    """
+    Parses source code and runs pyflakes on it.
+
+    :param source:       The source code, see ``parse_source``.
+    :param filename:     The name of the file.
+    :param with_doctest: Whether doctests are analysed.
+    :param requirements: The requirements of a pruned analysis, see
+                         ``PyFlakesASTBear.get_requirements``, or ``None``.
+    :param snapshot:     Whether the scopes are returned as snapshots.
+    :return:             A tuple of the dead scopes and the pyflakes
+                         messages.
+    """
+    from pyflakes.checker import Checker
+    from pyflakes_bears.PrunedChecker import PrunedChecker
+    from pyflakes_bears.PyFlakesSnapshot import snapshot_scopes
+
+    tree = parse_source(source, filename)
+    if requirements is None:
+        checker = Checker(tree, filename=filename, withDoctest=with_doctest)
+    else:
+        scopes, bindings = requirements
+        checker = PrunedChecker(tree, filename=filename,
+                                withDoctest=with_doctest,
+                                scopes=scopes, bindings=bindings)
+    scopes = checker.deadScopes
+    return (snapshot_scopes(scopes) if snapshot else scopes,
+            checker.messages)
 
 
 class PyFlakesResult(HiddenResult):
+    """
+    The pyflakes analysis of a file.
 
-    def __init__(self, origin, deadScopes, pyflakes_messages):
+    All bears depending on PyFlakesASTBear receive the same result, so
+    queries spanning all scopes are computed once on first use and shared
+    by them. The returned lists must not be modified.
+    """
 
+    def __init__(self, origin, deadScopes, pyflakes_messages,
+                 with_doctest=None):
+        """
+        :param with_doctest: Whether doctests were analysed, ``None`` if
+                             unknown.
+        """
         Result.__init__(self, origin, message='')
 
-        self.module_scope = self.get_scopes(ModuleScope, deadScopes)[0]
-        self.class_scopes = self.get_scopes(ClassScope, deadScopes)
-        self.function_scopes = self.get_scopes(FunctionScope, deadScopes)
-        self.generator_scopes = self.get_scopes(GeneratorScope, deadScopes)
-        self.doctest_scopes = self.get_scopes(DoctestScope, deadScopes)
+        self.with_doctest = with_doctest
+        self.dead_scopes = deadScopes
+        self._scope_indexes = {}
+        self._scope_partition = None
+        self._bindings_by_name = None
+        self._queries = {}
         self.pyflakes_messages = pyflakes_messages
 
+    @property
+    def scope_partition(self):
+        """
+        Maps every class of ``get_scope_categories`` to the list of dead
+        scopes belonging to it. The partition is computed in a single pass
+        over the dead scopes when it is first accessed.
+        """
+        if self._scope_partition is None:
+            categories = get_scope_categories()
+            partition = {scope_type: [] for scope_type in categories}
+            for scope in self.dead_scopes:
+                for scope_type in categories:
+                    if isinstance(scope, scope_type):
+                        partition[scope_type].append(scope)
+                        break
+            self._scope_partition = partition
+        return self._scope_partition
+
+    @property
+    def module_scope(self):
+        from pyflakes.checker import ModuleScope
+        return self.scope_partition[ModuleScope][0]
+
+    @property
+    def class_scopes(self):
+        from pyflakes.checker import ClassScope
+        return self.scope_partition[ClassScope]
+
+    @property
+    def function_scopes(self):
+        from pyflakes.checker import FunctionScope
+        return self.scope_partition[FunctionScope]
+
+    @property
+    def generator_scopes(self):
+        return self.scope_partition[get_comprehension_scope()]
+
+    @property
+    def doctest_scopes(self):
+        from pyflakes.checker import DoctestScope
+        return self.scope_partition[DoctestScope]
+
     def get_scopes(self, scope_type, scopes):
         return list(filter(lambda scope: isinstance(scope, scope_type),
                            scopes))
 
+    def get_scope_index(self, scope):
+        """
+        Returns the index of the given scope, building it on first use.
+
+        :param scope: A scope of this result.
+        :return:      A ``ScopeIndex`` instance.
+        """
+        from pyflakes_bears.ScopeIndex import ScopeIndex
+        index = self._scope_indexes.get(id(scope))
+        if index is None or index.scope is not scope:
+            index = self._scope_indexes[id(scope)] = ScopeIndex(scope)
+        return index
+
     def get_nodes(self, scope, node_type):
-        for _, node in scope.items():
-            if isinstance(node, node_type):
-                yield node
+        return iter(self.get_scope_index(scope).get_nodes(node_type))
+
+    def get_node(self, scope, name, node_type=object):
+        """
+        Looks up the binding of a name in a scope.
+
+        :param scope:     A scope of this result.
+        :param name:      The name of the binding.
+        :param node_type: The type the binding has to be of.
+        :return:          The binding or ``None`` if the name is not bound
+                          to a binding of the given type.
+        """
+        from pyflakes_bears.PyFlakesSnapshot import get_binding_class
+        node = scope.get(name)
+        if node is None or not issubclass(get_binding_class(node),
+                                          node_type):
+            return None
+        return node
+
+    def get_all_nodes(self, node_type):
+        """
+        Returns the bindings of the given type in all dead scopes.
+
+        :param node_type: A pyflakes binding class or a tuple of them.
+        :return:          A list of tuples of a scope and a binding of it,
+                          in the order of ``dead_scopes``.
+        """
+        key = ('nodes', node_type)
+        nodes = self._queries.get(key)
+        if nodes is None:
+            nodes = self._queries[key] = [
+                (scope, node) for scope in self.dead_scopes
+                for node in self.get_scope_index(scope).get_nodes(node_type)]
+        return nodes
+
+    def get_unused_nodes(self, node_type=object):
+        """
+        Returns the bindings of the given type in all dead scopes that were
+        never used. Builtins are left out.
+
+        :param node_type: A pyflakes binding class or a tuple of them.
+        :return:          A list of tuples of a scope and a binding of it,
+                          in the order of ``dead_scopes``.
+        """
+        from pyflakes.checker import Builtin
+        from pyflakes_bears.PyFlakesSnapshot import get_binding_class
+        key = ('unused', node_type)
+        nodes = self._queries.get(key)
+        if nodes is None:
+            nodes = self._queries[key] = [
+                (scope, node) for scope, node in self.get_all_nodes(node_type)
+                if not node.used and
+                not issubclass(get_binding_class(node), Builtin)]
+        return nodes
+
+    def get_bindings(self, name):
+        """
+        Returns the bindings of a name in all dead scopes. The bindings of
+        all names are collected in a single pass on the first call.
+
+        :param name: The name of the bindings.
+        :return:     A list of tuples of a scope and its binding of the
+                     name, in the order of ``dead_scopes``.
+        """
+        if self._bindings_by_name is None:
+            bindings = {}
+            for scope in self.dead_scopes:
+                for binding_name, node in scope.items():
+                    bindings.setdefault(binding_name, []).append(
+                        (scope, node))
+            self._bindings_by_name = bindings
+        return self._bindings_by_name.get(name, [])
+
+    def get_messages(self, message_type):
+        """
+        Returns the pyflakes messages of the given type.
+
+        :param message_type: A pyflakes message class or a tuple of them.
+        :return:             A list of messages in the order pyflakes
+                             reported them.
+        """
+        key = ('messages', message_type)
+        messages = self._queries.get(key)
+        if messages is None:
+            messages = self._queries[key] = [
+                message for message in self.pyflakes_messages
+                if isinstance(message, message_type)]
+        return messages
+
+    def snapshot(self):
+        """
+        Creates a compact copy of this result that can be pickled cheaply.
+
+        The scopes of the copy hold ``BindingSnapshot`` instances instead of
+        pyflakes bindings, so the AST of the file is not kept alive by it.
+        Queries via ``get_scopes`` and ``get_nodes`` work the same.
+
+        :return: A new ``PyFlakesResult`` instance.
+        """
+        from pyflakes_bears.PyFlakesSnapshot import snapshot_scopes
+        return PyFlakesResult(self.origin,
+                              snapshot_scopes(self.dead_scopes),
+                              self.pyflakes_messages, self.with_doctest)
+
+
+def get_pyflakes_results(dependency_results):
+    """
+    Picks the results of ``PyFlakesASTBear`` from the dependency results of
+    a dependant bear. Files the bear skipped, see ``pyflakes_time_limit``,
+    yield an informational ``Result`` instead, which is left out.
+
+    :param dependency_results: The dependency results passed to the
+                               ``run`` method of the dependant bear.
+    :return:                   A list of ``PyFlakesResult`` instances.
+    """
+    return [result
+            for result in dependency_results.get(PyFlakesASTBear.name, [])
+            if isinstance(result, PyFlakesResult)]
 
 
 class PyFlakesASTBear(LocalBear):
@@ -43,6 +426,30 @@ class PyFlakesASTBear(LocalBear):
         import statement
     -   A PEP8DoctestNamingBear that checks if the python code written in
         docstring follows PEP8 naming convention
+
+    Analysing doctests is expensive on heavily documented code. Bears that
+    depend on PyFlakesASTBear but neither read doctest scopes nor rely on
+    names being marked as used by doctests should set
+    ``PYFLAKES_DOCTEST = False``. Unless configured explicitly, doctests are
+    only analysed if an enabled dependant bear does not opt out.
+
+    Bears that only need the analysis of files passing a cheap test can set
+    ``PYFLAKES_FILTER`` to a static method that takes the lines of a file
+    and returns whether the file is needed. If all enabled dependant bears
+    set one and none of them needs a file, the file is not analysed and no
+    result is yielded for it.
+
+    Bears that only read the names and positions of some kinds of bindings
+    in some kinds of scopes can declare them by setting ``PYFLAKES_SCOPES``
+    and ``PYFLAKES_BINDINGS`` to the names of the pyflakes classes, e.g.
+    ``('ModuleScope',)`` and ``('FutureImportation',)``. If all enabled
+    dependant bears declare requirements a ``PrunedChecker`` can meet,
+    pyflakes only walks the nodes needed for them. Names are then never
+    marked as used and no pyflakes messages are reported.
+
+    Checkers are shared with the generic plugins through the
+    ``checker_registry``, so a file that was already analysed in the same
+    process is not analysed again.
     """
 
     LANGUAGES = {'Python', 'Python 2', 'Python 3'}
@@ -50,8 +457,270 @@ class PyFlakesASTBear(LocalBear):
     AUTHORS_EMAILS = {'coala-devel@googlegroups.com'}
     LICENSE = 'AGPL-3.0'
 
-    def run(self, filename, file):
-        tree = ast.parse(''.join(file))
-        result = Checker(tree, filename=filename, withDoctest=True)
+    _cache = None
+    _dependant_bears = None
+
+    def get_dependant_bears(self):
+        """
+        Returns the bears enabled in the section of this bear that depend on
+        PyFlakesASTBear.
+
+        The bear classes are looked up once and reused for every file until
+        the enabled bears change.
+
+        :return: A set of bear classes.
+        """
+        names = frozenset(self.section.get('bears', ''))
+        if (self._dependant_bears is not None and
+                self._dependant_bears[0] == names):
+            return self._dependant_bears[1]
+
+        def get_subclasses(cls):
+            for subclass in cls.__subclasses__():
+                yield subclass
+                yield from get_subclasses(subclass)
+
+        bears = {bear for bear in get_subclasses(Bear)
+                 if bear.name in names and PyFlakesASTBear in bear.BEAR_DEPS}
+        self._dependant_bears = names, bears
+        return bears
+
+    def needs_doctest(self):
+        """
+        Decides whether doctests have to be analysed for the enabled
+        dependant bears. If none of them can be found, doctests are analysed
+        to be on the safe side.
+
+        :return: ``True`` if doctests should be analysed.
+        """
+        dependants = self.get_dependant_bears()
+        return not dependants or any(getattr(bear, 'PYFLAKES_DOCTEST', True)
+                                     for bear in dependants)
+
+    def get_file_filters(self):
+        """
+        Returns the file filters of the enabled dependant bears.
+
+        :return: A list of functions, or ``None`` if any dependant bear does
+                 not declare a filter or no dependant bear can be found.
+        """
+        dependants = self.get_dependant_bears()
+        if not dependants or not all(hasattr(bear, 'PYFLAKES_FILTER')
+                                     for bear in dependants):
+            return None
+        return [bear.PYFLAKES_FILTER for bear in dependants]
+
+    def get_requirements(self):
+        """
+        Collects the requirements declared by the enabled dependant bears.
+
+        :return: A tuple of the sorted names of the required scope and
+                 binding classes, or ``None`` if any dependant bear does not
+                 declare requirements, no dependant bear can be found or a
+                 pruned analysis cannot meet the requirements.
+        """
+        from pyflakes_bears.PrunedChecker import get_handled_nodes
+        dependants = self.get_dependant_bears()
+        if not dependants or not all(
+                hasattr(bear, 'PYFLAKES_SCOPES') and
+                hasattr(bear, 'PYFLAKES_BINDINGS') for bear in dependants):
+            return None
+        scopes = sorted(set().union(*(bear.PYFLAKES_SCOPES
+                                      for bear in dependants)))
+        bindings = sorted(set().union(*(bear.PYFLAKES_BINDINGS
+                                        for bear in dependants)))
+        if get_handled_nodes(scopes, bindings) is None:
+            return None
+        return tuple(scopes), tuple(bindings)
+
+    def get_cache(self, directory, max_entries):
+        """
+        Returns the result cache for the given directory, creating it on
+        first use so that hit and miss counts accumulate across files.
+
+        :param directory:   The directory the cache is stored in.
+        :param max_entries: The maximum number of cached files.
+        :return:            A ``PyFlakesCache`` instance.
+        """
+        from pyflakes_bears.PyFlakesCache import PyFlakesCache
+        if self._cache is None or self._cache.directory != directory:
+            self._cache = PyFlakesCache(directory, max_entries)
+        self._cache.max_entries = max_entries
+        return self._cache
+
+    def run(self, filename, file,
+            pyflakes_cache_directory: str = '',
+            pyflakes_cache_size: int = 10000,
+            pyflakes_doctest: bool = None,
+            pyflakes_timing_file: str = '',
+            pyflakes_profile_directory: str = '',
+            pyflakes_profile_threshold: float = 1.0,
+            pyflakes_snapshot: bool = False,
+            pyflakes_prune: bool = True,
+            pyflakes_time_limit: float = 0,
+            pyflakes_memory_limit: int = 0,
+            pyflakes_skip_report: str = '',
+            ):
+        """
+        Generates the pyflakes-enhanced-AST of the given file.
+
+        :param pyflakes_cache_directory:
+            Directory in which analysis results are persisted across runs,
+            keyed by the file contents. Caching is disabled if empty.
+        :param pyflakes_cache_size:
+            The maximum number of files kept in the cache. The least
+            recently used entries are evicted first.
+        :param pyflakes_doctest:
+            Whether the code in docstrings is analysed as well. If not set,
+            doctests are analysed unless all enabled bears depending on this
+            bear declare that they do not need them.
+        :param pyflakes_timing_file:
+            File to which the wall time, CPU time and net change in live
+            memory blocks of every phase of the analysis are appended as
+            one JSON record per file. Nothing is recorded if empty.
+        :param pyflakes_profile_directory:
+            Directory to which a cProfile dump is written for every file
+            whose analysis takes longer than
+            ``pyflakes_profile_threshold``. Nothing is profiled if empty.
+        :param pyflakes_profile_threshold:
+            The time in seconds the analysis of a file has to take for its
+            profile to be written.
+        :param pyflakes_snapshot:
+            Whether the result holds compact snapshots of the bindings
+            instead of pyflakes' bindings, which reference the AST. This
+            lets the AST be freed once the ``checker_registry`` dropped it,
+            no matter how long the result is kept. Dependant bears can read
+            the name, position and used state of every binding as before.
+        :param pyflakes_prune:
+            Whether pyflakes only analyses what the enabled dependant bears
+            declare they need. The full analysis runs if any of them does
+            not declare its requirements.
+        :param pyflakes_time_limit:
+            The wall time in seconds the analysis of a file may take. If
+            this or ``pyflakes_memory_limit`` is set, every file is analysed
+            in a worker process, which is killed if it exceeds a limit, and
+            the result holds snapshots. A file exceeding a limit or crashing
+            its worker is skipped with an informational result instead of
+            a ``PyFlakesResult``, which dependant bears should leave out,
+            see ``get_pyflakes_results``. Unlimited if 0.
+        :param pyflakes_memory_limit:
+            The memory in MB the analysis of a file may allocate. Only
+            enforced on Unix. Unlimited if 0.
+        :param pyflakes_skip_report:
+            File to which a JSON record is appended for every skipped file,
+            naming the file and the limit it exceeded. Nothing is written
+            if empty.
+        """
+        file_filters = self.get_file_filters()
+        if file_filters is not None and not any(
+                file_filter(file) for file_filter in file_filters):
+            return
+
+        from pyflakes_bears.PyFlakesProfiler import get_recorder
+        with_doctest = (self.needs_doctest() if pyflakes_doctest is None
+                        else pyflakes_doctest)
+        recorder = get_recorder(self.name, filename, pyflakes_timing_file,
+                                pyflakes_profile_directory,
+                                pyflakes_profile_threshold)
+        requirements = self.get_requirements() if pyflakes_prune else None
+        limits = None
+        if pyflakes_time_limit > 0 or pyflakes_memory_limit > 0:
+            limits = pyflakes_time_limit, pyflakes_memory_limit
+        from pyflakes_bears.PyFlakesIsolation import (
+            AnalysisSkipped, write_skip_record)
+        with recorder:
+            try:
+                result = self.analyse(filename, file, with_doctest, recorder,
+                                      pyflakes_cache_directory,
+                                      pyflakes_cache_size, pyflakes_snapshot,
+                                      requirements, limits)
+            except AnalysisSkipped as skipped:
+                write_skip_record(pyflakes_skip_report, self.name, skipped)
+                result = Result.from_values(
+                    self, 'Skipped the pyflakes analysis: {}'.format(
+                        skipped), filename,
+                    severity=RESULT_SEVERITY.INFO)
+        yield result
+
+    def analyse(self, filename, file, with_doctest, recorder,
+                cache_directory, cache_size, snapshot=False,
+                requirements=None, limits=None):
+        """
+        Analyses a file, recording every phase.
+
+        :param requirements: A tuple of the names of the required scope and
+                             binding classes for a pruned analysis, see
+                             ``get_requirements``. Without it, or if the
+                             ``checker_registry`` holds a full checker of the
+                             file, the full analysis is used. Pruned
+                             checkers are not registered.
+        :param limits:       A tuple of the time and memory limit of an
+                             isolated analysis, see ``analyse_isolated``.
+                             Its checker stays in the worker, so it is not
+                             registered either.
+        :return:             A ``PyFlakesResult`` instance.
+        :raises AnalysisSkipped: If the isolated analysis exceeded a limit.
+        """
+        from pyflakes.checker import Checker
+        from pyflakes_bears.PrunedChecker import PrunedChecker
+        from pyflakes_bears.PyFlakesProfiler import NULL_RECORDER, TimedChecker
+        from pyflakes_bears.PyFlakesSnapshot import snapshot_scopes
+        from pyflakes_generic_plugins.CheckerRegistry import checker_registry
+
+        cache = key = None
+        if cache_directory:
+            with recorder.phase('cache'):
+                cache = self.get_cache(cache_directory, cache_size)
+                key = cache.get_key(filename, file, with_doctest,
+                                    requirements)
+                cached = cache.get(key)
+            if cached is not None:
+                with recorder.phase('result'):
+                    return PyFlakesResult(self, *cached,
+                                          with_doctest=with_doctest)
+
+        result = checker_registry.get(filename, source=file,
+                                      with_doctest=with_doctest)
+        if result is None and limits is not None:
+            from pyflakes_bears.PyFlakesIsolation import analyse_isolated
+            with recorder.phase('worker'):
+                snapshots, messages = analyse_isolated(
+                    filename, file, with_doctest, requirements, *limits)
+            if cache is not None:
+                with recorder.phase('cache'):
+                    cache.set(key, (snapshots, messages))
+            with recorder.phase('result'):
+                return PyFlakesResult(self, snapshots, messages,
+                                      with_doctest)
+        if result is None:
+            with recorder.phase('parse'):
+                tree = parse_source(file, filename)
+            with recorder.phase('checker'):
+                if requirements is not None:
+                    scopes, bindings = requirements
+                    result = PrunedChecker(tree, filename=filename,
+                                           withDoctest=with_doctest,
+                                           scopes=scopes, bindings=bindings)
+                elif recorder is NULL_RECORDER:
+                    result = Checker(tree, filename=filename,
+                                     withDoctest=with_doctest)
+                else:
+                    result = TimedChecker(tree, filename=filename,
+                                          withDoctest=with_doctest,
+                                          recorder=recorder)
+            if requirements is None:
+                checker_registry.register(filename, result, source=file)
+
+        scopes = result.deadScopes
+        if snapshot or cache is not None:
+            with recorder.phase('snapshot'):
+                snapshots = snapshot_scopes(scopes)
+            if snapshot:
+                scopes = snapshots
+        if cache is not None:
+            with recorder.phase('cache'):
+                cache.set(key, (snapshots, result.messages))
 
-        yield PyFlakesResult(self, result.deadScopes, result.messages)
+        with recorder.phase('result'):
+            return PyFlakesResult(self, scopes, result.messages,
+                                  with_doctest)
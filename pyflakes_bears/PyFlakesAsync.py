@@ -0,0 +1,216 @@
+"""
+An asyncio API for running pyflakes without blocking the event loop.
+
+The analysis runs in an executor, so this module requires Python 3.5. No
+asynchronous generators are used, which would require Python 3.6.
+"""
+
+import asyncio
+import weakref
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from pyflakes_bears.PyFlakesASTBear import (
+    PyFlakesASTBear, PyFlakesResult, analyse_source)
+
+try:
+    from concurrent.futures import BrokenExecutor
+except ImportError:  # pragma: no cover
+    # Python < 3.7 only has the process pool flavour.
+    from concurrent.futures.process import (
+        BrokenProcessPool as BrokenExecutor)
+
+
+def check_source(filename, source=None, with_doctest=True, snapshot=False):
+    """
+    Runs pyflakes on a file, reading it if its source is not given.
+
+    :param filename:     The name of the file.
+    :param source:       The source code, see ``parse_source``.
+    :param with_doctest: Whether doctests are analysed.
+    :param snapshot:     Whether the scopes are returned as snapshots.
+    :return:             A tuple of the dead scopes and the pyflakes
+                         messages, see ``analyse_source``.
+    """
+    if source is None:
+        with open(filename, 'rb') as file:
+            source = file.read()
+    return analyse_source(source, filename, with_doctest, snapshot=snapshot)
+
+
+class AsyncAnalyser(object):
+    """
+    Analyses files in an executor, at most ``max_concurrency`` at once.
+    Callers beyond that wait for a free slot, so work never piles up in the
+    executor.
+
+    With ``processes`` files are analysed in a process pool and results
+    hold snapshots, see ``PyFlakesResult.snapshot``. Otherwise they are
+    analysed in a thread pool, which keeps the event loop responsive but,
+    due to the GIL, does not analyse files in parallel.
+
+    Use it as asynchronous context manager, or call ``close`` when done,
+    to shut down the executor.
+    """
+
+    def __init__(self, max_concurrency=4, processes=None, with_doctest=True,
+                 snapshot=False, executor=None):
+        """
+        :param max_concurrency: The number of files analysed at once.
+        :param processes:       The number of processes of a process pool.
+                                A thread pool is used if not given.
+        :param with_doctest:    Whether doctests are analysed.
+        :param snapshot:        Whether results hold snapshots when
+                                analysing in threads.
+        :param executor:        An executor to use instead of a pool of
+                                this analyser. It is not shut down by
+                                ``close``.
+        """
+        self.semaphores = weakref.WeakKeyDictionary()
+        self.max_concurrency = max_concurrency
+        self.with_doctest = with_doctest
+        self.snapshot = snapshot or bool(processes)
+        self.owns_executor = executor is None
+        if executor is None:
+            executor = (ProcessPoolExecutor(processes) if processes else
+                        ThreadPoolExecutor(max_concurrency))
+        self.executor = executor
+
+    def get_semaphore(self, loop):
+        """
+        :return: The semaphore bounding the concurrency on the given event
+                 loop. Semaphores are bound to a loop, so an analyser used
+                 on several loops bounds each of them on its own.
+        """
+        semaphore = self.semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self.semaphores[loop] = asyncio.Semaphore(
+                self.max_concurrency)
+        return semaphore
+
+    async def analyse(self, filename, source=None):
+        """
+        Analyses a file.
+
+        :param filename: The name of the file.
+        :param source:   The source code, see ``parse_source``. The file is
+                         read in the executor if not given.
+        :return:         A ``PyFlakesResult`` instance.
+        :raises SyntaxError: If the file cannot be parsed.
+        :raises OSError:     If the file cannot be read.
+        """
+        loop = asyncio.get_event_loop()
+        async with self.get_semaphore(loop):
+            scopes, messages = await loop.run_in_executor(
+                self.executor, partial(check_source, filename, source,
+                                       self.with_doctest, self.snapshot))
+        return PyFlakesResult(PyFlakesASTBear.name, scopes, messages)
+
+    def analyse_many(self, files, max_pending=None):
+        """
+        Analyses many files::
+
+            async for filename, result in analyser.analyse_many(files):
+                ...
+
+        :param files:       An iterable of filenames or of tuples of a
+                            filename and the source of the file.
+        :param max_pending: The number of files scheduled ahead of the
+                            consumer, twice ``max_concurrency`` by default.
+        :return:            A ``ResultIterator``.
+        """
+        return ResultIterator(self, files,
+                              max_pending or 2 * self.max_concurrency)
+
+    def close(self):
+        """
+        Shuts down the executor of the analyser without waiting for it.
+        """
+        if self.owns_executor:
+            self.executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class ResultIterator(object):
+    """
+    An asynchronous iterator of tuples of a filename and its result, in the
+    order of the files. Files that cannot be read or parsed yield ``None``.
+
+    Files are scheduled only as the consumer advances, at most
+    ``max_pending`` ahead of it, so a slow consumer slows down the analysis
+    instead of accumulating results.
+    """
+
+    def __init__(self, analyser, files, max_pending):
+        self.analyser = analyser
+        self.files = iter(files)
+        self.max_pending = max_pending
+        self.pending = deque()
+
+    def schedule(self):
+        while len(self.pending) < self.max_pending:
+            try:
+                item = next(self.files)
+            except StopIteration:
+                return
+            filename, source = (item, None) if isinstance(item, str) else item
+            self.pending.append((filename, asyncio.ensure_future(
+                self.analyser.analyse(filename, source))))
+
+    def cancel(self):
+        """
+        Cancels the analysis of all scheduled files.
+        """
+        for _, future in self.pending:
+            future.cancel()
+        self.pending.clear()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        self.schedule()
+        if not self.pending:
+            raise StopAsyncIteration
+        filename, future = self.pending.popleft()
+        try:
+            return filename, await future
+        except BrokenExecutor:
+            # A subclass of RuntimeError, but no file can be analysed any
+            # more.
+            self.cancel()
+            raise
+        except (OSError, SyntaxError, ValueError, RuntimeError):
+            return filename, None
+        except BaseException:
+            self.cancel()
+            raise
+
+
+_default_analyser = None
+
+
+async def analyse(filename, source=None):
+    """
+    Analyses a file in a thread pool shared by all callers of this function,
+    without blocking the event loop::
+
+        result = await analyse('module.py', lines)
+
+    :param filename: The name of the file.
+    :param source:   The source code, see ``parse_source``. The file is read
+                     if not given.
+    :return:         A ``PyFlakesResult`` instance.
+    :raises SyntaxError: If the file cannot be parsed.
+    :raises OSError:     If the file cannot be read.
+    """
+    global _default_analyser
+    if _default_analyser is None:
+        _default_analyser = AsyncAnalyser()
+    return await _default_analyser.analyse(filename, source)
@@ -0,0 +1,127 @@
+import argparse
+import multiprocessing
+from functools import partial
+
+from pyflakes_bears.PyFlakesASTBear import (
+    PyFlakesASTBear, PyFlakesResult, analyse_source)
+
+
+def analyse_file(filename, with_doctest=True):
+    """
+    Runs pyflakes on a single file.
+
+    :param filename:     The path of the file to analyse.
+    :param with_doctest: Whether doctests are analysed.
+    :return:             A tuple of the snapshots of all dead scopes and the
+                         pyflakes messages, or ``None`` if the file could not
+                         be read or parsed.
+    """
+    try:
+        with open(filename, 'rb') as file:
+            source = file.read()
+        return analyse_source(source, filename, with_doctest, snapshot=True)
+    except (OSError, SyntaxError, ValueError, RuntimeError):
+        return None
+
+
+def get_chunksize(file_count, processes):
+    """
+    Picks a chunk size that hands every worker about four chunks, trading
+    scheduling overhead against load balance.
+
+    :param file_count: The number of files to distribute.
+    :param processes:  The number of worker processes.
+    :return:           The number of files sent to a worker at once.
+    """
+    return max(1, -(-file_count // (processes * 4)))
+
+
+def analyse_files(filenames, processes=None, chunksize=None,
+                  with_doctest=True, pool=None):
+    """
+    Runs pyflakes on many files, distributing them over a process pool.
+
+    :param filenames:    The paths of the files to analyse.
+    :param processes:    The number of worker processes. Defaults to the
+                         number of CPUs. With a single process the files are
+                         analysed in the calling process.
+    :param chunksize:    The number of files sent to a worker at once.
+                         Chosen automatically if not given.
+    :param with_doctest: Whether doctests are analysed.
+    :param pool:         A ``multiprocessing.Pool`` of ``processes`` workers
+                         to use instead of starting one. A single file is
+                         still analysed in the calling process.
+    :return:             A list holding a snapshot ``PyFlakesResult`` for
+                         every file, in the order of ``filenames``. Files
+                         that could not be read or parsed yield ``None``.
+    """
+    filenames = list(filenames)
+    processes = processes or multiprocessing.cpu_count()
+    analyse = partial(analyse_file, with_doctest=with_doctest)
+
+    if (processes == 1 and pool is None) or len(filenames) <= 1:
+        payloads = list(map(analyse, filenames))
+    else:
+        processes = min(processes, len(filenames))
+        chunksize = chunksize or get_chunksize(len(filenames), processes)
+        if pool is not None:
+            payloads = list(pool.imap(analyse, filenames, chunksize))
+        else:
+            with multiprocessing.Pool(processes) as pool:
+                payloads = list(pool.imap(analyse, filenames, chunksize))
+
+    return [None if payload is None
+            else PyFlakesResult(PyFlakesASTBear.name, *payload)
+            for payload in payloads]
+
+
+def print_messages(filenames, results):
+    """
+    Prints the pyflakes messages of analysed files.
+
+    :param filenames: The paths of the files.
+    :param results:   The results of the files, see ``analyse_files``.
+    :return:          1 if any message was printed or a file could not be
+                      analysed, 0 otherwise.
+    """
+    exit_code = 0
+    for filename, result in zip(filenames, results):
+        if result is None:
+            print('{}: could not be analysed'.format(filename))
+            exit_code = 1
+            continue
+        for message in result.pyflakes_messages:
+            print(message)
+            exit_code = 1
+    return exit_code
+
+
+def main(args=None):
+    """
+    Prints the pyflakes messages of all files given on the command line::
+
+        python -m pyflakes_bears.PyFlakesBatch --processes 32 src/*.py
+
+    :param args: The command line arguments, ``sys.argv`` if not given.
+    :return:     1 if any message was printed or a file could not be
+                 analysed, 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(
+        description='Analyses Python files with pyflakes in parallel.')
+    parser.add_argument('filenames', nargs='+', metavar='FILE')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='number of worker processes')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='number of files sent to a worker at once')
+    parser.add_argument('--no-doctest', dest='with_doctest',
+                        action='store_false',
+                        help='do not analyse the code in docstrings')
+    args = parser.parse_args(args)
+
+    results = analyse_files(args.filenames, args.processes, args.chunksize,
+                            args.with_doctest)
+    return print_messages(args.filenames, results)
+
+
+if __name__ == '__main__':  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,189 @@
+import hashlib
+import os
+import pickle
+import platform
+import tempfile
+
+import pyflakes
+
+# Bump whenever the layout of cached values changes so that stale entries
+# are never handed to a newer version of the bears.
+CACHE_FORMAT = 2
+
+
+class PyFlakesCache(object):
+    """
+    A persistent, size bounded cache for pyflakes analysis results.
+
+    Every entry is stored as a pickle file inside ``directory``. Reading an
+    entry refreshes its modification time, so evicting the entries with the
+    oldest modification time yields least recently used eviction.
+    """
+
+    # Once the cache overflows it is trimmed to this fraction of its size so
+    # that the directory is not rescanned on every subsequent insertion.
+    EVICTION_RATIO = 0.9
+
+    def __init__(self, directory, max_entries=10000):
+        """
+        :param directory:   The directory the cache entries are stored in.
+                            It is created if it does not exist.
+        :param max_entries: The maximum number of entries kept on disk.
+        """
+        self.directory = directory
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entry_count = None
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def _get_digest(filename, with_doctest, requirements):
+        digest = hashlib.sha256()
+        for component in (str(CACHE_FORMAT),
+                          pyflakes.__version__,
+                          platform.python_implementation(),
+                          platform.python_version(),
+                          str(bool(with_doctest)),
+                          repr(requirements),
+                          filename):
+            digest.update(component.encode('utf-8', 'surrogateescape'))
+            digest.update(b'\0')
+        return digest
+
+    @classmethod
+    def get_key(cls, filename, file, with_doctest, requirements=None):
+        """
+        Computes the cache key for the given file contents.
+
+        The key covers everything the analysis result depends on: the file
+        contents, the pyflakes version, the doctest flag, the requirements
+        of a pruned analysis and the Python version the AST was produced
+        by. The filename is included as well since pyflakes records it in
+        its messages.
+
+        :param filename:     The name of the file.
+        :param file:         The file contents as string array.
+        :param with_doctest: Whether doctests are analysed.
+        :param requirements: The requirements of a pruned analysis, see
+                             ``PyFlakesASTBear.get_requirements``.
+        :return:             The key as hexadecimal string.
+        """
+        digest = cls._get_digest(filename, with_doctest, requirements)
+        for line in file:
+            digest.update(line.encode('utf-8', 'surrogateescape'))
+        return digest.hexdigest()
+
+    @classmethod
+    def get_blob_key(cls, filename, blob_id, with_doctest):
+        """
+        Computes the cache key for file contents identified by their git
+        blob id, so the key of a file git knows to be unchanged is found
+        without reading it.
+
+        :param filename:     The name of the file.
+        :param blob_id:      The git blob id of the file contents.
+        :param with_doctest: Whether doctests are analysed.
+        :return:             The key as hexadecimal string.
+        """
+        digest = cls._get_digest(filename, with_doctest, None)
+        digest.update(b'blob\0' + blob_id.encode('ascii'))
+        return digest.hexdigest()
+
+    def _get_path(self, key):
+        return os.path.join(self.directory, key + '.pickle')
+
+    def _list_entries(self):
+        return [entry for entry in os.listdir(self.directory)
+                if entry.endswith('.pickle')]
+
+    def get(self, key):
+        """
+        Retrieves a cached value and marks it as recently used.
+
+        :param key: The key as returned by ``get_key``.
+        :return:    The cached value or ``None`` if there is none.
+        """
+        path = self._get_path(key)
+        try:
+            with open(path, 'rb') as entry:
+                value = pickle.load(entry)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, EOFError, pickle.UnpicklingError,
+                AttributeError, ImportError):
+            # A truncated entry or one written by an incompatible version.
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        """
+        Stores a value, evicting the least recently used entries if the
+        cache grows beyond ``max_entries``.
+
+        Values that cannot be pickled are silently not cached.
+
+        :param key:   The key as returned by ``get_key``.
+        :param value: The value to store.
+        """
+        try:
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, AttributeError, RuntimeError,
+                TypeError):
+            return
+
+        path = self._get_path(key)
+        is_new = not os.path.exists(path)
+        handle, temp_path = tempfile.mkstemp(dir=self.directory,
+                                             suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as entry:
+                entry.write(data)
+            os.replace(temp_path, path)
+        except OSError:
+            self._remove(temp_path)
+            return
+
+        if self._entry_count is None:
+            self._entry_count = len(self._list_entries())
+        elif is_new:
+            self._entry_count += 1
+
+        if self._entry_count > self.max_entries:
+            self.evict(int(self.max_entries * self.EVICTION_RATIO))
+
+    def evict(self, max_entries):
+        """
+        Removes the least recently used entries until at most
+        ``max_entries`` remain.
+
+        :param max_entries: The number of entries to keep.
+        """
+        entries = []
+        for entry in self._list_entries():
+            path = os.path.join(self.directory, entry)
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except OSError:
+                pass
+
+        entries.sort()
+        for _, path in entries[:max(len(entries) - max_entries, 0)]:
+            self._remove(path)
+        self._entry_count = min(len(entries), max_entries)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,406 @@
+import argparse
+import json
+import os
+import socket
+import socketserver
+import threading
+
+# The analysis is imported when the daemon starts, so that the client
+# commands stay cheap to start.
+
+
+class FileWatcher(object):
+    """
+    Detects changed Python files in a directory tree by polling their
+    modification times and sizes.
+    """
+
+    def __init__(self, root, extension='.py'):
+        """
+        :param root:      The directory to watch.
+        :param extension: The extension of the watched files.
+        """
+        self.root = os.path.abspath(root)
+        self.extension = extension
+        self.stats = {}
+
+    @staticmethod
+    def stat(path):
+        """
+        :return: A tuple identifying the version of a file or ``None`` if it
+                 does not exist.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def scan(self):
+        """
+        :return: A dictionary mapping the paths of all watched files to
+                 their versions.
+        """
+        stats = {}
+        for directory, directories, filenames in os.walk(self.root):
+            directories[:] = [name for name in directories
+                              if not name.startswith('.') and
+                              name != '__pycache__']
+            for filename in filenames:
+                if filename.endswith(self.extension):
+                    path = os.path.join(directory, filename)
+                    stats[path] = self.stat(path)
+        return stats
+
+    def poll(self):
+        """
+        Scans the whole tree.
+
+        :return: A tuple of the list of added or changed files and the list
+                 of removed files since the last call.
+        """
+        stats = self.scan()
+        changed = [path for path, version in stats.items()
+                   if version is not None and self.stats.get(path) != version]
+        removed = [path for path in self.stats if path not in stats]
+        self.stats = stats
+        return changed, removed
+
+    def check(self, paths):
+        """
+        Checks the given files only.
+
+        :param paths: Absolute paths of files.
+        :return:      A tuple of the list of added or changed files and the
+                      list of removed files among them.
+        """
+        changed = []
+        removed = []
+        for path in paths:
+            version = self.stat(path)
+            if version is None:
+                if self.stats.pop(path, None) is not None:
+                    removed.append(path)
+            elif self.stats.get(path) != version:
+                self.stats[path] = version
+                changed.append(path)
+        return changed, removed
+
+
+class AnalysisDaemon(object):
+    """
+    Keeps the pyflakes results of all Python files of a tree in memory and
+    re-analyses files only when they changed.
+
+    Results are compact snapshots, see ``PyFlakesResult.snapshot``, so the
+    ASTs of the files are not kept.
+
+    Files are analysed without holding the lock, so queries of other files
+    are answered while a poll analyses changed files. Queries of a file
+    that is being analysed wait for its result.
+    """
+
+    def __init__(self, root, with_doctest=True, processes=None):
+        """
+        :param root:         The directory to analyse.
+        :param with_doctest: Whether doctests are analysed.
+        :param processes:    The number of processes used when many files
+                             changed at once, e.g. on start up.
+        """
+        self.watcher = FileWatcher(root)
+        self.with_doctest = with_doctest
+        self.processes = processes
+        self.pool = None
+        self.results = {}
+        self.pending = {}
+        self.analyses = 0
+        self.lock = threading.Lock()
+
+    def get_pool(self):
+        """
+        Returns the process pool of the daemon, starting it on first use.
+        It should be started before any other threads, as its workers are
+        forked.
+
+        :return: A ``multiprocessing.Pool``, or ``None`` if files are
+                 analysed in this process.
+        """
+        if self.pool is None and self.processes != 1:
+            import multiprocessing
+            self.pool = multiprocessing.Pool(self.processes)
+        return self.pool
+
+    def close(self):
+        """
+        Stops the process pool of the daemon.
+        """
+        if self.pool is not None:
+            self.pool.terminate()
+            self.pool.join()
+            self.pool = None
+
+    def update(self, paths=None):
+        """
+        Re-analyses changed files.
+
+        :param paths: The files to check, all files of the tree if ``None``.
+        """
+        from pyflakes_bears.PyFlakesBatch import analyse_files
+        done = threading.Event()
+        with self.lock:
+            if paths is None:
+                changed, removed = self.watcher.poll()
+            else:
+                changed, removed = self.watcher.check(paths)
+            for path in removed:
+                self.results.pop(path, None)
+            for path in changed:
+                self.pending[path] = done
+        if not changed:
+            return
+
+        results = None
+        try:
+            results = analyse_files(changed, self.processes,
+                                    with_doctest=self.with_doctest,
+                                    pool=self.get_pool())
+        finally:
+            with self.lock:
+                for index, path in enumerate(changed):
+                    # A later update of the file supersedes this one.
+                    if self.pending.get(path) is not done:
+                        continue
+                    del self.pending[path]
+                    if results is None:
+                        # Analyse the file again on the next poll.
+                        self.watcher.stats.pop(path, None)
+                    else:
+                        self.results[path] = results[index]
+                if results is not None:
+                    self.analyses += len(changed)
+            done.set()
+
+    def get_messages(self, paths):
+        """
+        Returns the pyflakes messages of the given files, analysing them
+        first if they changed since they were last analysed.
+
+        :param paths: Absolute paths of files.
+        :return:      A dictionary mapping every path to a list of messages,
+                      or to ``None`` if the file could not be analysed.
+        """
+        self.update(paths)
+        while True:
+            with self.lock:
+                pending = {self.pending[path] for path in paths
+                           if path in self.pending}
+                if not pending:
+                    results = {path: self.results.get(path)
+                               for path in paths}
+                    break
+            for done in pending:
+                done.wait()
+        return {path: None if result is None else
+                [{'line': message.lineno,
+                  'column': message.col,
+                  'type': type(message).__name__,
+                  'text': str(message)}
+                 for message in result.pyflakes_messages]
+                for path, result in results.items()}
+
+    def is_inside(self, path):
+        """
+        :return: Whether the given absolute path lies inside the root.
+        """
+        if not os.path.isabs(path):
+            return False
+        path = os.path.normcase(os.path.normpath(path))
+        root = os.path.normcase(self.watcher.root)
+        return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+    def handle(self, request):
+        """
+        Answers a request of a client.
+
+        :param request: A dictionary with a ``command`` of ``messages``,
+                        with a list of ``files``, ``status`` or
+                        ``shutdown``.
+        :return:        The response as dictionary.
+        """
+        command = request.get('command')
+        if command == 'messages':
+            paths = request.get('files', [])
+            outside = [path for path in paths if not self.is_inside(path)]
+            if outside:
+                return {'error': 'files outside of {}: {}'.format(
+                    self.watcher.root, ', '.join(outside))}
+            return {'files': self.get_messages(paths)}
+        if command in ('status', 'shutdown'):
+            with self.lock:
+                return {'root': self.watcher.root,
+                        'files': len(self.results),
+                        'analyses': self.analyses}
+        return {'error': 'unknown command {!r}'.format(command)}
+
+    def watch(self, stopped, interval=1.0):
+        """
+        Polls the tree for changes until ``stopped`` is set.
+
+        :param stopped:  A ``threading.Event``.
+        :param interval: The seconds between two polls.
+        """
+        while not stopped.wait(interval):
+            self.update()
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """
+    Answers requests sent as JSON lines.
+    """
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line.decode('utf-8'))
+            except ValueError:
+                request = {}
+                response = {'error': 'invalid request'}
+            else:
+                response = self.server.analysis.handle(request)
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+            if request.get('command') == 'shutdown':
+                threading.Thread(target=self.server.shutdown).start()
+                return
+
+
+def check_unix_sockets():
+    """
+    :raises OSError: If the platform does not support Unix sockets, which
+                     the daemon and its clients communicate through.
+    """
+    if not hasattr(socket, 'AF_UNIX'):
+        raise OSError('The pyflakes daemon needs Unix sockets, which are '
+                      'not supported on this platform.')
+
+
+def serve(root, socket_path, with_doctest=True, interval=1.0,
+          processes=None, ready=None):
+    """
+    Analyses a tree and answers queries on a Unix socket until a client
+    sends ``shutdown``.
+
+    :param root:         The directory to analyse.
+    :param socket_path:  The path of the Unix socket.
+    :param with_doctest: Whether doctests are analysed.
+    :param interval:     The seconds between two polls of the tree.
+    :param processes:    The number of processes used for the initial
+                         analysis.
+    :param ready:        A ``threading.Event`` set once queries are
+                         answered.
+    :raises OSError:     If Unix sockets are not supported.
+    """
+    check_unix_sockets()
+    analysis = AnalysisDaemon(root, with_doctest, processes)
+    analysis.get_pool()
+    analysis.update()
+    stopped = threading.Event()
+    watcher = threading.Thread(target=analysis.watch,
+                               args=(stopped, interval), daemon=True)
+    server = socketserver.ThreadingUnixStreamServer(socket_path,
+                                                    RequestHandler)
+    server.daemon_threads = True
+    server.analysis = analysis
+    try:
+        watcher.start()
+        if ready is not None:
+            ready.set()
+        server.serve_forever()
+    finally:
+        stopped.set()
+        server.server_close()
+        os.remove(socket_path)
+        watcher.join()
+        analysis.close()
+
+
+def query(socket_path, request, timeout=None):
+    """
+    Sends a request to a daemon.
+
+    :param socket_path: The path of the Unix socket of the daemon.
+    :param request:     The request as dictionary.
+    :param timeout:     The seconds to wait for the response.
+    :return:            The response as dictionary.
+    :raises OSError:    If the daemon cannot be reached.
+    """
+    check_unix_sockets()
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.settimeout(timeout)
+        connection.connect(socket_path)
+        connection.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        with connection.makefile('rb') as response:
+            return json.loads(response.readline().decode('utf-8'))
+
+
+def main(args=None):
+    """
+    Runs or queries a daemon::
+
+        python -m pyflakes_bears.PyFlakesDaemon serve src &
+        python -m pyflakes_bears.PyFlakesDaemon check src/module.py
+
+    :param args: The command line arguments, ``sys.argv`` if not given.
+    :return:     1 if any message was printed or a file could not be
+                 analysed, 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(
+        description='Keeps the pyflakes analysis of a tree warm.')
+    parser.add_argument('--socket', default='.pyflakes.sock',
+                        help='path of the Unix socket')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+    serve_parser = commands.add_parser('serve', help='run the daemon')
+    serve_parser.add_argument('root', nargs='?', default='.')
+    serve_parser.add_argument('--interval', type=float, default=1.0,
+                              help='seconds between two polls of the tree')
+    serve_parser.add_argument('--processes', type=int, default=None,
+                              help='processes for the initial analysis')
+    serve_parser.add_argument('--no-doctest', dest='with_doctest',
+                              action='store_false',
+                              help='do not analyse the code in docstrings')
+    check_parser = commands.add_parser(
+        'check', help='print the messages of files')
+    check_parser.add_argument('filenames', nargs='+', metavar='FILE')
+    commands.add_parser('status', help='print the state of the daemon')
+    commands.add_parser('shutdown', help='stop the daemon')
+    args = parser.parse_args(args)
+
+    if args.command == 'serve':
+        serve(args.root, args.socket, args.with_doctest, args.interval,
+              args.processes)
+        return 0
+
+    if args.command != 'check':
+        print(json.dumps(query(args.socket, {'command': args.command})))
+        return 0
+
+    paths = [os.path.abspath(filename) for filename in args.filenames]
+    response = query(args.socket, {'command': 'messages', 'files': paths})
+    if 'error' in response:
+        print(response['error'])
+        return 1
+    exit_code = 0
+    for filename, path in zip(args.filenames, paths):
+        messages = response['files'][path]
+        if messages is None:
+            print('{}: could not be analysed'.format(filename))
+            exit_code = 1
+            continue
+        for message in messages:
+            print(message['text'])
+            exit_code = 1
+    return exit_code
+
+
+if __name__ == '__main__':  # pragma: no cover
+    raise SystemExit(main())
@@ -0,0 +1,192 @@
+import argparse
+import hashlib
+import os
+import subprocess
+
+from pyflakes_bears.PyFlakesASTBear import PyFlakesASTBear, PyFlakesResult
+from pyflakes_bears.PyFlakesBatch import analyse_files, print_messages
+from pyflakes_bears.PyFlakesCache import PyFlakesCache
+
+
+def git(root, *args):
+    """
+    Runs a git command in a local repository.
+
+    :param root: A directory inside the repository.
+    :param args: The arguments of the git command.
+    :return:     The output of the command.
+    :raises subprocess.CalledProcessError: If the command fails.
+    """
+    return subprocess.check_output(('git', '-C', root) + args,
+                                   universal_newlines=True)
+
+
+def split_paths(output):
+    """
+    :return: The paths of the NUL separated output of a git command.
+    """
+    return [path for path in output.split('\0') if path]
+
+
+def get_python_files(root):
+    """
+    :param root: The top level directory of a repository.
+    :return:     A sorted list of the paths of all tracked and all untracked,
+                 not ignored Python files relative to ``root``.
+    """
+    return sorted(path for path in split_paths(git(
+        root, 'ls-files', '-z', '--cached', '--others', '--exclude-standard',
+        '--', '*.py')) if os.path.isfile(os.path.join(root, path)))
+
+
+def get_changed_files(root, base):
+    """
+    :param root: The top level directory of a repository.
+    :param base: The revision to compare the working tree to.
+    :return:     A set of the paths relative to ``root`` of all files whose
+                 contents in the working tree differ from ``base``,
+                 untracked files included.
+    """
+    return set(split_paths(git(root, 'diff', '--name-only', '--no-renames',
+                               '-z', base, '--')) +
+               split_paths(git(root, 'ls-files', '-z', '--others',
+                               '--exclude-standard')))
+
+
+def get_blob_ids(root, revision):
+    """
+    :param root:     The top level directory of a repository.
+    :param revision: A revision of the repository.
+    :return:         A dictionary mapping the paths of all files of the
+                     revision relative to ``root`` to their git blob ids.
+    """
+    blob_ids = {}
+    for entry in split_paths(git(root, 'ls-tree', '-r', '-z', revision)):
+        info, path = entry.split('\t', 1)
+        _, object_type, object_id = info.split()
+        if object_type == 'blob':
+            blob_ids[path] = object_id
+    return blob_ids
+
+
+def get_blob_id(data):
+    """
+    :param data: The contents of a file as bytes.
+    :return:     The git blob id of the contents.
+    """
+    return hashlib.sha1('blob {}\0'.format(len(data)).encode('ascii') +
+                        data).hexdigest()
+
+
+def analyse_repository(root='.', base=None, cache_directory=None,
+                       processes=None, with_doctest=True):
+    """
+    Analyses all Python files of a local git repository, re-using cached
+    results for files that did not change since ``base``.
+
+    Results are cached by the path of the file in the repository and the
+    git blob id of its contents, so the cache key of a file git reports as
+    unchanged is taken from ``base`` without reading the file. All other
+    files are read and looked up by the blob id of their contents. pyflakes
+    analyses every file on its own, so no other file has to be analysed
+    again because a file changed.
+
+    :param root:            A directory inside the repository.
+    :param base:            The revision files are compared to. If not
+                            given, all files are looked up by their contents.
+    :param cache_directory: The directory of the ``PyFlakesCache``. Defaults
+                            to ``pyflakes-cache`` in the git directory.
+    :param processes:       The number of processes analysing files, see
+                            ``analyse_files``.
+    :param with_doctest:    Whether doctests are analysed.
+    :return:                A tuple of a list of the paths of all Python files
+                            relative to the current directory, a list of
+                            their results in the same order and a list of
+                            the paths of the files that were analysed.
+    """
+    top = git(root, 'rev-parse', '--show-toplevel').rstrip('\n')
+    if cache_directory is None:
+        cache_directory = os.path.join(
+            top, git(top, 'rev-parse', '--git-dir').rstrip('\n'),
+            'pyflakes-cache')
+    cache = PyFlakesCache(cache_directory)
+
+    files = get_python_files(top)
+    if base is None:
+        changed = set(files)
+        blob_ids = {}
+    else:
+        changed = get_changed_files(top, base)
+        blob_ids = get_blob_ids(top, base)
+
+    filenames = [os.path.relpath(os.path.join(top, path)) for path in files]
+    results = {}
+    keys = {}
+    for path, filename in zip(files, filenames):
+        blob_id = None if path in changed else blob_ids.get(path)
+        if blob_id is None:
+            try:
+                with open(filename, 'rb') as file:
+                    blob_id = get_blob_id(file.read())
+            except OSError:
+                continue
+        # Keyed by the path in the repository, so the results are found
+        # from any working directory.
+        keys[filename] = cache.get_blob_key(path, blob_id, with_doctest)
+        cached = cache.get(keys[filename])
+        if cached is not None:
+            dead_scopes, messages = cached
+            for message in messages:
+                message.filename = filename
+            results[filename] = PyFlakesResult(PyFlakesASTBear.name,
+                                               dead_scopes, messages)
+
+    analysed = [filename for filename in filenames
+                if filename not in results]
+    for filename, result in zip(analysed, analyse_files(
+            analysed, processes, with_doctest=with_doctest)):
+        results[filename] = result
+        if result is not None and filename in keys:
+            cache.set(keys[filename],
+                      (result.dead_scopes, result.pyflakes_messages))
+
+    return filenames, [results[filename] for filename in filenames], analysed
+
+
+def main(args=None):
+    """
+    Prints the pyflakes messages of all Python files of a git repository,
+    analysing only the files that changed since a base revision if the
+    others were analysed before::
+
+        python -m pyflakes_bears.PyFlakesGit --base origin/master
+
+    :param args: The command line arguments, ``sys.argv`` if not given.
+    :return:     1 if any message was printed or a file could not be
+                 analysed, 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(
+        description='Analyses the Python files of a git repository with '
+                    'pyflakes, re-using the results of unchanged files.')
+    parser.add_argument('root', nargs='?', default='.',
+                        help='a directory inside the repository')
+    parser.add_argument('--base', default=None,
+                        help='the revision to compare the working tree to')
+    parser.add_argument('--cache-directory', default=None,
+                        help='directory of the cached results, by default '
+                             'inside the git directory')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='number of worker processes')
+    parser.add_argument('--no-doctest', dest='with_doctest',
+                        action='store_false',
+                        help='do not analyse the code in docstrings')
+    args = parser.parse_args(args)
+
+    filenames, results, _ = analyse_repository(
+        args.root, args.base, args.cache_directory, args.processes,
+        args.with_doctest)
+    return print_messages(filenames, results)
+
+
+if __name__ == '__main__':  # pragma: no cover
+    raise SystemExit(main())
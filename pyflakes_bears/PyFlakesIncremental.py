@@ -0,0 +1,303 @@
+import ast
+import copy
+import tokenize
+from difflib import SequenceMatcher
+
+from pyflakes import messages
+from pyflakes.checker import Checker
+from pyflakes_bears.PyFlakesASTBear import PyFlakesResult, parse_source
+from pyflakes_bears.PyFlakesSnapshot import BindingSnapshot, snapshot_scopes
+
+# Messages that mention the line of a second node in their arguments.
+LINE_ARGUMENT_MESSAGES = tuple(
+    getattr(messages, name)
+    for name in ('RedefinedWhileUnused', 'RedefinedInListComp',
+                 'ImportShadowedByLoopVar', 'UndefinedLocal')
+    if hasattr(messages, name))
+
+# Tokens that never change the AST of a module.
+LAYOUT_TOKENS = {tokenize.COMMENT, tokenize.NL, tokenize.NEWLINE,
+                 tokenize.INDENT, tokenize.DEDENT, tokenize.ENDMARKER}
+
+
+class PositionMap(object):
+    """
+    Maps source positions of an old version of a file to the positions of a
+    structurally identical new version.
+
+    Lines of statements that were not touched are mapped as a whole, so the
+    positions pyflakes assigns to doctest code in them are mapped as well.
+    Positions inside statements whose layout changed are mapped node by
+    node.
+    """
+
+    def __init__(self):
+        self._positions = {}
+        self._lines = {}
+        self.ambiguous = False
+
+    def add_lines(self, old_start, new_start, count):
+        """
+        Registers a block of lines that is identical in both versions.
+        """
+        for offset in range(count):
+            self._lines[old_start + offset] = new_start + offset
+
+    def add_nodes(self, old_node, new_node):
+        """
+        Registers the positions of all nodes of two structurally identical
+        ASTs.
+        """
+        for old, new in zip(ast.walk(old_node), ast.walk(new_node)):
+            if not hasattr(old, 'lineno'):
+                continue
+            old_position = (old.lineno, old.col_offset)
+            new_position = (new.lineno, new.col_offset)
+            if self._positions.setdefault(old_position,
+                                          new_position) != new_position:
+                # E.g. parentheses were added around the start of an
+                # expression, so one old position now has two new ones.
+                self.ambiguous = True
+
+    def map(self, lineno, col_offset):
+        """
+        :return: The new position as tuple of line and column.
+        :raises KeyError: If the position cannot be mapped.
+        """
+        position = self._positions.get((lineno, col_offset))
+        if position is None:
+            position = (self._lines[lineno], col_offset)
+        return position
+
+    def map_line(self, lineno):
+        """
+        :return: The new line number.
+        :raises KeyError: If the line cannot be mapped.
+        """
+        if lineno in self._lines:
+            return self._lines[lineno]
+        lines = {new[0] for old, new in self._positions.items()
+                 if old[0] == lineno}
+        if len(lines) != 1:
+            raise KeyError(lineno)
+        return lines.pop()
+
+
+def get_changed_lines(old_lines, new_lines):
+    """
+    Strips the lines two versions of a file have in common at their start
+    and end.
+
+    :return: A tuple of the remaining lines of both versions.
+    """
+    start = 0
+    common = min(len(old_lines), len(new_lines))
+    while start < common and old_lines[start] == new_lines[start]:
+        start += 1
+    old_end, new_end = len(old_lines), len(new_lines)
+    while (min(old_end, new_end) > start and
+           old_lines[old_end - 1] == new_lines[new_end - 1]):
+        old_end -= 1
+        new_end -= 1
+    return old_lines[start:old_end], new_lines[start:new_end]
+
+
+def get_code_tokens(lines):
+    """
+    Tokenizes some lines of a file, which may start inside a statement.
+
+    :return: A list of tuples of the type and the string of all tokens that
+             can change the AST, leaving out parentheses, or ``None`` if
+             the lines cannot be tokenized.
+    """
+    try:
+        return [(token.type, token.string) for token in
+                tokenize.generate_tokens(iter(lines).__next__)
+                if token.type not in LAYOUT_TOKENS and
+                token.string not in ('(', ')')]
+    except (tokenize.TokenError, SyntaxError):
+        return None
+
+
+def changes_code(old_lines, new_lines):
+    """
+    Cheaply detects changes that certainly change the AST of a file, such
+    as an edited name, literal or operator, without parsing the file.
+
+    :return: ``True`` if the AST changed, ``False`` if it may be unchanged.
+    """
+    old_lines, new_lines = get_changed_lines(old_lines, new_lines)
+    old_tokens = get_code_tokens(old_lines)
+    new_tokens = get_code_tokens(new_lines)
+    return (old_tokens is not None and new_tokens is not None and
+            old_tokens != new_tokens)
+
+
+def get_segments(tree, lines):
+    """
+    Splits a module into the source of its top level statements. Every
+    segment reaches from the first decorator of a statement up to the next
+    statement, trailing comments and blank lines included.
+
+    :param tree:  The AST of the module.
+    :param lines: The source of the module as list of lines.
+    :return:      A list of tuples of the first line of every segment, its
+                  number of lines and a tuple of its lines.
+    """
+    starts = [min([statement.lineno] +
+                  [decorator.lineno
+                   for decorator in getattr(statement, 'decorator_list', ())])
+              for statement in tree.body]
+    ends = starts[1:] + [len(lines) + 1]
+    return [(start, end - start, tuple(lines[start - 1:end - 1]))
+            for start, end in zip(starts, ends)]
+
+
+def match_statements(old_tree, new_tree, old_lines, new_lines):
+    """
+    Compares the top level statements of two versions of a module, ignoring
+    their positions.
+
+    Statements whose source is unchanged are matched by text only, so the
+    cost is proportional to the edited statements rather than the module.
+
+    :param old_tree:  The AST of the old version.
+    :param new_tree:  The AST of the new version.
+    :param old_lines: The source of the old version as list of lines.
+    :param new_lines: The source of the new version as list of lines.
+    :return:          A tuple of the list of top level statements of the new
+                      version that were added or changed, the number of
+                      removed statements and a ``PositionMap`` for the
+                      statements that were kept.
+    """
+    old_segments = get_segments(old_tree, old_lines)
+    new_segments = get_segments(new_tree, new_lines)
+    matcher = SequenceMatcher(None,
+                              [source for _, _, source in old_segments],
+                              [source for _, _, source in new_segments],
+                              autojunk=False)
+    changed = []
+    removed = 0
+    position_map = PositionMap()
+    for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+        if tag == 'equal':
+            for old, new in zip(old_segments[old_start:old_end],
+                                new_segments[new_start:new_end]):
+                position_map.add_lines(old[0], new[0], old[1])
+            continue
+
+        old_body = old_tree.body[old_start:old_end]
+        new_body = new_tree.body[new_start:new_end]
+        removed += max(len(old_body) - len(new_body), 0)
+        for index, statement in enumerate(new_body):
+            if (index < len(old_body) and
+                    ast.dump(old_body[index]) == ast.dump(statement)):
+                position_map.add_nodes(old_body[index], statement)
+            else:
+                changed.append(statement)
+    return changed, removed, position_map
+
+
+def remap_scopes(scopes, position_map):
+    """
+    Moves all bindings of snapshot scopes to their new positions.
+
+    :return: A list of new scope snapshots.
+    """
+    remapped = []
+    for scope in scopes:
+        new_scope = type(scope).__new__(type(scope))
+        for name, binding in scope.items():
+            if binding.lineno is not None:
+                lineno, col_offset = position_map.map(binding.lineno,
+                                                      binding.col_offset)
+                binding = BindingSnapshot(binding.name, binding.binding_class,
+                                          lineno, col_offset, binding.used)
+            dict.__setitem__(new_scope, name, binding)
+        remapped.append(new_scope)
+    return remapped
+
+
+def remap_messages(pyflakes_messages, position_map):
+    """
+    Moves pyflakes messages to their new positions.
+
+    :return: A list of new messages.
+    """
+    remapped = []
+    for message in pyflakes_messages:
+        message = copy.copy(message)
+        message.lineno, message.col = position_map.map(message.lineno,
+                                                       message.col)
+        if isinstance(message, LINE_ARGUMENT_MESSAGES):
+            name, lineno = message.message_args
+            message.message_args = (name, position_map.map_line(lineno))
+        remapped.append(message)
+    return remapped
+
+
+def reanalyse(previous, diff, filename, with_doctest=True):
+    """
+    Re-analyses a file after it was changed, reusing the previous result
+    where that is sound.
+
+    pyflakes' analysis only depends on the structure of the AST and not on
+    the positions of its nodes. If the change leaves all top level
+    statements structurally intact, e.g. because only comments, blank
+    lines or formatting were touched, the previous result is reused with
+    all positions moved.
+
+    Any other change is analysed from scratch. Re-checking only the changed
+    statements is not sound: a function body marks module level names as
+    used, and results do not record which scope used a name, so the used
+    state of every module level binding would have to be recomputed from
+    all other scopes anyway. Changes that alter names, literals or
+    operators are detected on the changed lines alone, so such edits cost
+    no more than a plain run.
+
+    :param previous:     The ``PyFlakesResult`` of the original file.
+    :param diff:         A coala ``Diff`` from the original file to the new
+                         one.
+    :param filename:     The name of the file.
+    :param with_doctest: Whether doctests are analysed. The previous result
+                         is only reused if it was analysed the same way.
+    :return:             A snapshot ``PyFlakesResult`` of the new file.
+    """
+    old_lines = diff.original
+    new_lines = diff.modified
+    if (previous.with_doctest == with_doctest and
+            not changes_code(old_lines, new_lines)):
+        result = reuse(previous, old_lines, new_lines, filename)
+        if result is not None:
+            return result
+
+    checker = Checker(parse_source(new_lines, filename), filename=filename,
+                      withDoctest=with_doctest)
+    return PyFlakesResult(previous.origin,
+                          snapshot_scopes(checker.deadScopes),
+                          checker.messages, with_doctest)
+
+
+def reuse(previous, old_lines, new_lines, filename):
+    """
+    Moves the previous result of a file to the positions of a new version
+    of it, if the top level statements of both are structurally identical.
+
+    :return: A snapshot ``PyFlakesResult`` of the new file, or ``None`` if
+             the previous result cannot be reused.
+    """
+    old_tree = parse_source(old_lines, filename)
+    new_tree = parse_source(new_lines, filename)
+    changed, removed, position_map = match_statements(
+        old_tree, new_tree, old_lines, new_lines)
+    if changed or removed or position_map.ambiguous:
+        return None
+    try:
+        return PyFlakesResult(
+            previous.origin,
+            remap_scopes(snapshot_scopes(previous.dead_scopes),
+                         position_map),
+            remap_messages(previous.pyflakes_messages, position_map),
+            previous.with_doctest)
+    except KeyError:
+        return None
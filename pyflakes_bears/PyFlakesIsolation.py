@@ -0,0 +1,144 @@
+import json
+from collections import OrderedDict
+
+from pyflakes_bears.PyFlakesASTBear import analyse_source
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+
+class AnalysisSkipped(Exception):
+    """
+    Raised if the isolated analysis of a file exceeded its time or memory
+    budget or its worker died, e.g. of a stack overflow.
+    """
+
+    def __init__(self, filename, reason, message):
+        """
+        :param filename: The name of the file.
+        :param reason:   ``'time'``, ``'memory'`` or ``'crash'``.
+        :param message:  A description of what happened.
+        """
+        Exception.__init__(self, message)
+        self.filename = filename
+        self.reason = reason
+
+
+def get_address_space():
+    """
+    :return: The size in bytes of the virtual address space of the process,
+             or 0 if it cannot be determined.
+    """
+    try:
+        with open('/proc/self/statm') as file:
+            pages = int(file.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return 0
+    return pages * resource.getpagesize()
+
+
+def run_worker(connection, filename, source, with_doctest, requirements,
+               memory_limit):
+    """
+    Analyses a file in a worker process and sends a tuple of ``'result'``
+    and the snapshot result of ``analyse_source``, of ``'error'`` and the
+    exception raised or of ``'memory'`` and ``None`` through the
+    connection.
+    """
+    if memory_limit and resource is not None:
+        limit = get_address_space() + memory_limit * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    try:
+        payload = ('result', analyse_source(source, filename, with_doctest,
+                                            requirements, snapshot=True))
+    except MemoryError:
+        payload = ('memory', None)
+    except Exception as exception:
+        payload = ('error', exception)
+    del source
+    try:
+        connection.send(payload)
+    except MemoryError:
+        connection.send(('memory', None))
+
+
+def analyse_isolated(filename, source, with_doctest=True, requirements=None,
+                     time_limit=0, memory_limit=0):
+    """
+    Runs pyflakes on a file in a worker process, which is killed if it takes
+    longer than the time limit. The memory limit is enforced by limiting
+    the address space of the worker, which is only supported on Unix.
+
+    :param filename:     The name of the file.
+    :param source:       The source code, see ``parse_source``.
+    :param with_doctest: Whether doctests are analysed.
+    :param requirements: The requirements of a pruned analysis, see
+                         ``PyFlakesASTBear.get_requirements``, or ``None``.
+    :param time_limit:   The wall time in seconds the analysis may take.
+                         Unlimited if 0.
+    :param memory_limit: The memory in MB the worker may allocate on top of
+                         what it starts with. Unlimited if 0.
+    :return:             A tuple of the snapshots of all dead scopes and the
+                         pyflakes messages.
+    :raises AnalysisSkipped: If the analysis exceeded a limit or the worker
+                             died.
+    :raises SyntaxError:     If the file cannot be parsed.
+    """
+    import multiprocessing
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(
+        target=run_worker, args=(sender, filename, source, with_doctest,
+                                 requirements, memory_limit))
+    process.daemon = True
+    process.start()
+    sender.close()
+    try:
+        if not receiver.poll(time_limit or None):
+            raise AnalysisSkipped(
+                filename, 'time',
+                'The analysis took longer than {} seconds.'.format(
+                    time_limit))
+        try:
+            status, value = receiver.recv()
+        except EOFError:
+            process.join()
+            raise AnalysisSkipped(
+                filename, 'crash',
+                'The analysis crashed with exit code {}.'.format(
+                    process.exitcode))
+    finally:
+        if process.is_alive():
+            process.terminate()
+        process.join()
+        receiver.close()
+
+    if status == 'memory':
+        # The parser raises a MemoryError for too deeply nested code, too.
+        raise AnalysisSkipped(
+            filename, 'memory',
+            'The analysis needed more than {} MB of memory.'.format(
+                memory_limit) if memory_limit else
+            'The analysis ran out of memory.')
+    if status == 'error':
+        raise value
+    return value
+
+
+def write_skip_record(report_file, bear, skipped):
+    """
+    Appends a record of a skipped file as JSON line to a report file.
+
+    :param report_file: The file to append to. Nothing is written if empty.
+    :param bear:        The name of the bear that skipped the file.
+    :param skipped:     The ``AnalysisSkipped`` exception.
+    """
+    if not report_file:
+        return
+    record = OrderedDict((('bear', bear),
+                          ('file', skipped.filename),
+                          ('reason', skipped.reason),
+                          ('message', str(skipped))))
+    with open(report_file, 'a') as file:
+        file.write(json.dumps(record) + '\n')
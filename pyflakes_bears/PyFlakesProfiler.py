@@ -0,0 +1,173 @@
+import cProfile
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from pyflakes.checker import Checker
+
+
+def get_counters():
+    """
+    :return: A tuple of the wall time, the CPU time and the number of memory
+             blocks currently allocated by the interpreter.
+    """
+    return time.perf_counter(), time.process_time(), sys.getallocatedblocks()
+
+
+class PhaseRecorder(object):
+    """
+    Records the wall time, CPU time and the net change in live memory
+    blocks of every phase of analysing a file. Blocks that are allocated
+    and freed again within a phase do not count, so ``net_blocks`` shows
+    the memory a phase retains, not how much it allocates.
+
+    When the analysis is finished, a record is appended as JSON line to the
+    timing file. If a profile directory is given, the analysis is profiled
+    and the profile is dumped there if it took longer than the threshold.
+    """
+
+    def __init__(self, bear, filename, timing_file='', profile_directory='',
+                 profile_threshold=1.0):
+        """
+        :param bear:              The name of the bear analysing the file.
+        :param filename:          The name of the analysed file.
+        :param timing_file:       The file records are appended to. No
+                                  records are written if empty.
+        :param profile_directory: The directory profiles are dumped to. The
+                                  analysis is not profiled if empty.
+        :param profile_threshold: The wall time in seconds a file has to
+                                  take for its profile to be dumped.
+        """
+        self.bear = bear
+        self.filename = filename
+        self.timing_file = timing_file
+        self.profile_directory = profile_directory
+        self.profile_threshold = profile_threshold
+        self.phases = OrderedDict()
+        self._profile = None
+        self._start = None
+
+    def __enter__(self):
+        if self.profile_directory:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        self._start = get_counters()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = get_counters()
+        if self._profile is not None:
+            self._profile.disable()
+        wall = end[0] - self._start[0]
+        if exc_type is None:
+            self.write_record(wall, end[1] - self._start[1])
+            if self._profile is not None and wall > self.profile_threshold:
+                self.dump_profile()
+        return False
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Measures the enclosed code as phase of the given name. Phases that
+        are entered several times accumulate.
+        """
+        start = get_counters()
+        try:
+            yield
+        finally:
+            end = get_counters()
+            self.add(name, *(after - before
+                             for after, before in zip(end, start)))
+
+    def add(self, name, wall, cpu, net_blocks):
+        """
+        Adds a measurement to the phase of the given name.
+        """
+        phase = self.phases.setdefault(name, OrderedDict(
+            (('wall', 0.0), ('cpu', 0.0), ('net_blocks', 0))))
+        phase['wall'] += wall
+        phase['cpu'] += cpu
+        phase['net_blocks'] += net_blocks
+
+    def write_record(self, wall, cpu):
+        if not self.timing_file:
+            return
+        record = OrderedDict((('bear', self.bear),
+                              ('file', self.filename),
+                              ('wall', wall),
+                              ('cpu', cpu),
+                              ('phases', self.phases)))
+        # A single write of a whole line keeps records of concurrent
+        # processes from interleaving.
+        with open(self.timing_file, 'a') as file:
+            file.write(json.dumps(record) + '\n')
+
+    def dump_profile(self):
+        """
+        Dumps the profile to ``<profile_directory>/<bear>-<file>-<hash>.prof``.
+        The file name is made safe for a file system, so the hash of the
+        absolute path of the file tells apart files like ``a/b.py`` and
+        ``a_b.py``.
+        """
+        os.makedirs(self.profile_directory, exist_ok=True)
+        name = re.sub(r'[^\w.-]+', '_', self.filename).strip('_')
+        digest = hashlib.sha1(os.path.abspath(self.filename).encode(
+            'utf-8', 'surrogateescape')).hexdigest()[:8]
+        self._profile.dump_stats(os.path.join(
+            self.profile_directory,
+            '{}-{}-{}.prof'.format(self.bear, name, digest)))
+
+
+class NullRecorder(object):
+    """
+    A ``PhaseRecorder`` that records nothing, used if instrumentation is
+    disabled.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    @contextmanager
+    def phase(self, name):
+        yield
+
+    def add(self, name, wall, cpu, net_blocks):
+        pass
+
+
+NULL_RECORDER = NullRecorder()
+
+
+def get_recorder(bear, filename, timing_file='', profile_directory='',
+                 profile_threshold=1.0):
+    """
+    :return: A ``PhaseRecorder`` if any instrumentation is enabled, the
+             ``NULL_RECORDER`` otherwise.
+    """
+    if not timing_file and not profile_directory:
+        return NULL_RECORDER
+    return PhaseRecorder(bear, filename, timing_file, profile_directory,
+                         profile_threshold)
+
+
+class TimedChecker(Checker):
+    """
+    A pyflakes ``Checker`` that records the analysis of doctests as separate
+    ``doctest`` phase. Its time is still included in the enclosing phase.
+    """
+
+    def __init__(self, tree, *args, recorder=NULL_RECORDER, **kwargs):
+        self.recorder = recorder
+        Checker.__init__(self, tree, *args, **kwargs)
+
+    def handleDoctests(self, node):
+        with self.recorder.phase('doctest'):
+            Checker.handleDoctests(self, node)
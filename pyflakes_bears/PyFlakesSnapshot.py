@@ -0,0 +1,125 @@
+from pyflakes.checker import Builtin
+
+
+class BindingSnapshot(object):
+    """
+    A compact, picklable copy of a pyflakes ``Binding``.
+
+    Only the name, the class of the original binding, its position and
+    whether it was used are kept, so a snapshot never references an AST
+    node.
+    """
+
+    __slots__ = ('name', 'binding_class', 'lineno', 'col_offset', 'used')
+
+    def __init__(self, name, binding_class, lineno, col_offset, used):
+        self.name = name
+        self.binding_class = binding_class
+        self.lineno = lineno
+        self.col_offset = col_offset
+        self.used = used
+
+    @classmethod
+    def from_binding(cls, binding):
+        """
+        Creates the snapshot of a pyflakes binding.
+
+        :param binding: A pyflakes ``Binding`` instance.
+        :return:        A ``BindingSnapshot`` instance.
+        """
+        source = binding.source
+        return cls(binding.name,
+                   type(binding),
+                   getattr(source, 'lineno', None),
+                   getattr(source, 'col_offset', None),
+                   bool(binding.used))
+
+    @property
+    def source(self):
+        """
+        Stands in for ``Binding.source`` so that consumers reading
+        ``node.source.lineno`` and ``node.source.col_offset`` work with
+        snapshots as well. Like pyflakes builtins, bindings without a
+        position have no source.
+        """
+        return None if self.lineno is None else self
+
+    def __repr__(self):
+        return '<{} of {} {!r} from line {!r}>'.format(
+            type(self).__name__, self.binding_class.__name__, self.name,
+            self.lineno)
+
+    def __eq__(self, other):
+        if not isinstance(other, BindingSnapshot):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot)
+                   for slot in self.__slots__)
+
+    def __hash__(self):
+        return hash((self.name, self.binding_class, self.lineno,
+                     self.col_offset))
+
+
+# Every module scope binds all builtins, which are identical across files
+# apart from their used state, so their snapshots are shared.
+_builtin_snapshots = {}
+
+
+def snapshot_binding(binding):
+    """
+    Returns the snapshot of a pyflakes binding, reusing a shared instance
+    for builtins.
+
+    :param binding: A pyflakes ``Binding`` or ``BindingSnapshot`` instance.
+    :return:        A ``BindingSnapshot`` instance.
+    """
+    if isinstance(binding, BindingSnapshot):
+        return binding
+    if type(binding) is Builtin:
+        key = (binding.name, bool(binding.used))
+        snapshot = _builtin_snapshots.get(key)
+        if snapshot is None:
+            snapshot = _builtin_snapshots[key] = (
+                BindingSnapshot.from_binding(binding))
+        return snapshot
+    return BindingSnapshot.from_binding(binding)
+
+
+def snapshot_scope(scope):
+    """
+    Creates the snapshot of a pyflakes scope.
+
+    The snapshot is an instance of the same scope class, so it can be told
+    apart with ``isinstance`` like the original, but it maps names to
+    ``BindingSnapshot`` instances and carries no other per-scope state.
+
+    :param scope: A pyflakes ``Scope`` instance.
+    :return:      A new instance of the scope's class.
+    """
+    snapshot = type(scope).__new__(type(scope))
+    dict.update(snapshot, ((name, snapshot_binding(binding))
+                           for name, binding in scope.items()))
+    return snapshot
+
+
+def snapshot_scopes(scopes):
+    """
+    Creates snapshots of all given pyflakes scopes.
+
+    :param scopes: An iterable of pyflakes ``Scope`` instances.
+    :return:       A list of scope snapshots in the same order.
+    """
+    return [snapshot_scope(scope) for scope in scopes]
+
+
+def get_binding_class(binding):
+    """
+    Returns the pyflakes class of a binding or of the binding a snapshot
+    was taken from.
+
+    :param binding: A pyflakes ``Binding`` or ``BindingSnapshot`` instance.
+    :return:        A subclass of pyflakes' ``Binding``.
+    """
+    if isinstance(binding, BindingSnapshot):
+        return binding.binding_class
+    return type(binding)
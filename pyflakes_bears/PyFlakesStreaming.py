@@ -0,0 +1,149 @@
+import queue
+import threading
+from contextlib import contextmanager
+
+from pyflakes.checker import Checker
+from pyflakes_bears.PyFlakesASTBear import (
+    PyFlakesASTBear, PyFlakesResult, parse_source)
+from pyflakes_bears.PyFlakesSnapshot import snapshot_scopes
+
+
+class StreamingChecker(Checker):
+    """
+    A pyflakes ``Checker`` that reports every scope as soon as pyflakes has
+    finished walking it.
+
+    pyflakes 3 and later leave scopes through the ``in_scope`` context
+    manager, earlier versions through ``popScope``. Whichever the installed
+    pyflakes provides is hooked.
+    """
+
+    def __init__(self, tree, *args, on_scope=None, **kwargs):
+        """
+        :param on_scope: A function called with every popped scope.
+        :raises RuntimeError: If the installed pyflakes provides neither
+                              hook, so no scope could be reported.
+        """
+        if not hasattr(Checker, 'in_scope') and not hasattr(Checker,
+                                                            'popScope'):
+            raise RuntimeError('Scopes of this pyflakes version cannot be '
+                               'streamed.')
+        self.on_scope = on_scope
+        Checker.__init__(self, tree, *args, **kwargs)
+
+    def scope_done(self):
+        if self.on_scope is not None:
+            self.on_scope(self.deadScopes[-1])
+
+    if hasattr(Checker, 'in_scope'):
+        @contextmanager
+        def in_scope(self, cls):
+            with Checker.in_scope(self, cls):
+                yield
+            self.scope_done()
+    else:
+        def popScope(self):
+            Checker.popScope(self)
+            self.scope_done()
+
+
+class StreamCancelled(Exception):
+    """
+    Raised in the analysing thread when the consumer stopped iterating.
+    """
+
+
+class ScopeStream(object):
+    """
+    Analyses a file in a worker thread and hands out its scopes while the
+    analysis is still running, so consumers of large files can start before
+    pyflakes has finished.
+
+    Scopes are handed out in the order pyflakes finishes them. Function
+    bodies are analysed after the module body, so class and generator
+    scopes of the module body come first, then function scopes and the
+    module scope last. Names in a scope that was handed out may still be
+    marked as used later, e.g. by nested functions, and pyflakes reports
+    unused imports only once all scopes are done. Decisions depending on
+    whether a name is used have to wait for ``result``.
+
+    At most ``max_pending`` scopes are queued. If the consumer falls behind,
+    the analysis waits for it; if the consumer stops iterating, the
+    analysis is aborted.
+    """
+
+    # Seconds between checks whether a waiting analysis was cancelled.
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, source, filename='<unknown>', with_doctest=True,
+                 max_pending=16, snapshot=False, origin=PyFlakesASTBear.name):
+        """
+        :param source:       The source code, see ``parse_source``.
+        :param filename:     The name of the file.
+        :param with_doctest: Whether doctests are analysed.
+        :param max_pending:  The number of scopes queued at most.
+        :param snapshot:     Whether ``result`` holds snapshots, so that the
+                             AST is freed once the stream is exhausted.
+        :param origin:       The origin of ``result``.
+        """
+        self.source = source
+        self.filename = filename
+        self.with_doctest = with_doctest
+        self.max_pending = max_pending
+        self.snapshot = snapshot
+        self.origin = origin
+        self.result = None
+
+    def __iter__(self):
+        """
+        :return: A generator of the live pyflakes scopes of the file. Once it
+                 is exhausted, ``result`` holds the complete
+                 ``PyFlakesResult``.
+        :raises SyntaxError: If the file cannot be parsed.
+        """
+        pending = queue.Queue(self.max_pending)
+        cancelled = threading.Event()
+
+        def put(item):
+            while not cancelled.is_set():
+                try:
+                    pending.put(item, timeout=self.POLL_INTERVAL)
+                    return
+                except queue.Full:
+                    pass
+            raise StreamCancelled
+
+        def analyse():
+            try:
+                checker = StreamingChecker(
+                    parse_source(self.source, self.filename),
+                    filename=self.filename, withDoctest=self.with_doctest,
+                    on_scope=lambda scope: put(('scope', scope)))
+                put(('done', checker))
+            except StreamCancelled:
+                pass
+            except Exception as exception:
+                try:
+                    put(('error', exception))
+                except StreamCancelled:
+                    pass
+
+        worker = threading.Thread(target=analyse, daemon=True)
+        worker.start()
+        try:
+            while True:
+                kind, value = pending.get()
+                if kind == 'scope':
+                    yield value
+                elif kind == 'error':
+                    raise value
+                else:
+                    scopes = value.deadScopes
+                    if self.snapshot:
+                        scopes = snapshot_scopes(scopes)
+                    self.result = PyFlakesResult(self.origin, scopes,
+                                                 value.messages)
+                    return
+        finally:
+            cancelled.set()
+            worker.join()
@@ -0,0 +1,41 @@
+from heapq import merge
+
+from pyflakes_bears.PyFlakesSnapshot import get_binding_class
+
+
+class ScopeIndex(object):
+    """
+    Groups the bindings of a pyflakes scope by binding class, so bindings of
+    a given type can be looked up without scanning the whole scope.
+    """
+
+    def __init__(self, scope):
+        """
+        :param scope: A pyflakes scope or scope snapshot.
+        """
+        self.scope = scope
+        self._by_class = {}
+        self._by_type = {}
+        for position, binding in enumerate(scope.values()):
+            self._by_class.setdefault(get_binding_class(binding), []).append(
+                (position, binding))
+
+    def get_nodes(self, node_type):
+        """
+        Returns all bindings of the given type, subclasses included, in the
+        order they appear in the scope.
+
+        The classes matching a type are resolved on the first query, later
+        queries for the same type only cost the number of matches.
+
+        :param node_type: A pyflakes binding class or a tuple of them.
+        :return:          A list of bindings.
+        """
+        nodes = self._by_type.get(node_type)
+        if nodes is None:
+            groups = [bindings
+                      for binding_class, bindings in self._by_class.items()
+                      if issubclass(binding_class, node_type)]
+            nodes = [binding for _, binding in merge(*groups)]
+            self._by_type[node_type] = nodes
+        return nodes
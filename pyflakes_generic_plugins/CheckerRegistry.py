@@ -0,0 +1,114 @@
+import hashlib
+from collections import OrderedDict
+
+
+class CheckerRegistry(object):
+    """
+    Shares pyflakes checkers between consumers that analyse the same file,
+    so that pyflakes runs only once per file.
+
+    Checkers are registered per filename together with the tree they
+    analysed and a digest of the source the tree was parsed from. A checker
+    is found again by the identity of its tree or by that digest, so
+    consumers that parse the file on their own, like the bears and the
+    flake8 plugins, share it through the digest. Only the
+    most recently used checkers are kept, since every one of them keeps its
+    whole tree alive.
+    """
+
+    def __init__(self, max_entries=4):
+        """
+        :param max_entries: The number of checkers kept.
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def get_digest(source):
+        """
+        :param source: The source code as text, as bytes or as list of lines.
+        :return:       A digest identifying the source.
+        """
+        if isinstance(source, (str, bytes, bytearray)):
+            source = (source,)
+        digest = hashlib.sha1()
+        for chunk in source:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8', 'surrogatepass')
+            digest.update(chunk)
+        return digest.hexdigest()
+
+    def register(self, filename, checker, source=None):
+        """
+        Registers a checker, replacing any other checker of the file.
+
+        :param filename: The name of the analysed file.
+        :param checker:  The pyflakes checker.
+        :param source:   The source the analysed tree was parsed from, so the
+                         checker can be looked up by source as well.
+        """
+        digest = None if source is None else self.get_digest(source)
+        self._entries.pop(filename, None)
+        self._entries[filename] = (checker.root, digest, checker)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, filename, tree=None, source=None, with_doctest=None):
+        """
+        Looks up the checker of a file.
+
+        :param filename:     The name of the file.
+        :param tree:         The tree that may have been analysed.
+        :param source:       The source the analysed tree may have been
+                             parsed from. The checker of another tree
+                             parsed from the same source matches, too.
+        :param with_doctest: Whether doctests have to have been analysed.
+                             Any checker qualifies if ``None``.
+        :return:             The checker or ``None`` if there is no checker
+                             for the given tree or source.
+        """
+        entry = self._entries.get(filename)
+        if entry is None:
+            return None
+
+        registered_tree, digest, checker = entry
+        matches = ((tree is not None and registered_tree is tree) or
+                   (source is not None and digest is not None and
+                    digest == self.get_digest(source)))
+        if not matches or (with_doctest is not None and
+                           checker.withDoctest != with_doctest):
+            return None
+
+        self._entries.move_to_end(filename)
+        return checker
+
+    def clear(self):
+        """
+        Forgets all checkers, releasing their trees.
+        """
+        self._entries.clear()
+
+    def get_checker(self, tree, filename, source=None, **kwargs):
+        """
+        Returns the registered checker of a tree or of its source, running
+        and registering a new one if there is none.
+
+        :param tree:     The tree to analyse.
+        :param filename: The name of the file.
+        :param source:   The source the tree was parsed from. Consumers
+                         parsing the file on their own only share checkers
+                         if they pass it.
+        :param kwargs:   Further arguments passed on to the ``Checker``.
+        :return:         A pyflakes ``Checker`` instance.
+        """
+        checker = self.get(filename, tree=tree, source=source,
+                           with_doctest=kwargs.get('withDoctest'))
+        if checker is None:
+            from pyflakes.checker import Checker
+            checker = Checker(tree, filename, **kwargs)
+            self.register(filename, checker, source=source)
+        return checker
+
+
+# The registry shared by the generic plugins and the bears.
+checker_registry = CheckerRegistry()
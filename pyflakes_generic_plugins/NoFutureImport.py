@@ -1,50 +1,104 @@
-from pyflakes.checker import Checker
-from pyflakes.checker import ModuleScope
-from pyflakes.checker import FutureImportation
+import ast
+import tokenize
+from collections import OrderedDict
+
+from pyflakes_generic_plugins.RuleEngine import Rule, RulePlugin
 
 __version__ = '0.1'
 
 CODE = 'F482'
 
 
-class NoFutureImport(object):
+def has_future_import(lines):
+    """
+    Scans the tokens of the header of a module for a ``__future__`` import,
+    without parsing the module.
+
+    Future imports may only be preceded by the docstring, comments, blank
+    lines and other future imports, so the scan stops at the first other
+    statement. Headers the scan does not understand count as having a
+    future import.
+
+    :param lines: The source of the module as list of lines.
+    :return:      ``False`` if the module has no future import.
+    """
+    state = 'statement'
+    try:
+        for token in tokenize.generate_tokens(iter(lines).__next__):
+            if token.type in (tokenize.COMMENT, tokenize.NL):
+                continue
+            if state == 'from':
+                return token.string == '__future__'
+            if state == 'docstring':
+                if token.type == tokenize.NEWLINE or token.string == ';':
+                    state = 'after docstring'
+                elif token.type != tokenize.STRING:
+                    return True
+            elif token.type == tokenize.NEWLINE:
+                continue
+            elif token.type == tokenize.STRING:
+                if state == 'after docstring':
+                    return False
+                state = 'docstring'
+            elif token.type == tokenize.NAME:
+                if token.string != 'from':
+                    return False
+                state = 'from'
+            else:
+                return token.type != tokenize.ENDMARKER
+    except (tokenize.TokenError, SyntaxError):
+        return True
+    return False
+
+
+def has_future_import_statement(tree):
+    """
+    Checks the leading statements of a module for a ``__future__`` import.
+
+    :param tree: The AST of the module.
+    :return:     ``True`` if the module has a future import.
+    """
+    for index, statement in enumerate(tree.body):
+        if (isinstance(statement, ast.ImportFrom) and
+                statement.module == '__future__'):
+            return True
+        value = getattr(statement, 'value', None)
+        if not (index == 0 and isinstance(statement, ast.Expr) and
+                isinstance(getattr(value, 'value', getattr(value, 's', None)),
+                           str)):
+            return False
+    return False
+
+
+class FutureImportRule(Rule):
+    """
+    Reports every future import of the module scope.
+    """
+
+    CODE = CODE
+    BINDING_TYPES = ('FutureImportation',)
+
+    def applies(self, tree):
+        return has_future_import_statement(tree)
+
+    def visit_binding(self, scope, binding):
+        from pyflakes.checker import DoctestScope
+        if isinstance(scope, DoctestScope):
+            return ()
+        return (self.report(binding.source.lineno, binding.source.col_offset,
+                            'Future import {} found'.format(binding.name)),)
+
+
+class NoFutureImport(RulePlugin):
     """
     A generic plugin that uses pyflakes AST to detect use of `__future__`
     import in python code.
+
+    Files without future imports are ruled out from the leading statements
+    of the tree, without running pyflakes.
     """
     name = 'no_future'
     version = __version__
 
-    def __init__(self, tree, filename):
-        self.tree = tree
-        self.filename = filename
-        self._checker = None
-        self._module_scope = None
-
-    @property
-    def checker(self):
-        if self._checker is None:
-            self._checker = Checker(self.tree, self.filename)
-        return self._checker
-
-    @checker.setter
-    def checker(self, checker):
-        self._checker = checker
-
-    @property
-    def module_scope(self):
-        if self._module_scope is None:
-            self._module_scope = list(filter(lambda scope:
-                                             isinstance(scope,
-                                                        ModuleScope),
-                                             self.checker.deadScopes))[0]
-        return self._module_scope
-
-    def run(self):
-        for _, node in self.module_scope.items():
-            if isinstance(node, FutureImportation):
-                message = ('{code}: Future import {name} found'
-                           .format(name=node.name,
-                                   code=CODE))
-                yield (node.source.lineno, node.source.col_offset,
-                       message, NoFutureImport)
+    RULES = (FutureImportRule,)
+    results_cache = OrderedDict()
@@ -0,0 +1,266 @@
+import importlib
+
+from pyflakes_generic_plugins.CheckerRegistry import checker_registry
+
+
+def resolve_types(types, module_name):
+    """
+    Resolves class names to the classes of a module.
+
+    :param types:       An iterable of classes and class names.
+    :param module_name: The module the names are looked up in.
+    :return:            A tuple of classes.
+    """
+    module = None
+    resolved = []
+    for cls in types:
+        if isinstance(cls, str):
+            if module is None:
+                module = importlib.import_module(module_name)
+            cls = getattr(module, cls)
+        resolved.append(cls)
+    return tuple(resolved)
+
+
+class Rule(object):
+    """
+    A check run by a ``RuleEngine``.
+
+    A rule declares the pyflakes bindings, scopes and messages it is
+    interested in, and the engine calls the matching ``visit_`` methods
+    while it walks the analysis of a file once for all rules. Every
+    ``visit_`` method returns an iterable of reports, see ``report``.
+
+    Types are given as classes or as names of classes in
+    ``pyflakes.checker`` (bindings and scopes) or ``pyflakes.messages``, so
+    rules can be declared without importing pyflakes.
+    """
+
+    # The code prepended to the messages of the rule.
+    CODE = ''
+    BINDING_TYPES = ()
+    SCOPE_TYPES = ()
+    MESSAGE_TYPES = ()
+
+    def applies(self, tree):
+        """
+        Tells from the tree of a file whether the rule can report anything
+        for it. pyflakes is not run for a file no rule applies to.
+
+        :param tree: The AST of the file.
+        :return:     ``False`` if the rule can be skipped for the file.
+        """
+        return True
+
+    def visit_scope(self, scope):
+        """
+        Called with every dead scope of a type in ``SCOPE_TYPES``.
+        """
+        return ()
+
+    def visit_binding(self, scope, binding):
+        """
+        Called with every binding of a type in ``BINDING_TYPES`` and the
+        dead scope holding it.
+        """
+        return ()
+
+    def visit_message(self, message):
+        """
+        Called with every pyflakes message of a type in ``MESSAGE_TYPES``.
+        """
+        return ()
+
+    def report(self, lineno, col_offset, text):
+        """
+        :return: A report as a tuple of the line, the column and the
+                 message prefixed with ``CODE``.
+        """
+        return lineno, col_offset, '{code}: {text}'.format(code=self.CODE,
+                                                           text=text)
+
+
+class Dispatcher(object):
+    """
+    Maps the classes of bindings, scopes and messages to the rules
+    interested in them. The rules of a class are looked up once per class,
+    so dispatching costs a dictionary lookup per visited object, no matter
+    how many rules there are.
+    """
+
+    def __init__(self, rules):
+        """
+        :param rules: The rules to dispatch to.
+        """
+        self.types = {
+            kind: [(rule, resolve_types(getattr(rule, attribute),
+                                        module_name))
+                   for rule in rules]
+            for kind, attribute, module_name in (
+                ('binding', 'BINDING_TYPES', 'pyflakes.checker'),
+                ('scope', 'SCOPE_TYPES', 'pyflakes.checker'),
+                ('message', 'MESSAGE_TYPES', 'pyflakes.messages'))}
+        self.tables = {kind: {} for kind in self.types}
+
+    def wants(self, kind):
+        """
+        :return: Whether any rule is interested in objects of a kind.
+        """
+        return any(types for _, types in self.types[kind])
+
+    def get_rules(self, kind, cls):
+        """
+        :param kind: ``binding``, ``scope`` or ``message``.
+        :param cls:  The class of an object of that kind.
+        :return:     A tuple of the rules interested in the class.
+        """
+        table = self.tables[kind]
+        rules = table.get(cls)
+        if rules is None:
+            rules = table[cls] = tuple(
+                rule for rule, types in self.types[kind]
+                if types and issubclass(cls, types))
+        return rules
+
+
+class RuleEngine(object):
+    """
+    Runs many rules over the pyflakes analysis of a file in a single walk
+    over its dead scopes, their bindings and its messages.
+    """
+
+    def __init__(self, rules):
+        """
+        :param rules: An iterable of ``Rule`` instances.
+        """
+        self.rules = tuple(rules)
+        self._dispatchers = {}
+
+    def get_dispatcher(self, rules):
+        """
+        :param rules: A tuple of rules of this engine.
+        :return:      The ``Dispatcher`` of the rules, created on first use.
+        """
+        dispatcher = self._dispatchers.get(rules)
+        if dispatcher is None:
+            dispatcher = self._dispatchers[rules] = Dispatcher(rules)
+        return dispatcher
+
+    def run(self, tree, get_checker):
+        """
+        Runs the rules applying to a file.
+
+        :param tree:        The AST of the file.
+        :param get_checker: A function returning the pyflakes checker of the
+                            file, only called if any rule applies.
+        :return:            A list of the reports of all rules.
+        """
+        rules = tuple(rule for rule in self.rules if rule.applies(tree))
+        if not rules:
+            return []
+        dispatcher = self.get_dispatcher(rules)
+        checker = get_checker()
+        get_rules = dispatcher.get_rules
+        wants_bindings = dispatcher.wants('binding')
+        reports = []
+
+        for scope in checker.deadScopes:
+            for rule in get_rules('scope', type(scope)):
+                reports.extend(rule.visit_scope(scope))
+            if not wants_bindings:
+                continue
+            for binding in scope.values():
+                for rule in get_rules('binding', type(binding)):
+                    reports.extend(rule.visit_binding(scope, binding))
+
+        if dispatcher.wants('message'):
+            for message in checker.messages:
+                for rule in get_rules('message', type(message)):
+                    reports.extend(rule.visit_message(message))
+        return reports
+
+
+class RulePlugin(object):
+    """
+    The base of flake8 plugins running rules on a ``RuleEngine``.
+
+    Subclasses set the flake8 ``name`` and ``version``, the ``RULES`` they
+    run and a ``results_cache`` of their own. The pyflakes checker is
+    shared with other consumers through the ``checker_registry`` and only
+    created if a rule applies to the file.
+
+    If the lines of the file are given, as flake8 does, the results are
+    cached per process by the contents of the file.
+    """
+
+    # The rule classes run by the plugin.
+    RULES = ()
+
+    # The results of the most recently analysed files by source digest,
+    # shared by all instances of a plugin in a process.
+    results_cache = None
+    results_cache_size = 1024
+
+    def __init__(self, tree, filename, lines=None):
+        """
+        :param tree:     The AST of the file.
+        :param filename: The name of the file.
+        :param lines:    The source of the file as list of lines, used as
+                         cache key and to share the checker with the bears.
+        """
+        self.tree = tree
+        self.filename = filename
+        self.lines = lines
+        self._checker = None
+
+    @classmethod
+    def get_engine(cls):
+        """
+        :return: The ``RuleEngine`` of the plugin, created on first use.
+        """
+        engine = cls.__dict__.get('_engine')
+        if engine is None:
+            engine = RuleEngine(rule() for rule in cls.RULES)
+            cls._engine = engine
+        return engine
+
+    @property
+    def checker(self):
+        """
+        The pyflakes checker of the tree. A checker another consumer already
+        registered for the same tree, or for the same lines of the file, is
+        reused.
+        """
+        if self._checker is None:
+            self._checker = checker_registry.get_checker(
+                self.tree, self.filename, source=self.lines)
+        return self._checker
+
+    @checker.setter
+    def checker(self, checker):
+        self._checker = checker
+        checker_registry.register(self.filename, checker, source=self.lines)
+
+    def get_results(self):
+        """
+        :return: A list of tuples of the line, column and message of every
+                 report.
+        """
+        return self.get_engine().run(self.tree, lambda: self.checker)
+
+    def run(self):
+        if self.lines is None or self.results_cache is None:
+            results = self.get_results()
+        else:
+            key = checker_registry.get_digest(self.lines)
+            results = self.results_cache.get(key)
+            if results is None:
+                results = self.get_results()
+                self.results_cache[key] = results
+                while len(self.results_cache) > self.results_cache_size:
+                    self.results_cache.popitem(last=False)
+            else:
+                self.results_cache.move_to_end(key)
+
+        for lineno, col_offset, message in results:
+            yield lineno, col_offset, message, type(self)
@@ -168,6 +168,7 @@ if __name__ == '__main__':
                             'makman@alice.de'),
           url='https://github.com/macbox7/coala-pyflakes',
           platforms='any',
+          python_requires='>=3.5',
           packages=find_packages(exclude=('build.*', 'tests', 'tests.*')),
           install_requires=required,
           extras_require=EXTRAS_REQUIRE,
@@ -193,7 +194,6 @@ if __name__ == '__main__':
               'Operating System :: OS Independent',
 
               'Programming Language :: Python :: Implementation :: CPython',
-              'Programming Language :: Python :: 3.4',
               'Programming Language :: Python :: 3.5',
               'Programming Language :: Python :: 3.6',
               'Programming Language :: Python :: 3 :: Only',
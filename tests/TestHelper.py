@@ -0,0 +1,43 @@
+import json
+import os
+import subprocess
+import sys
+
+
+def get_imported_modules(module, baseline='coalib.bears.LocalBear'):
+    """
+    Imports a module in a fresh interpreter.
+
+    :param module:   The module to import.
+    :param baseline: A module imported before, whose imports are not
+                     counted.
+    :return:         The set of the names of all modules the import of
+                     ``module`` loaded.
+    """
+    code = ('import json, sys; import {}; loaded = set(sys.modules); '
+            'import {}; '
+            'print(json.dumps(sorted(set(sys.modules) - loaded)))'
+            ).format(baseline, module)
+    output = subprocess.check_output([sys.executable, '-c', code],
+                                     universal_newlines=True)
+    return set(json.loads(output.splitlines()[-1]))
+
+
+def write_file(directory, name, content):
+    """
+    Writes a file, creating its parent directories. Its modification time
+    is set a second ahead, so every write is seen as a change, even on file
+    systems with coarse timestamps.
+
+    :param directory: The directory the name is relative to.
+    :param name:      The path of the file relative to ``directory``.
+    :param content:   The text to write.
+    :return:          The path of the file.
+    """
+    filename = os.path.join(directory, name)
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with open(filename, 'w') as file:
+        file.write(content)
+    stat = os.stat(filename)
+    os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+    return filename
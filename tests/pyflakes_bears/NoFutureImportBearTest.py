@@ -1,9 +1,18 @@
+import json
+import os
+import tempfile
 from queue import Queue
+from unittest.mock import patch
 from pyflakes_bears.NoFutureImportBear import NoFutureImportBear
+from pyflakes_bears.PyFlakesASTBear import PyFlakesASTBear
+from pyflakes_bears.PyFlakesIsolation import AnalysisSkipped
 from coalib.testing.LocalBearTestHelper import LocalBearTestHelper
 from coalib.settings.Section import Section
 from coalib.results.Result import Result
 from coalib.results.Diff import Diff
+from coalib.results.SourceRange import SourceRange
+
+from tests.TestHelper import get_imported_modules
 
 
 class NoFutureImportTest(LocalBearTestHelper):
@@ -28,6 +37,14 @@ class NoFutureImportTest(LocalBearTestHelper):
                                'print_function'])
         self.check_invalidity(self.uut, ['from __future__ import division;'])
 
+    def test_future_import_with_doctest(self):
+        self.check_invalidity(self.uut,
+                              ['from __future__ import division\n',
+                               'def foo():\n',
+                               '    \'\'\'\n',
+                               '    >>> x = 1\n',
+                               '    \'\'\'\n'])
+
     def test_multiline_imports(self):
         file_text = ['from __future__ import with_statement, \\\n',
                      '                       print_function, \\\n',
@@ -85,3 +102,152 @@ class NoFutureImportTest(LocalBearTestHelper):
                                 diffs={self.filename: diff},
                                 end_line=1)],
             filename=self.filename)
+
+    def test_snapshot_dependency(self):
+        file_text = ['from __future__ import division\n',
+                     'x = 1\n']
+        section = Section('pyflakes-ast')
+        ast_bear = PyFlakesASTBear(section, Queue())
+        snapshot = next(ast_bear.run(self.filename, file_text)).snapshot()
+
+        results = list(self.uut.run(
+            self.filename, file_text,
+            dependency_results={PyFlakesASTBear.name: [snapshot]}))
+
+        diff = Diff(file_text)
+        diff.delete_line(1)
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].affected_code[0].start.line, 1)
+        self.assertEqual(results[0].diffs, {self.filename: diff})
+
+    def test_byte_order_mark(self):
+        file_text = ['\ufeff"""Docstring."""\n',
+                     'from __future__ import division\n',
+                     'x = 1\n']
+        ast_bear = PyFlakesASTBear(Section('pyflakes-ast'), Queue())
+        result = next(ast_bear.run(self.filename, file_text))
+
+        results = list(self.uut.run(
+            self.filename, file_text,
+            dependency_results={PyFlakesASTBear.name: [result]}))
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].affected_code[0].start.line, 2)
+
+        self.check_removal(['\ufefffrom __future__ import division; x = 1\n'],
+                           ['\ufeffx = 1\n'], [1])
+        self.check_removal(['\ufefffrom __future__ import division\n',
+                            'x = 1\n'],
+                           ['\ufeff\n', 'x = 1\n'], [1])
+
+    def test_skipped_file(self):
+        file_text = ['from __future__ import division\n']
+        ast_bear = PyFlakesASTBear(Section('pyflakes-ast'), Queue())
+        skipped = AnalysisSkipped(self.filename, 'time', 'Too slow.')
+        with patch('pyflakes_bears.PyFlakesIsolation.analyse_isolated',
+                   side_effect=skipped):
+            result = next(ast_bear.run(self.filename, file_text,
+                                       pyflakes_time_limit=1))
+        self.assertIn('Too slow.', result.message)
+
+        results = list(self.uut.run(
+            self.filename, file_text,
+            dependency_results={PyFlakesASTBear.name: [result]}))
+        self.assertEqual(results, [])
+
+    def test_timing_file(self):
+        file_text = ['from __future__ import division\n',
+                     'x = 1\n']
+        ast_bear = PyFlakesASTBear(Section('pyflakes-ast'), Queue())
+        result = next(ast_bear.run(self.filename, file_text))
+
+        with tempfile.TemporaryDirectory() as directory:
+            timing_file = os.path.join(directory, 'timings.jsonl')
+            results = list(self.uut.run(
+                self.filename, file_text,
+                dependency_results={PyFlakesASTBear.name: [result]},
+                pyflakes_timing_file=timing_file))
+            with open(timing_file) as timings:
+                record = json.loads(timings.read())
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(record['bear'], 'NoFutureImportBear')
+        self.assertEqual(list(record['phases']), ['query', 'diffs'])
+
+    def test_consolidated_diff(self):
+        file_text = ['"""Docstring."""\n',
+                     'from __future__ import division\n',
+                     'from __future__ import generators; '
+                     'from __future__ import nested_scopes\n',
+                     'from __future__ import print_function, \\\n',
+                     '    absolute_import; x = 2\n',
+                     'y = 3\n']
+
+        diff = Diff(file_text)
+        diff.delete_lines(2, 4)
+        diff.modify_line(5, 'x = 2\n')
+
+        self.check_results(
+            self.uut,
+            file_text,
+            [Result(self.uut, 'Future import(s) found',
+                    affected_code=[
+                        SourceRange.from_values(self.filename, lineno)
+                        for lineno in (2, 3, 4)],
+                    diffs={self.filename: diff})],
+            filename=self.filename)
+
+    def test_long_backslash_chain(self):
+        file_text = (['from __future__ import division, \\\n'] +
+                     ['    division, \\\n'] * 5000 +
+                     ['    division\n', 'x = 1\n'])
+
+        diff, starts = self.uut.remove_future_imports(file_text)
+        self.assertEqual(starts, [1])
+        self.assertEqual(diff.modified, ['x = 1\n'])
+
+    def check_removal(self, file_text, expected, starts):
+        diff, removed_starts = self.uut.remove_future_imports(file_text)
+        self.assertEqual(diff.modified, expected)
+        self.assertEqual(removed_starts, starts)
+
+    def test_parenthesized_imports(self):
+        self.check_removal(['from __future__ import (division,\n',
+                            '                        generators)\n',
+                            'x = 1\n'],
+                           ['x = 1\n'], [1])
+        self.check_removal(['from __future__ import (division,  # a; b\n',
+                            '    generators); x = 2  # kept\n'],
+                           ['x = 2  # kept\n'], [1])
+
+    def test_comments(self):
+        self.check_removal(['# Header; comment\n',
+                            'from __future__ import division  # a; b\n',
+                            'x = 1\n'],
+                           ['# Header; comment\n', 'x = 1\n'], [2])
+        self.check_removal(['from __future__ import division;  # comment\n',
+                            'x = 1\n'],
+                           ['x = 1\n'], [1])
+
+    def test_docstring_on_same_line(self):
+        self.check_removal(['"""Docstring."""; '
+                            'from __future__ import division\n',
+                            'x = 1\n'],
+                           ['"""Docstring."""\n', 'x = 1\n'], [1])
+
+    def test_only_header_is_changed(self):
+        self.check_removal(['from __future__ import division\n',
+                            'import os\n',
+                            'from __future__ import generators\n'],
+                           ['import os\n',
+                            'from __future__ import generators\n'], [1])
+
+    def test_discovery_imports(self):
+        # Bear discovery imports the bear modules, which must not load
+        # pyflakes' checker or the machinery only needed to run them.
+        modules = get_imported_modules('pyflakes_bears.NoFutureImportBear')
+        self.assertIn('pyflakes_bears.PyFlakesASTBear', modules)
+        for module in ('pyflakes.checker', 'coalib.results.Diff', 'doctest',
+                       'cProfile', 'pickle',
+                       'pyflakes_bears.PyFlakesCache',
+                       'pyflakes_bears.PyFlakesProfiler'):
+            self.assertNotIn(module, modules)
@@ -0,0 +1,127 @@
+import ast
+import sys
+import unittest
+
+from pyflakes.checker import (
+    Checker, DoctestScope, FunctionScope, FutureImportation, Importation,
+    ModuleScope)
+from pyflakes_bears.PrunedChecker import (
+    PrunedChecker, get_handled_nodes, is_compound)
+
+
+class Block(ast.stmt):
+    """
+    A compound statement unknown to ``COMPOUND_NODES``.
+    """
+    _fields = ('body',)
+
+
+class PrunedCheckerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.source = ('"""Docstring."""\n'
+                       'from __future__ import division\n'
+                       'import os\n'
+                       'try:\n'
+                       '    import json\n'
+                       'except ImportError:\n'
+                       '    json = None\n'
+                       'def foo():\n'
+                       '    """\n'
+                       '    >>> import doctest_module\n'
+                       '    """\n'
+                       '    import re\n'
+                       '    return [os for _ in range(3)]\n')
+        self.tree = ast.parse(self.source)
+
+    def get_names(self, checker, scope_type, binding_type):
+        return sorted(name for scope in checker.deadScopes
+                      if type(scope) is scope_type
+                      for name, binding in scope.items()
+                      if isinstance(binding, binding_type))
+
+    def test_get_handled_nodes(self):
+        nodes = get_handled_nodes(['ModuleScope'], ['FutureImportation'])
+        self.assertIn('ImportFrom', nodes)
+        self.assertIn('If', nodes)
+        self.assertNotIn('Import', nodes)
+        self.assertNotIn('Name', nodes)
+        self.assertIsNone(get_handled_nodes(['GeneratorScope'], []))
+        self.assertIsNone(get_handled_nodes(['ModuleScope'], ['Assignment']))
+        with self.assertRaises(ValueError):
+            PrunedChecker(self.tree, bindings=['Assignment'])
+
+    def test_module_scope(self):
+        checker = PrunedChecker(self.tree, scopes=['ModuleScope'],
+                                bindings=['Importation'])
+        full = Checker(self.tree)
+        self.assertEqual(
+            self.get_names(checker, ModuleScope, FutureImportation),
+            self.get_names(full, ModuleScope, FutureImportation))
+        # The assignment rebinding json is skipped.
+        self.assertEqual(self.get_names(checker, ModuleScope, Importation),
+                         ['division', 'json', 'os'])
+        self.assertEqual(checker.messages, [])
+        self.assertEqual(
+            [type(scope) for scope in checker.deadScopes], [ModuleScope])
+
+    def test_function_scopes(self):
+        checker = PrunedChecker(self.tree,
+                                scopes=['ModuleScope', 'FunctionScope'],
+                                bindings=['Importation'])
+        self.assertEqual(self.get_names(checker, FunctionScope, Importation),
+                         ['re'])
+
+    def test_doctest_scopes(self):
+        checker = PrunedChecker(self.tree, withDoctest=True,
+                                scopes=['ModuleScope', 'DoctestScope'],
+                                bindings=['Importation'])
+        self.assertEqual(self.get_names(checker, DoctestScope, Importation),
+                         ['doctest_module'])
+        self.assertEqual(self.get_names(checker, FunctionScope, Importation),
+                         [])
+
+    def check_nested_imports(self, source):
+        tree = ast.parse(source)
+        checker = PrunedChecker(tree, scopes=['ModuleScope'],
+                                bindings=['Importation'])
+        self.assertEqual(self.get_names(checker, ModuleScope, Importation),
+                         ['os', 'sys'])
+        self.assertEqual(self.get_names(checker, ModuleScope, Importation),
+                         self.get_names(Checker(tree), ModuleScope,
+                                        Importation))
+
+    @unittest.skipIf(sys.version_info < (3, 10) or
+                     not hasattr(Checker, 'MATCH'),
+                     'match statements are not supported')
+    def test_match(self):
+        self.check_nested_imports('match x:\n'
+                                  '    case 1:\n'
+                                  '        import os\n'
+                                  '    case _:\n'
+                                  '        import sys\n')
+
+    @unittest.skipIf(sys.version_info < (3, 11) or
+                     not hasattr(Checker, 'TRYSTAR'),
+                     'except* is not supported')
+    def test_try_star(self):
+        self.check_nested_imports('try:\n'
+                                  '    import os\n'
+                                  'except* ValueError:\n'
+                                  '    import sys\n')
+
+    def test_unknown_compound_statement(self):
+        self.assertTrue(is_compound(Block))
+        self.assertFalse(is_compound(ast.IfExp))
+        self.assertFalse(is_compound(ast.Assign))
+
+        tree = ast.parse('import os\nimport sys\n')
+        tree.body = [ast.copy_location(Block(body=tree.body), tree.body[0])]
+
+        class BlockChecker(PrunedChecker):
+            BLOCK = Checker.handleChildren
+
+        checker = BlockChecker(tree, scopes=['ModuleScope'],
+                               bindings=['Importation'])
+        self.assertEqual(self.get_names(checker, ModuleScope, Importation),
+                         ['os', 'sys'])
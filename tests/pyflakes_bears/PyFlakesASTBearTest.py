@@ -1,13 +1,100 @@
+import ast
+import gc
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import tracemalloc
 import unittest
+import weakref
 from queue import Queue
+from unittest.mock import patch
 
-from pyflakes_bears.PyFlakesASTBear import PyFlakesASTBear
+from pyflakes_bears.NoFutureImportBear import NoFutureImportBear
+from pyflakes_bears.PyFlakesASTBear import (
+    PyFlakesASTBear, PyFlakesResult, declares_foreign_encoding,
+    get_chunk_ends, get_comprehension_scope, get_scope_categories,
+    parse_lines, parse_source)
+from coalib.bears.LocalBear import LocalBear
+from coalib.results.RESULT_SEVERITY import RESULT_SEVERITY
 from coalib.testing.LocalBearTestHelper import execute_bear
 from coalib.settings.Section import Section
+from coalib.settings.Setting import Setting
+from pyflakes.checker import Checker
 from pyflakes.checker import ClassScope, FunctionScope, ModuleScope
-from pyflakes.checker import GeneratorScope, DoctestScope
-from pyflakes.checker import Importation
-from pyflakes.messages import UnusedImport
+from pyflakes.checker import GeneratorScope, DoctestScope, Scope
+from pyflakes.checker import (
+    FunctionDefinition, FutureImportation, Importation)
+from pyflakes_bears.PyFlakesSnapshot import BindingSnapshot
+from pyflakes_generic_plugins.CheckerRegistry import checker_registry
+from pyflakes_generic_plugins.NoFutureImport import NoFutureImport
+from pyflakes.messages import UnusedImport, UnusedVariable
+
+
+class DoctestConsumerBear(LocalBear):
+    BEAR_DEPS = {PyFlakesASTBear}
+
+
+class ParseSourceTest(unittest.TestCase):
+
+    def get_string(self, tree):
+        return ast.literal_eval(tree.body[-1].value)
+
+    def test_lines(self):
+        tree = parse_source(['# ✓\n', 'x = "Grüße"\n'])
+        self.assertEqual(self.get_string(tree), 'Grüße')
+
+    def test_bytes(self):
+        tree = parse_source('# -*- coding: latin-1 -*-\n'
+                            'x = "Grüße"\n'.encode('latin-1'))
+        self.assertEqual(self.get_string(tree), 'Grüße')
+
+    def test_foreign_encoding(self):
+        lines = ['# -*- coding: latin-1 -*-\n', 'x = "Grüße"\n']
+        self.assertTrue(declares_foreign_encoding(''.join(lines)))
+        self.assertEqual(self.get_string(parse_source(lines)), 'Grüße')
+
+    def test_declares_foreign_encoding(self):
+        self.assertFalse(declares_foreign_encoding('x = 1'))
+        self.assertFalse(declares_foreign_encoding('# coding: utf8\n'))
+        self.assertTrue(declares_foreign_encoding('#!/bin/python\n'
+                                                  '# coding=ascii\n'))
+        self.assertTrue(declares_foreign_encoding('# coding: unknown\n'))
+        self.assertFalse(declares_foreign_encoding('\n\n# coding: ascii\n'))
+
+    def test_chunk_ends(self):
+        lines = ['if x:\n', '    pass\n', 'else:\n', '    pass\n',
+                 'y = (\n', ')\n', '# Comment\n', '\n', '@decorator\n',
+                 'def f():\n', '    pass\n']
+        self.assertEqual(get_chunk_ends(lines, 1), [4, 8, 9, 11])
+        self.assertEqual(get_chunk_ends(lines, 1000), [11])
+
+    def test_chunks(self):
+        lines = ['"""Docstring."""\n',
+                 '# -*- coding: latin-1 -*-\n',
+                 'x = """\n',
+                 'y = "Grüße"\n',
+                 '"""\n',
+                 'if x:\n',
+                 '    pass\n',
+                 'else:\n',
+                 '    y = (1,\n',
+                 '2)\n',
+                 '@decorator\n',
+                 'def f(): return 1\n']
+        tree = parse_lines(lines, chunk_size=1)
+        self.assertEqual(ast.dump(tree, include_attributes=True),
+                         ast.dump(ast.parse(''.join(lines)),
+                                  include_attributes=True))
+
+        for broken in (lines[:4] + lines[5:], lines[:8] + lines[9:]):
+            with self.assertRaises(SyntaxError) as context:
+                parse_lines(broken, chunk_size=1)
+            with self.assertRaises(SyntaxError) as expected:
+                ast.parse(''.join(broken))
+            self.assertEqual(context.exception.lineno,
+                             expected.exception.lineno)
 
 
 class PyFlakesASTBearTest(unittest.TestCase):
@@ -25,6 +112,30 @@ class PyFlakesASTBearTest(unittest.TestCase):
             self.assertIsNotNone(result[0].module_scope)
             self.assertIsInstance(result[0].module_scope, ModuleScope)
 
+    def test_module_scope_with_doctest(self):
+        file_text = ['import sys\n',
+                     'def foo():\n',
+                     '  \'\'\'\n',
+                     '      >>> m = 1\n',
+                     '  \'\'\'\n']
+
+        with execute_bear(self.uut, self.filename, file_text) as result:
+            self.assertIs(type(result[0].module_scope), ModuleScope)
+            self.assertIn('sys', result[0].module_scope)
+            self.assertEqual(len(result[0].doctest_scopes), 1)
+
+    def test_lazy_scope_partition(self):
+        file_text = ['class Foo():\n',
+                     '  pass\n']
+
+        with execute_bear(self.uut, self.filename, file_text) as result:
+            self.assertIsNone(result[0]._scope_partition)
+            self.assertEqual(len(result[0].class_scopes), 1)
+            partition = result[0]._scope_partition
+            self.assertIsNotNone(partition)
+            self.assertEqual(len(result[0].function_scopes), 0)
+            self.assertIs(result[0]._scope_partition, partition)
+
     def test_class_scopes(self):
         file_text = ['class Foo():\n',
                      '  pass\n',
@@ -59,6 +170,22 @@ class PyFlakesASTBearTest(unittest.TestCase):
             for scope in result[0].generator_scopes:
                 self.assertIsInstance(scope, GeneratorScope)
 
+    def test_comprehension_scopes(self):
+        file_text = ['[a for a in [1]]\n',
+                     '{a: a for a in [1]}\n',
+                     '(1 for a in [1])\n']
+
+        with execute_bear(self.uut, self.filename, file_text) as result:
+            self.assertEqual(len(result[0].generator_scopes), 3)
+            for scope in result[0].generator_scopes:
+                self.assertIsInstance(scope, get_comprehension_scope())
+
+        # Newer pyflakes versions derive GeneratorScope from it.
+        with patch('pyflakes.checker.ComprehensionScope', Scope,
+                   create=True):
+            self.assertIs(get_comprehension_scope(), Scope)
+            self.assertIs(get_scope_categories()[-1], Scope)
+
     def test_doctest_scopes(self):
         file_text = ['def foo():\n',
                      '  \'\'\'\n',
@@ -79,6 +206,45 @@ class PyFlakesASTBearTest(unittest.TestCase):
             for scope in result[0].doctest_scopes:
                 self.assertIsInstance(scope, DoctestScope)
 
+    def test_doctest_setting(self):
+        file_text = ['def foo():\n',
+                     '  \'\'\'\n',
+                     '      >>> m\n',
+                     '  \'\'\'\n']
+        self.section.append(Setting('pyflakes_doctest', 'false'))
+
+        with execute_bear(self.uut, self.filename, file_text) as result:
+            self.assertEqual(result[0].doctest_scopes, [])
+            self.assertEqual(result[0].pyflakes_messages, [])
+
+    def test_doctest_detection(self):
+        self.assertTrue(self.uut.needs_doctest())
+
+        self.section.append(Setting('bears', NoFutureImportBear.name))
+        self.assertEqual(self.uut.get_dependant_bears(),
+                         {NoFutureImportBear})
+        self.assertFalse(self.uut.needs_doctest())
+
+        self.section.append(Setting('bears', 'NoFutureImportBear, '
+                                             'DoctestConsumerBear'))
+        self.assertEqual(self.uut.get_dependant_bears(),
+                         {NoFutureImportBear, DoctestConsumerBear})
+        self.assertTrue(self.uut.needs_doctest())
+
+    def test_dependant_bears_cached(self):
+        self.section.append(Setting('bears', NoFutureImportBear.name))
+        bears = self.uut.get_dependant_bears()
+        with patch.object(LocalBear, '__subclasses__') as subclasses:
+            self.uut.needs_doctest()
+            self.uut.get_file_filters()
+            self.uut.get_requirements()
+            self.assertFalse(subclasses.called)
+        self.assertIs(self.uut.get_dependant_bears(), bears)
+
+        self.section.append(Setting('bears', 'DoctestConsumerBear'))
+        self.assertEqual(self.uut.get_dependant_bears(),
+                         {DoctestConsumerBear})
+
     def test_pyflakes_messages(self):
         file_text = ['import sys\n']
 
@@ -97,3 +263,277 @@ class PyFlakesASTBearTest(unittest.TestCase):
             self.assertEqual(len(import_nodes), 2)
             for node in import_nodes:
                 self.assertIsInstance(node, Importation)
+
+    def test_get_node(self):
+        file_text = ['import sys\n',
+                     'def foo():\n',
+                     '  pass\n']
+
+        with execute_bear(self.uut, self.filename, file_text) as result:
+            module_scope = result[0].module_scope
+            self.assertEqual(result[0].get_node(module_scope, 'sys').name,
+                             'sys')
+            self.assertIsInstance(
+                result[0].get_node(module_scope, 'foo', FunctionDefinition),
+                FunctionDefinition)
+            self.assertIsNone(
+                result[0].get_node(module_scope, 'foo', Importation))
+            self.assertIsNone(result[0].get_node(module_scope, 'bar'))
+
+    def test_queries(self):
+        file_text = ['import os\n',
+                     'import sys\n',
+                     'def foo(sys):\n',
+                     '  import re\n',
+                     '  x = 1\n',
+                     '  return sys\n']
+
+        with execute_bear(self.uut, self.filename, file_text) as result:
+            for uut in (result[0], result[0].snapshot()):
+                imports = uut.get_all_nodes(Importation)
+                self.assertEqual([node.name for _, node in imports],
+                                 ['re', 'os', 'sys'])
+                self.assertIs(imports[0][0], uut.function_scopes[0])
+                self.assertIs(uut.get_all_nodes(Importation), imports)
+
+                unused = uut.get_unused_nodes()
+                self.assertEqual(sorted(node.name for _, node in unused),
+                                 ['foo', 'os', 're', 'sys', 'x'])
+                self.assertEqual([node.name for _, node in
+                                  uut.get_unused_nodes(Importation)],
+                                 ['re', 'os', 'sys'])
+                self.assertIs(uut.get_unused_nodes(), unused)
+
+                bindings = uut.get_bindings('sys')
+                self.assertEqual([scope for scope, _ in bindings],
+                                 [uut.function_scopes[0], uut.module_scope])
+                self.assertEqual(uut.get_bindings('bar'), [])
+
+                messages = uut.get_messages(UnusedImport)
+                self.assertEqual(len(messages), 3)
+                self.assertIs(uut.get_messages(UnusedImport), messages)
+                self.assertEqual(uut.get_messages(UnusedVariable)[0]
+                                 .message_args, ('x',))
+
+    def test_cache(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.section.append(Setting('pyflakes_cache_directory', directory))
+        file_text = ['import sys\n',
+                     'def foo():\n',
+                     '  pass\n']
+
+        with execute_bear(self.uut, self.filename, file_text) as result:
+            self.assertEqual(len(result[0].function_scopes), 1)
+        with execute_bear(self.uut, self.filename, file_text) as result:
+            self.assertEqual(len(result[0].function_scopes), 1)
+            self.assertIsInstance(result[0].pyflakes_messages[0],
+                                  UnusedImport)
+            import_nodes = list(result[0].get_nodes(result[0].module_scope,
+                                                    Importation))
+            self.assertIsInstance(import_nodes[0], BindingSnapshot)
+            self.assertEqual(import_nodes[0].source.lineno, 1)
+
+        self.assertEqual(self.uut._cache.misses, 1)
+        self.assertEqual(self.uut._cache.hits, 1)
+
+    def test_snapshot(self):
+        file_text = ['import sys\n',
+                     'class Foo():\n',
+                     '  def bar(self):\n',
+                     '    return [sys for _ in range(3)]\n']
+
+        with execute_bear(self.uut, self.filename, file_text) as result:
+            snapshot = pickle.loads(pickle.dumps(result[0].snapshot()))
+
+            self.assertEqual(snapshot.origin, result[0].origin)
+            self.assertIsInstance(snapshot.module_scope, ModuleScope)
+            self.assertEqual(len(snapshot.class_scopes), 1)
+            self.assertEqual(len(snapshot.function_scopes), 1)
+            self.assertEqual(len(snapshot.generator_scopes), 1)
+            self.assertIsInstance(snapshot.generator_scopes[0],
+                                  get_comprehension_scope())
+            import_nodes = list(snapshot.get_nodes(snapshot.module_scope,
+                                                   Importation))
+            self.assertEqual(len(import_nodes), 1)
+            self.assertEqual(import_nodes[0].name, 'sys')
+            self.assertTrue(import_nodes[0].used)
+
+    def test_shared_checker(self):
+        file = ['import os\n', 'os.getcwd()\n']
+        filename = 'shared_checker.py'
+        checker = Checker(ast.parse(''.join(file)), filename,
+                          withDoctest=True)
+        checker_registry.register(filename, checker, source=file)
+        self.section.append(Setting('pyflakes_doctest', 'True'))
+
+        with patch('pyflakes.checker.Checker') as mock:
+            with execute_bear(self.uut, filename, file) as results:
+                self.assertFalse(mock.called)
+                self.assertEqual(results[0].dead_scopes, checker.deadScopes)
+
+    def test_checker_shared_with_plugin(self):
+        file = ['from __future__ import division\n', 'x = 1\n']
+        self.section.append(Setting('pyflakes_doctest', 'False'))
+        self.addCleanup(checker_registry.clear)
+
+        for order in ('bear first', 'plugin first'):
+            checker_registry.clear()
+            NoFutureImport.results_cache.clear()
+            filename = 'plugin_{}.py'.format(order.split()[0])
+            plugin = NoFutureImport(ast.parse(''.join(file)), filename, file)
+            with patch.object(Checker, '__init__', autospec=True,
+                              side_effect=Checker.__init__) as mock:
+                if order == 'plugin first':
+                    self.assertEqual(len(list(plugin.run())), 1)
+                with execute_bear(self.uut, filename, file) as results:
+                    self.assertIn('division', results[0].module_scope)
+                if order == 'bear first':
+                    self.assertEqual(len(list(plugin.run())), 1)
+                self.assertEqual(mock.call_count, 1, order)
+
+    def test_timing_file(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        timing_file = os.path.join(directory, 'timings.jsonl')
+        self.section.append(Setting('pyflakes_timing_file', timing_file))
+        self.section.append(Setting('pyflakes_doctest', 'True'))
+        file = ['def foo():\n',
+                '    """\n',
+                '    >>> foo()\n',
+                '    """\n']
+
+        with execute_bear(self.uut, 'timed.py', file) as results:
+            self.assertEqual(len(results[0].doctest_scopes), 1)
+
+        with open(timing_file) as timings:
+            record = json.loads(timings.read())
+        self.assertEqual(record['bear'], 'PyFlakesASTBear')
+        self.assertEqual(record['file'], 'timed.py')
+        self.assertEqual(set(record['phases']),
+                         {'parse', 'checker', 'doctest', 'result'})
+
+    def test_file_filters(self):
+        self.assertIsNone(self.uut.get_file_filters())
+        self.section.append(Setting('bears', NoFutureImportBear.name))
+        self.assertEqual(len(self.uut.get_file_filters()), 1)
+
+        with execute_bear(self.uut, self.filename,
+                          ['import sys\n']) as results:
+            self.assertEqual(results, [])
+        with execute_bear(self.uut, self.filename,
+                          ['from __future__ import division\n']) as results:
+            self.assertEqual(len(results), 1)
+
+        self.section.append(Setting('bears', 'NoFutureImportBear, '
+                                             'DoctestConsumerBear'))
+        self.assertIsNone(self.uut.get_file_filters())
+
+    def test_requirements(self):
+        self.assertIsNone(self.uut.get_requirements())
+        self.section.append(Setting('bears', NoFutureImportBear.name))
+        self.assertEqual(self.uut.get_requirements(),
+                         (('ModuleScope',), ('FutureImportation',)))
+
+        file_text = ['from __future__ import division\n',
+                     'import os\n',
+                     'def foo():\n',
+                     '    import re\n']
+        filename = 'requirements.py'
+        with execute_bear(self.uut, filename, file_text) as results:
+            self.assertEqual(results[0].pyflakes_messages, [])
+            self.assertEqual(results[0].function_scopes, [])
+            self.assertEqual(
+                [node.name for node in results[0].get_nodes(
+                    results[0].module_scope, FutureImportation)],
+                ['division'])
+        self.assertIsNone(checker_registry.get(filename, source=file_text))
+
+        self.section.append(Setting('pyflakes_prune', 'False'))
+        with execute_bear(self.uut, filename, file_text) as results:
+            self.assertEqual(len(results[0].pyflakes_messages), 2)
+            self.assertEqual(len(results[0].function_scopes), 1)
+
+        self.section.append(Setting('pyflakes_prune', 'True'))
+        self.section.append(Setting('bears', 'NoFutureImportBear, '
+                                             'DoctestConsumerBear'))
+        self.assertIsNone(self.uut.get_requirements())
+
+    def test_snapshot_setting(self):
+        self.section.append(Setting('pyflakes_snapshot', 'True'))
+        file_text = ['import os\n',
+                     'def foo():\n',
+                     '    return os\n']
+        trees = []
+        original_parse_source = parse_source
+
+        def parse(*args):
+            tree = original_parse_source(*args)
+            trees.append(weakref.ref(tree))
+            return tree
+
+        with patch('pyflakes_bears.PyFlakesASTBear.parse_source', parse):
+            with execute_bear(self.uut, 'snapshot.py', file_text) as result:
+                node = result[0].module_scope['os']
+                self.assertIsInstance(node, BindingSnapshot)
+                self.assertEqual((node.source.lineno, node.source.col_offset),
+                                 (1, 0))
+                self.assertTrue(node.used)
+                checker_registry.clear()
+                gc.collect()
+                self.assertIsNone(trees[0]())
+
+    def test_snapshot_memory(self):
+        file_text = ['import os\n',
+                     'class Foo(object):\n',
+                     '    def bar(self, value):\n',
+                     '        return [os.path.join(value, x) for x in os]\n']
+
+        def retained(snapshot):
+            results = []
+            gc.collect()
+            tracemalloc.start()
+            for index in range(200):
+                results.extend(self.uut.run('memory_{}.py'.format(index),
+                                            file_text,
+                                            pyflakes_doctest=False,
+                                            pyflakes_snapshot=snapshot))
+            checker_registry.clear()
+            gc.collect()
+            size = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            return size
+
+        self.assertLess(retained(True) * 3, retained(False))
+
+    def test_limits(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        report_file = os.path.join(directory, 'skipped.jsonl')
+        self.section.append(Setting('pyflakes_time_limit', '60'))
+        self.section.append(Setting('pyflakes_skip_report', report_file))
+        file_text = ['import os\n']
+
+        with execute_bear(self.uut, 'limits.py', file_text) as results:
+            self.assertIsInstance(results[0].module_scope['os'],
+                                  BindingSnapshot)
+            self.assertEqual(len(results[0].pyflakes_messages), 1)
+        self.assertIsNone(checker_registry.get('limits.py',
+                                               source=file_text))
+
+        self.section.append(Setting('pyflakes_time_limit', '0.01'))
+        file_text = ['def f{0}(x):\n    return [x for _ in x]\n'.format(
+            index) for index in range(20000)]
+        with execute_bear(self.uut, 'limits.py', file_text) as results:
+            self.assertNotIsInstance(results[0], PyFlakesResult)
+            self.assertEqual(results[0].severity, RESULT_SEVERITY.INFO)
+            self.assertEqual(results[0].message,
+                             'Skipped the pyflakes analysis: The analysis '
+                             'took longer than 0.01 seconds.')
+            self.assertEqual(results[0].affected_code[0].file,
+                             os.path.abspath('limits.py'))
+
+        with open(report_file) as report:
+            record = json.loads(report.read())
+        self.assertEqual(record['file'], 'limits.py')
+        self.assertEqual(record['reason'], 'time')
@@ -0,0 +1,153 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from pyflakes_bears import PyFlakesAsync
+from pyflakes_bears.PyFlakesAsync import (
+    AsyncAnalyser, BrokenExecutor, analyse)
+from pyflakes_bears.PyFlakesASTBear import PyFlakesResult
+from pyflakes_bears.PyFlakesSnapshot import BindingSnapshot
+from tests.TestHelper import write_file
+
+
+def crash(*args):
+    os._exit(3)
+
+
+class PyFlakesAsyncTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.addCleanup(asyncio.set_event_loop, None)
+        self.addCleanup(self.loop.close)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def run_coroutine(self, coroutine):
+        return self.loop.run_until_complete(coroutine)
+
+    def get_messages(self, result):
+        return [message.message_args for message in result.pyflakes_messages]
+
+    async def collect(self, iterator, delay=0):
+        results = []
+        async for item in iterator:
+            results.append(item)
+            await asyncio.sleep(delay)
+        return results
+
+    def test_analyse(self):
+        result = self.run_coroutine(analyse('test.py', ['import os\n']))
+        self.assertIsInstance(result, PyFlakesResult)
+        self.assertEqual(self.get_messages(result), [('os',)])
+        self.assertIn('os', result.module_scope)
+
+        filename = write_file(self.directory, 'test.py', 'import sys\n')
+        result = self.run_coroutine(analyse(filename))
+        self.assertEqual(self.get_messages(result), [('sys',)])
+
+        with self.assertRaises(SyntaxError):
+            self.run_coroutine(analyse('test.py', 'def f(:\n'))
+
+    def test_analyse_many(self):
+        files = [write_file(self.directory, 'a.py', 'import os\n'),
+                 write_file(self.directory, 'b.py', 'def f(:\n'),
+                 os.path.join(self.directory, 'missing.py'),
+                 ('c.py', ['import re\n', 're\n'])]
+
+        async def run():
+            async with AsyncAnalyser(max_concurrency=2) as analyser:
+                return await self.collect(analyser.analyse_many(files))
+
+        results = self.run_coroutine(run())
+        self.assertEqual([filename for filename, _ in results],
+                         files[:3] + ['c.py'])
+        self.assertEqual(self.get_messages(results[0][1]), [('os',)])
+        self.assertIsNone(results[1][1])
+        self.assertIsNone(results[2][1])
+        self.assertEqual(self.get_messages(results[3][1]), [])
+
+    def test_bounded_concurrency(self):
+        lock = threading.Lock()
+        running = [0]
+        calls = []
+        check_source = PyFlakesAsync.check_source
+
+        def slow_check_source(filename, *args):
+            with lock:
+                running[0] += 1
+                calls.append((filename, running[0]))
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+            return check_source(filename, *args)
+
+        files = [('{}.py'.format(index), '') for index in range(12)]
+        analyser = AsyncAnalyser(max_concurrency=2)
+        self.addCleanup(analyser.close)
+        with patch.object(PyFlakesAsync, 'check_source', slow_check_source):
+            self.run_coroutine(asyncio.gather(*[
+                analyser.analyse(filename, source)
+                for filename, source in files]))
+            self.assertEqual(len(calls), 12)
+            self.assertLessEqual(max(count for _, count in calls), 2)
+
+            # A slow consumer keeps files from being scheduled far ahead.
+            del calls[:]
+            iterator = analyser.analyse_many(files, max_pending=3)
+            results = self.run_coroutine(self.collect(iterator, 0.02))
+        self.assertEqual(len(results), 12)
+        self.assertEqual(len(calls), 12)
+
+        iterator = analyser.analyse_many(files, max_pending=3)
+        self.run_coroutine(iterator.__anext__())
+        self.assertEqual(len(iterator.pending), 2)
+        iterator.cancel()
+        self.assertEqual(len(iterator.pending), 0)
+
+    def test_event_loop_not_blocked(self):
+        source = ''.join('def f{0}(x):\n    return [x for _ in x]\n'.format(
+            index) for index in range(2000))
+        ticks = []
+
+        async def tick():
+            while True:
+                ticks.append(None)
+                await asyncio.sleep(0)
+
+        async def run():
+            ticker = asyncio.ensure_future(tick())
+            try:
+                return await analyse('large.py', source)
+            finally:
+                ticker.cancel()
+
+        self.run_coroutine(run())
+        self.assertGreater(len(ticks), 1)
+
+    def test_processes(self):
+        async def run():
+            async with AsyncAnalyser(processes=1) as analyser:
+                return await analyser.analyse('test.py', 'import os\n')
+
+        result = self.run_coroutine(run())
+        self.assertIsInstance(result.module_scope['os'], BindingSnapshot)
+        self.assertEqual(self.get_messages(result), [('os',)])
+
+    def test_broken_executor(self):
+        files = [write_file(self.directory, 'a.py', 'import os\n'),
+                 write_file(self.directory, 'b.py', 'import sys\n')]
+
+        async def run():
+            async with AsyncAnalyser(processes=1) as analyser:
+                return await self.collect(analyser.analyse_many(files))
+
+        with patch.object(PyFlakesAsync, 'check_source', crash):
+            with self.assertRaises(BrokenExecutor):
+                self.run_coroutine(run())
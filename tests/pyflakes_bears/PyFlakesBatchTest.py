@@ -0,0 +1,74 @@
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from pyflakes_bears.PyFlakesBatch import (
+    analyse_file, analyse_files, get_chunksize, main)
+from pyflakes.checker import FunctionScope, Importation, ModuleScope
+from pyflakes.messages import UnusedImport
+from tests.TestHelper import write_file
+
+
+class PyFlakesBatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.filenames = [write_file(self.directory, 'file{}.py'.format(i),
+                                     'import mod{}\n'.format(i))
+                          for i in range(6)]
+
+    def check_results(self, results):
+        self.assertEqual(len(results), len(self.filenames))
+        for i, result in enumerate(results):
+            self.assertIsInstance(result.module_scope, ModuleScope)
+            nodes = list(result.get_nodes(result.module_scope, Importation))
+            self.assertEqual([node.name for node in nodes],
+                             ['mod{}'.format(i)])
+            self.assertIsInstance(result.pyflakes_messages[0], UnusedImport)
+
+    def test_analyse_file(self):
+        filename = write_file(self.directory, 'function.py',
+                              'def foo():\n  pass\n')
+        scopes, messages = analyse_file(filename)
+
+        self.assertEqual([type(scope) for scope in scopes],
+                         [FunctionScope, ModuleScope])
+        self.assertEqual(messages, [])
+
+    def test_analyse_file_errors(self):
+        self.assertIsNone(analyse_file(write_file(self.directory, 'bad.py',
+                                                  'def (:\n')))
+        self.assertIsNone(analyse_file(os.path.join(self.directory, 'no')))
+
+    def test_analyse_files_serial(self):
+        self.check_results(analyse_files(self.filenames, processes=1))
+
+    def test_analyse_files_parallel(self):
+        self.check_results(analyse_files(self.filenames, processes=2,
+                                         chunksize=2))
+
+    def test_analyse_files_invalid(self):
+        filenames = [self.filenames[0],
+                     write_file(self.directory, 'bad.py', 'def (:\n')]
+        results = analyse_files(filenames, processes=2)
+
+        self.assertIsNotNone(results[0])
+        self.assertIsNone(results[1])
+
+    def test_get_chunksize(self):
+        self.assertEqual(get_chunksize(1, 4), 1)
+        self.assertEqual(get_chunksize(16, 4), 1)
+        self.assertEqual(get_chunksize(17, 4), 2)
+        self.assertEqual(get_chunksize(40000, 32), 313)
+
+    def test_main(self):
+        output = StringIO()
+        with redirect_stdout(output):
+            exit_code = main(['--processes', '1', self.filenames[0]])
+
+        self.assertEqual(exit_code, 1)
+        self.assertIn("'mod0' imported but unused", output.getvalue())
@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from pyflakes_bears.PyFlakesCache import PyFlakesCache
+
+
+class PyFlakesCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.uut = PyFlakesCache(self.directory, max_entries=10)
+        self.filename = 'PyFlakesCacheTemp'
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_get_key(self):
+        file = ['import sys\n']
+        key = self.uut.get_key(self.filename, file, True)
+
+        self.assertEqual(key, self.uut.get_key(self.filename, file, True))
+        self.assertNotEqual(key,
+                            self.uut.get_key(self.filename, file, False))
+        self.assertNotEqual(key,
+                            self.uut.get_key(self.filename, ['import os\n'],
+                                             True))
+        self.assertNotEqual(key, self.uut.get_key('other', file, True))
+
+    def test_hits_and_misses(self):
+        key = self.uut.get_key(self.filename, ['x = 1\n'], True)
+
+        self.assertIsNone(self.uut.get(key))
+        self.uut.set(key, ([1, 2], 'value'))
+        self.assertEqual(self.uut.get(key), ([1, 2], 'value'))
+        self.assertEqual(self.uut.hits, 1)
+        self.assertEqual(self.uut.misses, 1)
+
+    def test_persistence(self):
+        key = self.uut.get_key(self.filename, ['x = 1\n'], True)
+        self.uut.set(key, 'value')
+
+        other = PyFlakesCache(self.directory)
+        self.assertEqual(other.get(key), 'value')
+
+    def test_corrupt_entry(self):
+        key = self.uut.get_key(self.filename, ['x = 1\n'], True)
+        with open(os.path.join(self.directory, key + '.pickle'), 'wb') as f:
+            f.write(b'garbage')
+
+        self.assertIsNone(self.uut.get(key))
+        self.assertEqual(self.uut.misses, 1)
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_unpicklable_value(self):
+        key = self.uut.get_key(self.filename, ['x = 1\n'], True)
+        self.uut.set(key, lambda: None)
+
+        self.assertIsNone(self.uut.get(key))
+
+    def test_lru_eviction(self):
+        keys = [self.uut.get_key(self.filename, [str(i)], True)
+                for i in range(11)]
+        for age, key in enumerate(keys[:10]):
+            self.uut.set(key, age)
+            path = os.path.join(self.directory, key + '.pickle')
+            os.utime(path, (age, age))
+
+        # Reading the oldest entry makes it the most recently used one.
+        self.assertEqual(self.uut.get(keys[0]), 0)
+        self.uut.set(keys[10], 10)
+
+        remaining = set(os.listdir(self.directory))
+        self.assertEqual(len(remaining), 9)
+        self.assertIn(keys[0] + '.pickle', remaining)
+        self.assertIn(keys[10] + '.pickle', remaining)
+        self.assertNotIn(keys[1] + '.pickle', remaining)
+        self.assertNotIn(keys[2] + '.pickle', remaining)
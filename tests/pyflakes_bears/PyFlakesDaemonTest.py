@@ -0,0 +1,197 @@
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest.mock import patch
+
+from pyflakes_bears.PyFlakesBatch import analyse_files
+from pyflakes_bears.PyFlakesDaemon import (
+    AnalysisDaemon, FileWatcher, main, query, serve)
+from tests.TestHelper import get_imported_modules, write_file
+
+
+class PyFlakesDaemonTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        os.mkdir(os.path.join(self.directory, '.git'))
+        write_file(self.directory, '.git/hook.py', 'import os\n')
+        self.first = write_file(self.directory, 'first.py', 'import os\n')
+        self.second = write_file(self.directory, 'second.py',
+                                 'import sys\nsys.exit()\n')
+
+    def test_file_watcher(self):
+        watcher = FileWatcher(self.directory)
+        changed, removed = watcher.poll()
+        self.assertEqual(sorted(changed), [self.first, self.second])
+        self.assertEqual(removed, [])
+        self.assertEqual(watcher.poll(), ([], []))
+
+        write_file(self.directory, 'first.py', 'import sys\n')
+        os.remove(self.second)
+        third = write_file(self.directory, 'third.py', '')
+        changed, removed = watcher.poll()
+        self.assertEqual(sorted(changed), [self.first, third])
+        self.assertEqual(removed, [self.second])
+
+        write_file(self.directory, 'first.py', 'import os\n')
+        self.assertEqual(watcher.check([self.first, self.second]),
+                         ([self.first], []))
+        os.remove(third)
+        self.assertEqual(watcher.check([third]), ([], [third]))
+
+    def test_analysis_daemon(self):
+        daemon = AnalysisDaemon(self.directory, processes=1)
+        daemon.update()
+        self.assertEqual(daemon.analyses, 2)
+
+        messages = daemon.get_messages([self.first, self.second])
+        self.assertEqual(messages[self.second], [])
+        self.assertEqual(len(messages[self.first]), 1)
+        message = messages[self.first][0]
+        self.assertEqual(message['type'], 'UnusedImport')
+        self.assertEqual(message['line'], 1)
+        self.assertIn("'os' imported but unused", message['text'])
+        self.assertEqual(daemon.analyses, 2)
+
+        # Queried files are re-analysed before answering, without waiting
+        # for the next poll.
+        write_file(self.directory, 'first.py', 'import os\nos.sep\n')
+        self.assertEqual(daemon.get_messages([self.first]),
+                         {self.first: []})
+        self.assertEqual(daemon.analyses, 3)
+        daemon.update()
+        self.assertEqual(daemon.analyses, 3)
+
+        write_file(self.directory, 'second.py', 'def f(:\n')
+        daemon.update()
+        self.assertEqual(daemon.analyses, 4)
+        self.assertEqual(daemon.get_messages([self.second]),
+                         {self.second: None})
+
+        os.remove(self.first)
+        daemon.update()
+        self.assertEqual(daemon.handle({'command': 'status'})['files'], 1)
+        self.assertIn('error', daemon.handle({'command': 'unknown'}))
+
+    def test_outside_root(self):
+        daemon = AnalysisDaemon(os.path.join(self.directory, '.git'),
+                                processes=1)
+        for path in (self.first, 'first.py',
+                     os.path.join(self.directory, '.git', '..', 'first.py'),
+                     os.path.join(self.directory, '.gitignored', 'a.py')):
+            response = daemon.handle({'command': 'messages',
+                                      'files': [path]})
+            self.assertIn('outside', response['error'])
+        self.assertEqual(daemon.analyses, 0)
+
+        hook = os.path.join(self.directory, '.git', 'hook.py')
+        response = daemon.handle({'command': 'messages', 'files': [hook]})
+        self.assertEqual(len(response['files'][hook]), 1)
+
+    def test_pool_is_reused(self):
+        daemon = AnalysisDaemon(self.directory, processes=2)
+        self.addCleanup(daemon.close)
+        pool = daemon.get_pool()
+        self.assertIs(daemon.get_pool(), pool)
+        daemon.update()
+        write_file(self.directory, 'first.py', 'import sys\n')
+        write_file(self.directory, 'second.py', 'import os\n')
+        daemon.update()
+        self.assertIs(daemon.pool, pool)
+        self.assertEqual(daemon.analyses, 4)
+
+        daemon.close()
+        self.assertIsNone(daemon.pool)
+        self.assertIsNone(AnalysisDaemon(self.directory,
+                                         processes=1).get_pool())
+
+    def test_analysis_outside_lock(self):
+        daemon = AnalysisDaemon(self.directory, processes=1)
+        daemon.update()
+        started = threading.Event()
+        release = threading.Event()
+
+        def blocked(*args, **kwargs):
+            started.set()
+            release.wait(10)
+            return analyse_files(*args, **kwargs)
+
+        write_file(self.directory, 'first.py', 'import sys\n')
+        with patch('pyflakes_bears.PyFlakesBatch.analyse_files', blocked):
+            poll = threading.Thread(target=daemon.update)
+            poll.start()
+            self.assertTrue(started.wait(10))
+            # Other files and the status are answered during the analysis.
+            self.assertEqual(daemon.handle({'command': 'status'})['analyses'],
+                             2)
+            self.assertEqual(daemon.get_messages([self.second]),
+                             {self.second: []})
+            # The file being analysed waits for the new result.
+            query = threading.Thread(target=daemon.get_messages,
+                                     args=([self.first],))
+            query.start()
+            query.join(0.1)
+            self.assertTrue(query.is_alive())
+            release.set()
+            poll.join(10)
+            query.join(10)
+        messages = daemon.get_messages([self.first])[self.first]
+        self.assertIn("'sys' imported but unused", messages[0]['text'])
+        self.assertEqual(daemon.analyses, 3)
+
+    def test_client_is_light(self):
+        modules = get_imported_modules('pyflakes_bears.PyFlakesDaemon',
+                                       baseline='os')
+        self.assertIn('pyflakes_bears.PyFlakesDaemon', modules)
+        for module in ('pyflakes.checker', 'multiprocessing',
+                       'pyflakes_bears.PyFlakesBatch'):
+            self.assertNotIn(module, modules)
+
+    def test_no_unix_sockets(self):
+        socket_path = os.path.join(self.directory, 'daemon.sock')
+        with patch('pyflakes_bears.PyFlakesDaemon.socket', object()):
+            with self.assertRaisesRegex(OSError, 'Unix sockets'):
+                serve(self.directory, socket_path)
+            with self.assertRaisesRegex(OSError, 'Unix sockets'):
+                query(socket_path, {'command': 'status'})
+        self.assertFalse(os.path.exists(socket_path))
+
+    @unittest.skipUnless(hasattr(socket, 'AF_UNIX'),
+                         'Unix sockets are not supported')
+    def test_serve(self):
+        socket_path = os.path.join(self.directory, 'daemon.sock')
+        ready = threading.Event()
+        server = threading.Thread(
+            target=serve, args=(self.directory, socket_path),
+            kwargs={'interval': 0.05, 'processes': 1, 'ready': ready})
+        server.start()
+        self.assertTrue(ready.wait(10))
+
+        status = query(socket_path, {'command': 'status'}, timeout=10)
+        self.assertEqual(status['files'], 2)
+        self.assertEqual(status['analyses'], 2)
+
+        with redirect_stdout(StringIO()) as output:
+            self.assertEqual(main(['--socket', socket_path, 'check',
+                                   self.first, self.second]), 1)
+        self.assertIn("'os' imported but unused", output.getvalue())
+        with redirect_stdout(StringIO()) as output:
+            self.assertEqual(main(['--socket', socket_path, 'check',
+                                   os.devnull]), 1)
+        self.assertIn('outside', output.getvalue())
+        with redirect_stdout(StringIO()) as output:
+            self.assertEqual(main(['--socket', socket_path, 'check',
+                                   self.second]), 0)
+        self.assertEqual(output.getvalue(), '')
+
+        with redirect_stdout(StringIO()):
+            main(['--socket', socket_path, 'shutdown'])
+        server.join(10)
+        self.assertFalse(server.is_alive())
+        self.assertFalse(os.path.exists(socket_path))
@@ -0,0 +1,112 @@
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from pyflakes_bears.PyFlakesBatch import analyse_files
+from pyflakes_bears.PyFlakesGit import (
+    analyse_repository, get_blob_id, get_blob_ids, get_changed_files,
+    get_python_files, main)
+from tests.TestHelper import write_file
+
+
+@unittest.skipIf(shutil.which('git') is None, 'git is not installed')
+class PyFlakesGitTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = os.path.realpath(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.cache_directory = os.path.join(self.directory, 'cache')
+        self.root = os.path.join(self.directory, 'repository')
+        os.mkdir(self.root)
+        self.git('init', '-q')
+        self.git('config', 'user.email', 'test@example.com')
+        self.git('config', 'user.name', 'Test')
+        write_file(self.root, '.gitignore', 'ignored.py\n')
+        write_file(self.root, 'unchanged.py', 'import os\n')
+        write_file(self.root, 'package/changed.py', 'import sys\nsys.exit()\n')
+        write_file(self.root, 'README', 'Not Python.\n')
+        self.git('add', '.')
+        self.git('commit', '-q', '-m', 'Initial commit')
+
+        cwd = os.getcwd()
+        os.chdir(self.root)
+        self.addCleanup(os.chdir, cwd)
+
+    def git(self, *args):
+        subprocess.check_call(('git', '-C', self.root) + args)
+
+    def get_messages(self, results):
+        return [[str(message) for message in result.pyflakes_messages]
+                for result in results]
+
+    def test_git_queries(self):
+        write_file(self.root, 'package/changed.py', 'import re\n')
+        write_file(self.root, 'new.py', '')
+        write_file(self.root, 'ignored.py', '')
+        self.assertEqual(get_python_files(self.root),
+                         ['new.py', 'package/changed.py', 'unchanged.py'])
+        self.assertEqual(get_changed_files(self.root, 'HEAD'),
+                         {'new.py', 'package/changed.py'})
+        blob_ids = get_blob_ids(self.root, 'HEAD')
+        self.assertEqual(set(blob_ids), {'.gitignore', 'README',
+                                         'unchanged.py',
+                                         'package/changed.py'})
+        self.assertEqual(blob_ids['unchanged.py'],
+                         get_blob_id(b'import os\n'))
+
+    def test_analyse_repository(self):
+        filenames, results, analysed = analyse_repository(
+            base='HEAD', cache_directory=self.cache_directory)
+        self.assertEqual(filenames, ['package/changed.py', 'unchanged.py'])
+        self.assertEqual(analysed, filenames)
+
+        write_file(self.root, 'package/changed.py', 'import re\n')
+        write_file(self.root, 'new.py', 'def f(:\n')
+        filenames, results, analysed = analyse_repository(
+            base='HEAD', cache_directory=self.cache_directory)
+        self.assertEqual(analysed, ['new.py', 'package/changed.py'])
+        self.assertIsNone(results[0])
+        full = analyse_files(filenames, processes=1)
+        self.assertEqual(self.get_messages(results[1:]),
+                         self.get_messages(full[1:]))
+
+        # Committing the changes does not invalidate their results.
+        self.git('add', 'package/changed.py')
+        self.git('commit', '-q', '-m', 'Change')
+        filenames, results, analysed = analyse_repository(
+            base='HEAD', cache_directory=self.cache_directory)
+        self.assertEqual(analysed, ['new.py'])
+
+        _, results, analysed = analyse_repository(
+            cache_directory=self.cache_directory)
+        self.assertEqual(analysed, ['new.py'])
+        self.assertEqual(self.get_messages(results[1:]),
+                         self.get_messages(full[1:]))
+
+    def test_working_directory(self):
+        analyse_repository(base='HEAD', cache_directory=self.cache_directory)
+        os.chdir('package')
+        filenames, results, analysed = analyse_repository(
+            base='HEAD', cache_directory=self.cache_directory)
+        self.assertEqual(filenames, ['changed.py', '../unchanged.py'])
+        self.assertEqual(analysed, [])
+        self.assertEqual([message.filename
+                          for message in results[1].pyflakes_messages],
+                         ['../unchanged.py'])
+
+    def test_main(self):
+        with redirect_stdout(StringIO()) as output:
+            self.assertEqual(main(['--base', 'HEAD', '--processes', '1']), 1)
+        result = analyse_files(['unchanged.py'], processes=1)[0]
+        self.assertEqual(output.getvalue(),
+                         ''.join(str(message) + '\n'
+                                 for message in result.pyflakes_messages))
+        self.assertEqual([(message.lineno, message.message_args)
+                          for message in result.pyflakes_messages],
+                         [(1, ('os',))])
+        self.assertTrue(os.listdir(os.path.join(self.root, '.git',
+                                                'pyflakes-cache')))
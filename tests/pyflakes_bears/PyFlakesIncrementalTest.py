@@ -0,0 +1,142 @@
+import ast
+import unittest
+from queue import Queue
+from unittest.mock import patch
+
+from pyflakes_bears.PyFlakesASTBear import PyFlakesASTBear
+from pyflakes_bears.PyFlakesIncremental import (
+    changes_code, get_changed_lines, match_statements, reanalyse)
+from coalib.results.Diff import Diff
+from coalib.settings.Section import Section
+from pyflakes.checker import Checker, FunctionDefinition, Importation
+from pyflakes.messages import RedefinedWhileUnused, UnusedImport
+
+
+class PyFlakesIncrementalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.uut = PyFlakesASTBear(Section('pyflakes-ast'), Queue())
+        self.filename = 'PyFlakesIncrementalTemp'
+        self.file = ['import os\n',
+                     'import sys\n',
+                     '\n',
+                     'def foo():\n',
+                     '    return sys.path\n',
+                     '\n',
+                     'def bar():\n',
+                     '    """\n',
+                     '    >>> bar()\n',
+                     '    """\n',
+                     '    import os\n']
+
+    def analyse(self, file):
+        return next(self.uut.run(self.filename, file))
+
+    def check_equivalent(self, result, expected):
+        self.assertEqual([type(scope) for scope in result.dead_scopes],
+                         [type(scope) for scope in expected.dead_scopes])
+        for scope, expected_scope in zip(result.dead_scopes,
+                                         expected.snapshot().dead_scopes):
+            self.assertEqual(dict(scope), dict(expected_scope))
+        self.assertEqual([str(message)
+                          for message in result.pyflakes_messages],
+                         [str(message)
+                          for message in expected.pyflakes_messages])
+
+    def test_match_statements(self):
+        new_file = (self.file[:4] + ['    return os.path\n'] +
+                    self.file[5:6] + self.file[10:])
+        old_tree = ast.parse(''.join(self.file))
+        new_tree = ast.parse(''.join(new_file))
+
+        changed, removed, _ = match_statements(old_tree, new_tree,
+                                               self.file, new_file)
+        self.assertEqual([statement.name for statement in changed], ['foo'])
+        self.assertEqual(removed, 1)
+
+        changed, removed, position_map = match_statements(
+            old_tree, old_tree, self.file, self.file)
+        self.assertEqual((changed, removed), ([], 0))
+        self.assertEqual(position_map.map(9, 8), (9, 8))
+
+    def test_changes_code(self):
+        self.assertEqual(get_changed_lines(['a\n', 'b\n', 'a\n'],
+                                           ['a\n', 'c\n', 'd\n', 'a\n']),
+                         (['b\n'], ['c\n', 'd\n']))
+        self.assertEqual(get_changed_lines(['a\n'], ['a\n', 'a\n']),
+                         ([], ['a\n']))
+        self.assertTrue(changes_code(self.file, self.file[:4] +
+                                     ['    return os.path\n'] +
+                                     self.file[5:]))
+        self.assertFalse(changes_code(self.file, self.file[:4] +
+                                      ['    return (sys.path)  # Path\n'] +
+                                      self.file[5:]))
+        # Only the changed lines are tokenized, even if they start inside
+        # a string. Lines that cannot be tokenized leave it undecided.
+        self.assertTrue(changes_code(self.file, self.file[:8] +
+                                     ['    >>> baz()\n'] + self.file[9:]))
+        self.assertFalse(changes_code(self.file, self.file[:8] +
+                                      ["    >>> '''\n"] + self.file[9:]))
+
+    def test_layout_change_is_reused(self):
+        diff = Diff(self.file)
+        diff.add_lines(0, ['# A comment\n', '\n'])
+        diff.modify_line(4, 'def foo( ):\n')
+        diff.modify_line(5, '    return (sys.path)\n')
+        previous = self.analyse(self.file)
+
+        with patch('pyflakes_bears.PyFlakesIncremental.Checker') as checker:
+            result = reanalyse(previous, diff, self.filename)
+            self.assertFalse(checker.called)
+
+        self.check_equivalent(result, self.analyse(diff.modified))
+        foo = result.get_node(result.module_scope, 'foo', FunctionDefinition)
+        self.assertEqual((foo.lineno, foo.col_offset), (6, 0))
+        redefinition = [message for message in result.pyflakes_messages
+                        if isinstance(message, RedefinedWhileUnused)]
+        self.assertEqual(redefinition[0].message_args, ('os', 3))
+
+    def test_code_change_is_reanalysed(self):
+        diff = Diff(self.file)
+        diff.modify_line(5, '    return os.path\n')
+        previous = self.analyse(self.file)
+
+        with patch('pyflakes_bears.PyFlakesIncremental.match_statements',
+                   wraps=match_statements) as match:
+            result = reanalyse(previous, diff, self.filename)
+            self.assertFalse(match.called)
+
+        self.check_equivalent(result, self.analyse(diff.modified))
+        unused = [message.message_args
+                  for message in result.pyflakes_messages
+                  if isinstance(message, UnusedImport)]
+        self.assertIn(('sys',), unused)
+        os_node = result.get_node(result.module_scope, 'os', Importation)
+        self.assertTrue(os_node.used)
+
+    def test_ambiguous_position_is_reanalysed(self):
+        file = ['x = 1\n', 'x.real\n']
+        diff = Diff(file)
+        diff.modify_line(2, '(x).real\n')
+        previous = self.analyse(file)
+
+        with patch('pyflakes_bears.PyFlakesIncremental.Checker',
+                   wraps=Checker) as checker:
+            result = reanalyse(previous, diff, self.filename)
+            self.assertTrue(checker.called)
+
+        self.check_equivalent(result, self.analyse(diff.modified))
+
+    def test_doctest_setting_is_respected(self):
+        diff = Diff(self.file)
+        diff.add_lines(0, ['# A comment\n'])
+        previous = self.analyse(self.file)
+        self.assertTrue(previous.with_doctest)
+
+        result = reanalyse(previous, diff, self.filename, with_doctest=False)
+        self.assertEqual(result.doctest_scopes, [])
+        self.assertFalse(result.with_doctest)
+
+        result = reanalyse(previous, diff, self.filename)
+        self.assertEqual(len(result.doctest_scopes), 1)
+        self.assertTrue(result.with_doctest)
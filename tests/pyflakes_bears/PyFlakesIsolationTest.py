@@ -0,0 +1,81 @@
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from pyflakes.checker import ModuleScope
+from pyflakes_bears import PyFlakesIsolation
+from pyflakes_bears.PyFlakesIsolation import (
+    AnalysisSkipped, analyse_isolated, resource, write_skip_record)
+from pyflakes_bears.PyFlakesSnapshot import BindingSnapshot
+
+
+def crash(*args, **kwargs):
+    os._exit(3)
+
+
+class PyFlakesIsolationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.source = ''.join('def f{0}(x):\n    return [x for _ in x]\n'
+                              .format(index) for index in range(20000))
+
+    def test_analyse_isolated(self):
+        scopes, messages = analyse_isolated(
+            'test.py', ['import os\n'], time_limit=60, memory_limit=1000)
+        self.assertIsInstance(scopes[0], ModuleScope)
+        self.assertIsInstance(scopes[0]['os'], BindingSnapshot)
+        self.assertEqual([message.message_args for message in messages],
+                         [('os',)])
+
+        scopes, messages = analyse_isolated(
+            'test.py', ['from __future__ import division\n'],
+            requirements=(('ModuleScope',), ('FutureImportation',)))
+        self.assertIn('division', scopes[0])
+        self.assertEqual(messages, [])
+
+        with self.assertRaises(SyntaxError):
+            analyse_isolated('test.py', 'def f(:\n')
+
+    def test_time_limit(self):
+        with self.assertRaises(AnalysisSkipped) as context:
+            analyse_isolated('test.py', self.source, time_limit=0.01)
+        self.assertEqual(context.exception.filename, 'test.py')
+        self.assertEqual(context.exception.reason, 'time')
+        self.assertEqual(str(context.exception),
+                         'The analysis took longer than 0.01 seconds.')
+
+    @unittest.skipIf(resource is None, 'resource limits are not supported')
+    def test_memory_limit(self):
+        with self.assertRaises(AnalysisSkipped) as context:
+            analyse_isolated('test.py', self.source, memory_limit=5)
+        self.assertEqual(context.exception.reason, 'memory')
+
+    @unittest.skipIf(multiprocessing.get_start_method() != 'fork',
+                     'the patch is not inherited by the worker')
+    def test_crash(self):
+        with patch.object(PyFlakesIsolation, 'analyse_source', crash):
+            with self.assertRaises(AnalysisSkipped) as context:
+                analyse_isolated('test.py', 'import os\n')
+        self.assertEqual(context.exception.reason, 'crash')
+        self.assertEqual(str(context.exception),
+                         'The analysis crashed with exit code 3.')
+
+    def test_write_skip_record(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        report_file = os.path.join(directory, 'skipped.jsonl')
+        skipped = AnalysisSkipped('a.py', 'time', 'Too slow.')
+        write_skip_record('', 'bear', skipped)
+        self.assertFalse(os.path.exists(report_file))
+
+        write_skip_record(report_file, 'bear', skipped)
+        write_skip_record(report_file, 'bear', skipped)
+        with open(report_file) as file:
+            records = [json.loads(line) for line in file]
+        self.assertEqual(records, 2 * [{'bear': 'bear', 'file': 'a.py',
+                                        'reason': 'time',
+                                        'message': 'Too slow.'}])
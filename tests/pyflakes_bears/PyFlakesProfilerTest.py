@@ -0,0 +1,99 @@
+import ast
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from pyflakes.checker import DoctestScope
+from pyflakes_bears.PyFlakesProfiler import (
+    NULL_RECORDER, PhaseRecorder, TimedChecker, get_recorder)
+
+
+class PyFlakesProfilerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.timing_file = os.path.join(self.directory, 'timings.jsonl')
+        self.profile_directory = os.path.join(self.directory, 'profiles')
+
+    def read_records(self):
+        with open(self.timing_file) as file:
+            return [json.loads(line) for line in file]
+
+    def test_get_recorder(self):
+        self.assertIs(get_recorder('bear', 'a.py'), NULL_RECORDER)
+        self.assertIsInstance(get_recorder('bear', 'a.py', self.timing_file),
+                              PhaseRecorder)
+        self.assertIsInstance(get_recorder('bear', 'a.py',
+                                           profile_directory='profiles'),
+                              PhaseRecorder)
+
+    def test_records(self):
+        for filename in ('a.py', 'b.py'):
+            with PhaseRecorder('bear', filename, self.timing_file) as recorder:
+                with recorder.phase('parse'):
+                    [object() for _ in range(100)]
+                with recorder.phase('checker'):
+                    pass
+                with recorder.phase('parse'):
+                    pass
+
+        records = self.read_records()
+        self.assertEqual([record['file'] for record in records],
+                         ['a.py', 'b.py'])
+        self.assertEqual(records[0]['bear'], 'bear')
+        self.assertEqual(list(records[0]['phases']), ['parse', 'checker'])
+        self.assertEqual(set(records[0]['phases']['parse']),
+                         {'wall', 'cpu', 'net_blocks'})
+        self.assertGreaterEqual(records[0]['wall'],
+                                records[0]['phases']['parse']['wall'])
+
+    def test_no_record_on_error(self):
+        with self.assertRaises(ValueError):
+            with PhaseRecorder('bear', 'a.py', self.timing_file):
+                raise ValueError
+        self.assertFalse(os.path.exists(self.timing_file))
+
+    def test_net_blocks(self):
+        kept = []
+        with PhaseRecorder('bear', 'a.py', self.timing_file) as recorder:
+            with recorder.phase('freed'):
+                [object() for _ in range(100000)]
+            with recorder.phase('kept'):
+                kept.extend(object() for _ in range(100000))
+        phases = self.read_records()[0]['phases']
+        self.assertLess(phases['freed']['net_blocks'], 1000)
+        self.assertGreater(phases['kept']['net_blocks'], 99000)
+
+    def test_profile_threshold(self):
+        with PhaseRecorder('bear', 'src/a.py',
+                           profile_directory=self.profile_directory,
+                           profile_threshold=3600):
+            pass
+        self.assertFalse(os.path.exists(self.profile_directory))
+
+        for filename in ('src/a.py', 'src_a.py'):
+            with PhaseRecorder('bear', filename,
+                               profile_directory=self.profile_directory,
+                               profile_threshold=0):
+                pass
+        names = sorted(os.listdir(self.profile_directory))
+        self.assertEqual(len(names), 2)
+        for name in names:
+            self.assertRegex(name, r'^bear-src_a\.py-[0-9a-f]{8}\.prof$')
+
+    def test_timed_checker(self):
+        tree = ast.parse('def foo():\n'
+                         '    """\n'
+                         '    >>> foo()\n'
+                         '    """\n')
+        with PhaseRecorder('bear', 'a.py', self.timing_file) as recorder:
+            with recorder.phase('checker'):
+                checker = TimedChecker(tree, 'a.py', withDoctest=True,
+                                       recorder=recorder)
+        self.assertTrue(any(isinstance(scope, DoctestScope)
+                            for scope in checker.deadScopes))
+        self.assertEqual(set(self.read_records()[0]['phases']),
+                         {'checker', 'doctest'})
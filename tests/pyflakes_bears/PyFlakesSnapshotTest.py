@@ -0,0 +1,84 @@
+import ast
+import pickle
+import unittest
+
+from pyflakes_bears.PyFlakesSnapshot import (
+    BindingSnapshot, get_binding_class, snapshot_binding, snapshot_scope,
+    snapshot_scopes)
+from pyflakes.checker import Checker
+from pyflakes.checker import Builtin, FunctionDefinition, Importation
+from pyflakes.checker import FunctionScope, ModuleScope
+
+
+class PyFlakesSnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.filename = 'PyFlakesSnapshotTemp'
+
+    def check(self, file):
+        tree = ast.parse(''.join(file))
+        return Checker(tree, filename=self.filename, withDoctest=True)
+
+    def test_binding_snapshot(self):
+        checker = self.check(['import sys\n',
+                              'def foo():\n',
+                              '  return sys\n'])
+        module_scope = checker.deadScopes[-1]
+        snapshot = snapshot_binding(module_scope['sys'])
+
+        self.assertIsInstance(snapshot, BindingSnapshot)
+        self.assertEqual(snapshot.name, 'sys')
+        self.assertIs(snapshot.binding_class, Importation)
+        self.assertEqual(snapshot.lineno, 1)
+        self.assertEqual(snapshot.col_offset, 0)
+        self.assertTrue(snapshot.used)
+        self.assertEqual(snapshot.source.lineno, 1)
+        self.assertFalse(hasattr(snapshot, '__dict__'))
+
+        function = snapshot_binding(module_scope['foo'])
+        self.assertIs(get_binding_class(function), FunctionDefinition)
+        self.assertFalse(function.used)
+
+    def test_builtin_snapshot(self):
+        first = self.check(['x = 1\n']).deadScopes[-1]
+        second = self.check(['y = 2\n']).deadScopes[-1]
+        snapshot = snapshot_binding(first['len'])
+
+        self.assertIs(snapshot.binding_class, Builtin)
+        self.assertIsNone(snapshot.source)
+        self.assertIs(snapshot, snapshot_binding(second['len']))
+
+    def test_scope_snapshot(self):
+        checker = self.check(['import os\n',
+                              'def foo(a):\n',
+                              '  b = a\n'])
+        scopes = snapshot_scopes(checker.deadScopes)
+
+        self.assertEqual([type(scope) for scope in scopes],
+                         [type(scope) for scope in checker.deadScopes])
+        function_scope = scopes[0]
+        self.assertIsInstance(function_scope, FunctionScope)
+        self.assertEqual(set(function_scope), {'a', 'b'})
+        for binding in function_scope.values():
+            self.assertIsInstance(binding, BindingSnapshot)
+        self.assertIsInstance(scopes[-1], ModuleScope)
+        self.assertIs(scopes[-1]['os'].binding_class, Importation)
+
+    def test_pickle(self):
+        checker = self.check(['from __future__ import division\n',
+                              'import os\n',
+                              'class Foo:\n',
+                              '  x = [i for i in range(3)]\n'])
+        scopes = snapshot_scopes(checker.deadScopes)
+        restored = pickle.loads(pickle.dumps(scopes))
+
+        self.assertEqual([type(scope) for scope in restored],
+                         [type(scope) for scope in scopes])
+        for original, copy in zip(scopes, restored):
+            self.assertEqual(dict(original), dict(copy))
+
+    def test_snapshot_of_snapshot(self):
+        scope = snapshot_scope(self.check(['import os\n']).deadScopes[-1])
+
+        self.assertEqual(dict(snapshot_scope(scope)), dict(scope))
+        self.assertIs(snapshot_binding(scope['os']), scope['os'])
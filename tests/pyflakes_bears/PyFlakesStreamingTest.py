@@ -0,0 +1,74 @@
+import ast
+import threading
+import unittest
+from unittest.mock import patch
+
+from pyflakes.checker import ClassScope, FunctionScope, ModuleScope
+from pyflakes.messages import UnusedImport
+from pyflakes_bears.PyFlakesSnapshot import BindingSnapshot
+from pyflakes_bears.PyFlakesStreaming import ScopeStream, StreamingChecker
+
+
+class PyFlakesStreamingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.file = ['import os\n',
+                     'import sys\n',
+                     'class Foo:\n',
+                     '    pass\n',
+                     'def bar():\n',
+                     '    def baz():\n',
+                     '        return os\n',
+                     '    return baz\n']
+
+    def test_streaming_checker(self):
+        popped = []
+        checker = StreamingChecker(ast.parse(''.join(self.file)),
+                                   on_scope=popped.append)
+        self.assertEqual(popped, checker.deadScopes)
+        self.assertEqual(len(popped), 4)
+
+    def test_unsupported_pyflakes(self):
+        with patch('pyflakes_bears.PyFlakesStreaming.Checker', object):
+            with self.assertRaises(RuntimeError):
+                StreamingChecker(ast.parse(''.join(self.file)))
+
+    def test_scope_order(self):
+        stream = ScopeStream(self.file)
+        scopes = list(stream)
+
+        self.assertEqual([type(scope) for scope in scopes],
+                         [ClassScope, FunctionScope, FunctionScope,
+                          ModuleScope])
+        self.assertEqual(scopes, stream.result.dead_scopes)
+        self.assertTrue(stream.result.module_scope['os'].used)
+        self.assertEqual([type(message) for message in
+                          stream.result.pyflakes_messages], [UnusedImport])
+
+    def test_snapshot(self):
+        stream = ScopeStream(self.file, snapshot=True)
+        list(stream)
+        self.assertIsInstance(stream.result.module_scope['os'],
+                              BindingSnapshot)
+
+    def test_syntax_error(self):
+        with self.assertRaises(SyntaxError):
+            list(ScopeStream(['def (:\n']))
+
+    def test_bounded_queue(self):
+        file = ['def function_{}():\n    pass\n'.format(index)
+                for index in range(50)]
+        stream = ScopeStream(file, max_pending=1)
+        self.assertEqual(len(list(stream)), 51)
+
+    def test_cancel(self):
+        file = ['def function_{}():\n    pass\n'.format(index)
+                for index in range(50)]
+        threads = threading.active_count()
+        stream = ScopeStream(file, max_pending=1)
+        iterator = iter(stream)
+        next(iterator)
+        iterator.close()
+
+        self.assertIsNone(stream.result)
+        self.assertEqual(threading.active_count(), threads)
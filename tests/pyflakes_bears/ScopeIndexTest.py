@@ -0,0 +1,53 @@
+import ast
+import unittest
+
+from pyflakes_bears.ScopeIndex import ScopeIndex
+from pyflakes_bears.PyFlakesSnapshot import snapshot_scope
+from pyflakes.checker import Checker
+from pyflakes.checker import (
+    Assignment, FutureImportation, Importation, ImportationFrom)
+
+
+class ScopeIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        file = ['from __future__ import division\n',
+                'import os\n',
+                'x = 1\n',
+                'from sys import path\n',
+                'import re\n']
+        checker = Checker(ast.parse(''.join(file)), 'ScopeIndexTemp')
+        self.module_scope = checker.deadScopes[-1]
+
+    def test_get_nodes(self):
+        uut = ScopeIndex(self.module_scope)
+
+        self.assertEqual([node.name for node in uut.get_nodes(Assignment)],
+                         ['x'])
+        self.assertEqual(
+            [node.name for node in uut.get_nodes(FutureImportation)],
+            ['division'])
+
+    def test_subclass_order(self):
+        uut = ScopeIndex(self.module_scope)
+
+        self.assertEqual(
+            [node.name for node in uut.get_nodes(Importation)],
+            ['division', 'os', 'path', 're'])
+        self.assertEqual(
+            [node.name
+             for node in uut.get_nodes((ImportationFrom, Assignment))],
+            ['division', 'x', 'path'])
+
+    def test_snapshot_scope(self):
+        uut = ScopeIndex(snapshot_scope(self.module_scope))
+
+        self.assertEqual(
+            [node.name for node in uut.get_nodes(ImportationFrom)],
+            ['division', 'path'])
+
+    def test_repeated_query(self):
+        uut = ScopeIndex(self.module_scope)
+
+        self.assertIs(uut.get_nodes(Importation),
+                      uut.get_nodes(Importation))
@@ -0,0 +1,76 @@
+import ast
+import unittest
+from unittest.mock import patch
+
+from pyflakes.checker import Checker
+from pyflakes_generic_plugins.CheckerRegistry import CheckerRegistry
+
+
+class CheckerRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = CheckerRegistry(max_entries=2)
+        self.source = ['import os\n', 'os.getcwd()\n']
+        self.tree = ast.parse(''.join(self.source))
+
+    def test_get_checker_reuses_checker_of_tree(self):
+        checker = self.registry.get_checker(self.tree, 'a.py')
+        self.assertIs(self.registry.get_checker(self.tree, 'a.py'), checker)
+        with patch.object(Checker, '__init__', autospec=True,
+                          side_effect=Checker.__init__) as mock:
+            self.registry.get_checker(self.tree, 'a.py')
+            self.assertFalse(mock.called)
+            self.registry.get_checker(ast.parse(''.join(self.source)),
+                                      'a.py')
+            self.assertEqual(mock.call_count, 1)
+
+    def test_get_checker_reuses_checker_of_source(self):
+        checker = Checker(self.tree, 'a.py')
+        self.registry.register('a.py', checker, source=self.source)
+        tree = ast.parse(''.join(self.source))
+        self.assertIs(self.registry.get_checker(tree, 'a.py',
+                                                source=self.source),
+                      checker)
+
+        other = self.registry.get_checker(tree, 'b.py', source=self.source)
+        self.assertIsNot(other, checker)
+        self.assertIs(self.registry.get('b.py', source=self.source), other)
+
+    def test_get_by_source(self):
+        checker = Checker(self.tree, 'a.py')
+        self.registry.register('a.py', checker, source=self.source)
+        self.assertIs(self.registry.get('a.py', source=self.source), checker)
+        self.assertIs(self.registry.get('a.py',
+                                        source=''.join(self.source)),
+                      checker)
+        self.assertIsNone(self.registry.get('a.py', source=['import os\n']))
+        self.assertIsNone(self.registry.get('b.py', source=self.source))
+        self.assertIs(self.registry.get('a.py', tree=self.tree), checker)
+
+    def test_get_with_doctest(self):
+        checker = Checker(self.tree, 'a.py', withDoctest=True)
+        self.registry.register('a.py', checker)
+        self.assertIs(self.registry.get('a.py', tree=self.tree), checker)
+        self.assertIs(self.registry.get('a.py', tree=self.tree,
+                                        with_doctest=True),
+                      checker)
+        self.assertIsNone(self.registry.get('a.py', tree=self.tree,
+                                            with_doctest=False))
+
+    def test_eviction(self):
+        checkers = {}
+        for filename in ('a.py', 'b.py'):
+            checkers[filename] = self.registry.get_checker(
+                ast.parse(''.join(self.source)), filename)
+        self.registry.get('a.py', tree=checkers['a.py'].root)
+        self.registry.get_checker(self.tree, 'c.py')
+
+        self.assertIsNotNone(self.registry.get('a.py',
+                                               tree=checkers['a.py'].root))
+        self.assertIsNone(self.registry.get('b.py',
+                                            tree=checkers['b.py'].root))
+
+    def test_clear(self):
+        self.registry.get_checker(self.tree, 'a.py')
+        self.registry.clear()
+        self.assertIsNone(self.registry.get('a.py', tree=self.tree))
@@ -1,6 +1,8 @@
 import unittest
 import ast
-from pyflakes_generic_plugins.NoFutureImport import NoFutureImport
+from unittest.mock import patch
+from pyflakes_generic_plugins.NoFutureImport import (
+    NoFutureImport, has_future_import, has_future_import_statement)
 from pyflakes.checker import Checker
 
 
@@ -31,7 +33,7 @@ class NoFutureImportTest(unittest.TestCase):
         no_future_instance = NoFutureImport(tree, self.filename)
         no_future_instance.checker = checker
 
-        self.assertTrue(no_future_instance.module_scope)
+        self.assertIs(no_future_instance.checker, checker)
         self.assertFalse(len(list(no_future_instance.run())))
 
     def test_valid(self):
@@ -46,3 +48,68 @@ class NoFutureImportTest(unittest.TestCase):
         self.check_invalidity(['from __future__ import division, '
                                'print_function'])
         self.check_invalidity(['from __future__ import division;'])
+
+    def test_shared_checker(self):
+        tree = ast.parse('from __future__ import division\n')
+        checker = NoFutureImport(tree, self.filename).checker
+        self.assertIs(NoFutureImport(tree, self.filename).checker, checker)
+
+        no_future_instance = NoFutureImport(tree, self.filename)
+        no_future_instance.checker = Checker(tree, self.filename,
+                                             withDoctest=True)
+        self.assertIs(NoFutureImport(tree, self.filename).checker,
+                      no_future_instance.checker)
+        self.assertEqual(len(list(NoFutureImport(tree,
+                                                 self.filename).run())), 1)
+
+    def test_has_future_import(self):
+        self.assertFalse(has_future_import([]))
+        self.assertFalse(has_future_import(['import sys\n',
+                                            'from __future__ import x\n']))
+        self.assertFalse(has_future_import(['"""Docstring."""\n',
+                                            '"""Statement."""\n',
+                                            'from __future__ import x\n']))
+        self.assertTrue(has_future_import(['#!/usr/bin/env python\n',
+                                           '"""\n',
+                                           'Docstring.\n',
+                                           '"""\n',
+                                           '\n',
+                                           '# Comment\n',
+                                           'from __future__ import x\n']))
+        self.assertTrue(has_future_import(['"Docstring"; '
+                                           'from __future__ import x\n']))
+        # Headers that are not understood count as having future imports.
+        self.assertTrue(has_future_import(['("Docstring")\n']))
+        self.assertTrue(has_future_import(['"""Unterminated\n']))
+
+    def test_has_future_import_statement(self):
+        self.assertFalse(has_future_import_statement(ast.parse('')))
+        self.assertFalse(has_future_import_statement(
+            ast.parse('"""Docstring."""\nimport sys\n')))
+        self.assertTrue(has_future_import_statement(
+            ast.parse('"""Docstring."""\nfrom __future__ import division\n')))
+
+    def test_no_checker_without_future_import(self):
+        no_future_instance = NoFutureImport(ast.parse('import sys\n'),
+                                            self.filename)
+        self.assertFalse(list(no_future_instance.run()))
+        self.assertIsNone(no_future_instance._checker)
+
+    def test_results_cache(self):
+        lines = ['from __future__ import division\n', 'x = 1\n']
+        NoFutureImport.results_cache.clear()
+        first = list(NoFutureImport(ast.parse(''.join(lines)),
+                                    self.filename, lines).run())
+
+        with patch('pyflakes.checker.Checker') as mock:
+            instance = NoFutureImport(ast.parse(''.join(lines)),
+                                      'copy.py', lines)
+            self.assertEqual(list(instance.run()), first)
+            self.assertFalse(mock.called)
+            self.assertIsNone(instance._checker)
+
+        other_lines = ['from __future__ import generators\n']
+        results = list(NoFutureImport(ast.parse(''.join(other_lines)),
+                                      self.filename, other_lines).run())
+        self.assertEqual(results[0][2], 'F482: Future import generators found')
+        self.assertEqual(len(NoFutureImport.results_cache), 2)
@@ -0,0 +1,112 @@
+import ast
+import unittest
+from collections import OrderedDict
+from unittest.mock import patch
+
+from pyflakes.checker import (
+    Checker, FunctionScope, Importation, ModuleScope, SubmoduleImportation)
+from pyflakes.messages import UndefinedName, UnusedImport
+from pyflakes_generic_plugins.RuleEngine import (
+    Dispatcher, Rule, RuleEngine, RulePlugin, resolve_types)
+
+
+class ImportRule(Rule):
+    CODE = 'T001'
+    BINDING_TYPES = ('Importation',)
+
+    def visit_binding(self, scope, binding):
+        yield self.report(binding.source.lineno, binding.source.col_offset,
+                          'import {}'.format(binding.name))
+
+
+class ScopeRule(Rule):
+    CODE = 'T002'
+    SCOPE_TYPES = (FunctionScope,)
+
+    def visit_scope(self, scope):
+        yield self.report(1, 0, 'function with {} names'.format(len(scope)))
+
+
+class MessageRule(Rule):
+    CODE = 'T003'
+    MESSAGE_TYPES = ('UndefinedName',)
+
+    def visit_message(self, message):
+        yield self.report(message.lineno, message.col,
+                          'undefined {}'.format(*message.message_args))
+
+
+class NoImportRule(ImportRule):
+
+    def applies(self, tree):
+        return any(isinstance(node, ast.Import) for node in tree.body)
+
+
+class TestPlugin(RulePlugin):
+    name = 'test'
+    version = '0.1'
+    RULES = (ImportRule, MessageRule)
+    results_cache = OrderedDict()
+
+
+class RuleEngineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.source = ['import os.path\n',
+                       'import sys\n',
+                       'def f():\n',
+                       '    return x\n']
+        self.tree = ast.parse(''.join(self.source))
+        self.checker = Checker(self.tree, 'a.py')
+
+    def test_resolve_types(self):
+        self.assertEqual(resolve_types(('Importation', ModuleScope),
+                                       'pyflakes.checker'),
+                         (Importation, ModuleScope))
+        self.assertEqual(resolve_types(('UnusedImport',),
+                                       'pyflakes.messages'),
+                         (UnusedImport,))
+
+    def test_dispatcher(self):
+        rules = (ImportRule(), ScopeRule(), MessageRule())
+        dispatcher = Dispatcher(rules)
+        self.assertTrue(dispatcher.wants('binding'))
+        self.assertEqual(dispatcher.get_rules('binding',
+                                              SubmoduleImportation),
+                         (rules[0],))
+        self.assertEqual(dispatcher.get_rules('scope', ModuleScope), ())
+        self.assertEqual(dispatcher.get_rules('message', UndefinedName),
+                         (rules[2],))
+        self.assertEqual(dispatcher.get_rules('message', UnusedImport), ())
+        self.assertFalse(Dispatcher((ScopeRule(),)).wants('binding'))
+
+    def test_run(self):
+        engine = RuleEngine([ImportRule(), ScopeRule(), MessageRule()])
+        reports = engine.run(self.tree, lambda: self.checker)
+        self.assertEqual(sorted(reports),
+                         [(1, 0, 'T001: import os'),
+                          (1, 0, 'T002: function with 0 names'),
+                          (2, 0, 'T001: import sys'),
+                          (4, 11, 'T003: undefined x')])
+
+    def test_rules_not_applying(self):
+        engine = RuleEngine([NoImportRule()])
+        tree = ast.parse('x = 1\n')
+        self.assertEqual(engine.run(tree, self.fail), [])
+        self.assertEqual(len(engine.run(self.tree, lambda: self.checker)), 2)
+
+    def test_plugin(self):
+        TestPlugin.results_cache.clear()
+        results = list(TestPlugin(self.tree, 'a.py', self.source).run())
+        self.assertEqual(sorted(result[:3] for result in results),
+                         [(1, 0, 'T001: import os'),
+                          (2, 0, 'T001: import sys'),
+                          (4, 11, 'T003: undefined x')])
+        self.assertIs(results[0][3], TestPlugin)
+
+        with patch('pyflakes.checker.Checker') as mock:
+            self.assertEqual(list(TestPlugin(ast.parse(''.join(self.source)),
+                                             'b.py', self.source).run()),
+                             results)
+            self.assertFalse(mock.called)
+        self.assertIs(TestPlugin.get_engine(), TestPlugin.get_engine())